@@ -0,0 +1,83 @@
+"""
+Benchmark feature extraction throughput and scaling across worker counts.
+
+Runs the same extraction as train_on_real_data for each worker count,
+reports battles/s and scaling efficiency (speedup over one worker divided by
+the worker count), and checks every run produces the same dataset as the
+single-process run.
+
+Usage:
+    python benchmarks/bench_extraction.py [--workers 1 2 4] [--cache-size 0]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.data import battles as battle_io  # noqa: E402
+from src.data.snapshot import load_snapshot  # noqa: E402
+from src.features.cache import TeamFeatureCache  # noqa: E402
+from src.features.coverage import CoverageAnalyzer  # noqa: E402
+from src.features.dataset import DatasetBuffer, extract_battles, extract_battles_parallel  # noqa: E402
+from src.features.meta import MetaAnalyzer  # noqa: E402
+
+
+def run_extraction(battles_file: Path, workers: int, chunk_size: int, cache_size: int) -> DatasetBuffer:
+    """Extract the dataset the way train_on_real_data does."""
+    dataset = DatasetBuffer(capacity=2 * battle_io.count_battles(battles_file))
+    if workers > 1:
+        return extract_battles_parallel(
+            battle_io.iter_line_chunks(battles_file, chunk_size), workers, cache_size=cache_size, dataset=dataset
+        )
+
+    snapshot = load_snapshot()
+    coverage_analyzer = CoverageAnalyzer(snapshot.type_chart, snapshot.pokedex)
+    meta_analyzer = MetaAnalyzer(snapshot.type_chart, snapshot.pokedex, snapshot.usage_stats)
+    cache = TeamFeatureCache(cache_size) if cache_size > 0 else None
+    for chunk in battle_io.iter_battle_chunks(battles_file, chunk_size):
+        extract_battles(chunk, snapshot.pokedex, coverage_analyzer, meta_analyzer, cache, dataset)
+    return dataset
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--battles", type=Path, default=REPO_ROOT / "data/replays/battles_fast.jsonl")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--cache-size", type=int, default=0, help="Feature cache size (0 measures uncached work)")
+    args = parser.parse_args()
+
+    n_battles = battle_io.count_battles(args.battles)
+    worker_counts = sorted(set(args.workers) | {1})
+    load_snapshot()  # Build the snapshot once so no run pays for it
+
+    print(f"{n_battles} battles, chunk size {args.chunk_size}, cache size {args.cache_size}")
+    print(f"{'Workers':>7} {'Time (s)':>9} {'Battles/s':>10} {'Speedup':>8} {'Efficiency':>11}")
+    print("-" * 49)
+
+    baseline = None
+    for workers in worker_counts:
+        started = time.perf_counter()
+        dataset = run_extraction(args.battles, workers, args.chunk_size, args.cache_size)
+        elapsed = time.perf_counter() - started
+
+        if baseline is None:
+            baseline = (elapsed, dataset.X.copy(), dataset.y.copy())
+        elif not (np.array_equal(dataset.X, baseline[1]) and np.array_equal(dataset.y, baseline[2])):
+            raise SystemExit(f"{workers} workers produced a different dataset than 1 worker")
+
+        speedup = baseline[0] / elapsed
+        print(
+            f"{workers:>7} {elapsed:>9.2f} {n_battles / elapsed:>10,.0f} "
+            f"{speedup:>7.2f}x {speedup / workers:>10.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Benchmark the replay log parser against the original line-splitting parser.
+
+Measures parse time per replay on sample_replay.json (repeated) and on a
+corpus of synthetic raw replays (decode + parse, as when re-extracting
+cached replays), and checks both parsers produce the same records.
+
+Usage:
+    python benchmarks/bench_parser.py [--replays 20000] [--workers 1 2 4]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from synthetic_battles import SAMPLE_REPLAY, synthetic_replays_file  # noqa: E402
+from scrape_replays import MIN_RATING  # noqa: E402
+from src.data import battles as battle_io  # noqa: E402
+from src.scrape.parser import iter_parse_parallel, parse_replay  # noqa: E402
+
+
+def baseline_extract(replay: dict, min_rating: int = MIN_RATING) -> dict | None:
+    """The original extract_battle_data: split the whole log, then split every line."""
+    log = replay.get('log', '')
+    lines = log.split('\n')
+    p1_name = p2_name = None
+    p1_rating = p2_rating = 1500
+    p1_team, p2_team = [], []
+    winner = None
+
+    for line in lines:
+        parts = line.split('|')
+        if len(parts) > 1 and parts[0] == '' and parts[1] == 'player':
+            if len(parts) < 6:
+                continue
+            rating = int(parts[5]) if parts[5].isdigit() else 1500
+            if parts[2] == 'p1':
+                p1_name, p1_rating = parts[3], rating
+            elif parts[2] == 'p2':
+                p2_name, p2_rating = parts[3], rating
+        elif len(parts) > 3 and parts[0] == '' and parts[1] == 'poke':
+            pokemon_name = parts[3].split(',')[0]
+            if parts[2] == 'p1':
+                p1_team.append(pokemon_name)
+            elif parts[2] == 'p2':
+                p2_team.append(pokemon_name)
+        elif len(parts) > 2 and parts[0] == '' and parts[1] == 'win':
+            if parts[2] == p1_name:
+                winner = 'p1'
+            elif parts[2] == p2_name:
+                winner = 'p2'
+
+    if len(p1_team) != 6 or len(p2_team) != 6 or not winner:
+        return None
+    if p1_rating < min_rating or p2_rating < min_rating:
+        return None
+    return {
+        'battle_id': replay.get('id', ''),
+        'p1_name': p1_name,
+        'p2_name': p2_name,
+        'p1_team': p1_team,
+        'p2_team': p2_team,
+        'winner': winner,
+        'p1_rating': p1_rating,
+        'p2_rating': p2_rating,
+        'rating_diff': abs(p1_rating - p2_rating),
+    }
+
+
+def fast_extract(replay: dict, min_rating: int = MIN_RATING) -> dict | None:
+    record = parse_replay(replay, min_rating)
+    if record is None:
+        return None
+    record = record.to_dict()
+    del record['timestamp']
+    return record
+
+
+def time_per_item(fn, items, repeat: int = 1) -> float:
+    """Best-of-repeat seconds per item."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - started)
+    return best / len(items)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sample-repeats", type=int, default=5000, help="Parses of sample_replay.json")
+    parser.add_argument("--replays", type=int, default=20000, help="Synthetic corpus size")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    sample = json.loads(SAMPLE_REPLAY.read_text())
+    if fast_extract(sample, 0) != baseline_extract(sample, 0):
+        raise SystemExit("Parsers disagree on sample_replay.json")
+    items = [sample] * args.sample_repeats
+    baseline_s = time_per_item(lambda replay: baseline_extract(replay, 0), items, repeat=3)
+    fast_s = time_per_item(lambda replay: fast_extract(replay, 0), items, repeat=3)
+    print(f"sample_replay.json ({len(sample['log'].splitlines())} log lines)")
+    print(f"  baseline {baseline_s * 1e6:8.1f} µs/replay")
+    print(f"  fast     {fast_s * 1e6:8.1f} µs/replay  ({baseline_s / fast_s:.1f}x)")
+
+    replays_file = synthetic_replays_file(args.replays)
+    with open(replays_file, "rb") as f:
+        raw = [line for line in f if line.strip()]
+    size_mb = sum(map(len, raw)) / 1e6
+
+    started = time.perf_counter()
+    baseline_records = [baseline_extract(json.loads(line)) for line in raw]
+    baseline_s = time.perf_counter() - started
+
+    loads = battle_io.get_json_decoder()
+    started = time.perf_counter()
+    decoded = [loads(line) for line in raw]
+    decode_s = time.perf_counter() - started
+    parse_s = time_per_item(parse_replay, decoded) * len(decoded)
+    if [fast_extract(replay) for replay in decoded] != baseline_records:
+        raise SystemExit("Parsers disagree on the synthetic corpus")
+
+    print(f"\n{len(raw)} synthetic replays ({size_mb:.0f} MB)")
+    print(f"  baseline (json + split)      {len(raw) / baseline_s:>9,.0f} replays/s")
+    print(f"  fast parse only              {len(raw) / parse_s:>9,.0f} replays/s")
+    print(f"  fast decode + parse          {len(raw) / (decode_s + parse_s):>9,.0f} replays/s")
+
+    chunks = [raw[i : i + args.chunk_size] for i in range(0, len(raw), args.chunk_size)]
+    for workers in sorted(set(args.workers)):
+        started = time.perf_counter()
+        records = [record for batch in iter_parse_parallel(chunks, workers, MIN_RATING) for record in batch]
+        elapsed = time.perf_counter() - started
+        if sum(record is not None for record in records) != sum(record is not None for record in baseline_records):
+            raise SystemExit(f"{workers} workers parsed a different number of battles")
+        print(f"  batch, {workers} worker(s)           {len(raw) / elapsed:>9,.0f} replays/s ({baseline_s / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Load-test the scrapers against the local mock Showdown server.
+
+Starts mock_showdown_server.py in this process, then runs each scraper in a
+fresh interpreter against it, with its output in a temporary directory and
+the replay cache off:
+
+    fast        scrape_fast.scrape_with_search_api (one request at a time)
+    concurrent  scrape_fast.scrape_concurrent (asyncio, token bucket, retries)
+    sequential  scrape_replays.scrape_replays (walks battle ids upward)
+
+Every scraper gets the same request budget (--rate requests/s; the
+sequential ones sleep 1/rate between replays). Reports battles/s, replays
+served/s, success rate, and the server's view of retries: 429s, 5xx and
+dropped connections seen, repeat requests, and replays lost (requested,
+never served, though they exist).
+
+Usage:
+    python benchmarks/bench_scrapers.py --target 300 --latency 0.05 --rate 20
+    python benchmarks/bench_scrapers.py --modes concurrent --max-rate 15 --error-rate 0.05 --drop-rate 0.02
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from mock_showdown_server import add_server_arguments, server_from_args  # noqa: E402
+from src.data import battles as battle_io  # noqa: E402
+
+MODES = ("fast", "concurrent", "sequential")
+OUTPUT_FILES = {"fast": "battles_fast.jsonl", "concurrent": "battles_fast.jsonl", "sequential": "battles.jsonl"}
+
+
+def run_scraper(mode: str, base_url: str, target: int, output_dir: Path, rate: float, concurrency: int, start_id: int) -> dict:
+    """Run one scraper to target battles (in this process)."""
+    import scrape_fast
+    import scrape_replays
+
+    scrape_fast.OUTPUT_DIR = scrape_replays.OUTPUT_DIR = output_dir
+    scrape_fast.RATE_LIMIT_DELAY = scrape_replays.RATE_LIMIT_DELAY = 1 / rate
+
+    result = {}
+    started = time.perf_counter()
+    if mode == "fast":
+        scrape_fast.scrape_with_search_api(target, base_url, restart=True, replay_cache_path=None)
+    elif mode == "concurrent":
+        stats = scrape_fast.scrape_concurrent(target, base_url, concurrency, rate, restart=True, replay_cache_path=None)
+        result["scraper"] = {key: value for key, value in asdict(stats).items() if key != "started"}
+    elif mode == "sequential":
+        scrape_replays.scrape_replays(start_id, target, base_url, restart=True, replay_cache_path=None)
+    else:
+        raise ValueError(f"Unknown mode {mode!r}")
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def _child(args):
+    result = run_scraper(args.mode, args.base_url, args.target, args.output_dir, args.rate, args.concurrency, args.start_id)
+    print(json.dumps(result))
+
+
+def _run_child(mode: str, base_url: str, target: int, output_dir: Path, args) -> dict:
+    command = [
+        sys.executable, str(Path(__file__).resolve()), "_scrape",
+        "--mode", mode, "--base-url", base_url, "--target", str(target), "--output-dir", str(output_dir),
+        "--rate", str(args.rate), "--concurrency", str(args.concurrency), "--start-id", str(args.start_id),
+    ]
+    started = time.perf_counter()
+    try:
+        completed = subprocess.run(command, cwd=REPO_ROOT, capture_output=True, text=True, timeout=args.timeout)
+    except subprocess.TimeoutExpired:
+        # The sequential scraper never stops short of its target
+        return {"seconds": time.perf_counter() - started, "timed_out": True}
+    if completed.returncode != 0:
+        raise RuntimeError(f"{mode} scraper failed:\n{completed.stderr}")
+    if args.verbose:
+        print(completed.stdout)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def available_battles(server) -> int:
+    """Battles the scrapers could collect: served replays that pass extract_battle_data."""
+    from scrape_replays import extract_battle_data
+
+    loads = battle_io.get_json_decoder()
+    count = 0
+    for battle_id in server.replays.ids:
+        raw = server.get_replay(battle_id)
+        if raw is not None and extract_battle_data(loads(raw)) is not None:
+            count += 1
+    return count
+
+
+def run_benchmark(server, modes, target: int, args) -> list[dict]:
+    results = []
+    for mode in modes:
+        server.reset_counters()
+        with tempfile.TemporaryDirectory(prefix=f"bench_scrapers_{mode}_") as output_dir:
+            result = _run_child(mode, server.url, target, Path(output_dir), args)
+            output_file = Path(output_dir) / OUTPUT_FILES[mode]
+            battles = battle_io.count_battles(output_file) if output_file.exists() else 0
+        counters = server.counters()
+        seconds = result["seconds"]
+        result.update(counters)
+        result.update(
+            mode=mode,
+            battles=battles,
+            battles_per_s=battles / seconds if seconds > 0 else 0.0,
+            replays_per_s=counters["replays_served"] / seconds if seconds > 0 else 0.0,
+            success_rate=battles / counters["distinct_replays"] if counters["distinct_replays"] else 0.0,
+        )
+        results.append(result)
+        print(
+            f"{mode:<11} {battles:>7} {seconds:>8.1f}s {result['battles_per_s']:>9.1f} {result['replays_per_s']:>9.1f} "
+            f"{result['success_rate'] * 100:>7.1f}% {counters['requests']:>8} {counters['throttled']:>6} "
+            f"{counters['errors']:>5} {counters['dropped']:>6} {counters['retries']:>7} {counters['lost']:>5}"
+            + ("  (timed out)" if result.get("timed_out") else ""),
+            flush=True,
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    commands = parser.add_subparsers(dest="command")
+
+    scrape_parser = commands.add_parser("_scrape")  # Internal: one scraper run in a fresh process
+    scrape_parser.add_argument("--mode", choices=MODES, required=True)
+    scrape_parser.add_argument("--base-url", required=True)
+    scrape_parser.add_argument("--target", type=int, required=True)
+    scrape_parser.add_argument("--output-dir", type=Path, required=True)
+    scrape_parser.add_argument("--rate", type=float, required=True)
+    scrape_parser.add_argument("--concurrency", type=int, required=True)
+    scrape_parser.add_argument("--start-id", type=int, required=True)
+
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--target", type=int, default=200, help="Battles per scraper (capped at what the server has)")
+    parser.add_argument("--rate", type=float, default=20.0, help="Requests/s budget of every scraper")
+    parser.add_argument("--concurrency", type=int, default=8, help="Downloads in flight (concurrent mode)")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds before a scraper run is stopped")
+    parser.add_argument("--output", type=Path, help="Write the results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="Show the scrapers' output")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    if args.command == "_scrape":
+        _child(args)
+        return
+
+    with server_from_args(args) as server:
+        available = available_battles(server)
+        target = min(args.target, available)
+        print(
+            f"Mock server {server.url}: {len(server.replays.ids)} replays, {available} valid battles | "
+            f"latency {args.latency * 1000:.0f}+{args.jitter * 1000:.0f} ms, missing {args.missing_rate:.0%}, "
+            f"max rate {args.max_rate or '∞'}/s, errors {args.error_rate:.0%}, drops {args.drop_rate:.0%}"
+        )
+        print(f"Target {target} battles per scraper at {args.rate:g} requests/s\n")
+        print(
+            f"{'Mode':<11} {'Battles':>7} {'Time':>9} {'Battles/s':>9} {'Replays/s':>9} {'Success':>8} "
+            f"{'Requests':>8} {'429s':>6} {'5xx':>5} {'Drops':>6} {'Retries':>7} {'Lost':>5}"
+        )
+        print("-" * 102)
+        results = run_benchmark(server, args.modes, target, args)
+
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({"target": target, "available": available, "results": results}, indent=2))
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
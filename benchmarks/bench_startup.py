@@ -0,0 +1,81 @@
+"""
+Benchmark cold-start cost of the data layer.
+
+Each measurement runs in a fresh interpreter so import caches don't carry
+over. Reports import time and construction time for Pokedex, TypeChart and
+UsageStats together, parsing the raw sources and loading the snapshot, and
+whether pandas was pulled in.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 5]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+RAW_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+from src.data.pokedex import Pokedex
+from src.data.types import TypeChart
+from src.data.usage import UsageStats
+t1 = time.perf_counter()
+pokedex, type_chart, usage_stats = Pokedex(), TypeChart(), UsageStats()
+usage_stats.get_top_k(15)
+t2 = time.perf_counter()
+print(json.dumps({"import_s": t1 - t0, "construct_s": t2 - t1, "pandas": "pandas" in sys.modules}))
+"""
+
+SNAPSHOT_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+from src.data.snapshot import load_snapshot
+t1 = time.perf_counter()
+snapshot = load_snapshot()
+snapshot.usage_stats.get_top_k(15)
+t2 = time.perf_counter()
+print(json.dumps({"import_s": t1 - t0, "construct_s": t2 - t1, "pandas": "pandas" in sys.modules}))
+"""
+
+
+def run_probe(code: str) -> dict:
+    """Run a probe in a fresh interpreter and return its JSON result."""
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh processes per probe")
+    args = parser.parse_args()
+
+    # Warm the snapshot so the timed runs measure loading, not building
+    run_probe(SNAPSHOT_PROBE)
+
+    print(f"{'Loader':<12} {'Import (ms)':>12} {'Construct (ms)':>15} {'Total (ms)':>11}  pandas")
+    print("-" * 62)
+    for label, code in (("raw", RAW_PROBE), ("snapshot", SNAPSHOT_PROBE)):
+        runs = [run_probe(code) for _ in range(args.repeat)]
+        import_ms = statistics.median(r["import_s"] for r in runs) * 1000
+        construct_ms = statistics.median(r["construct_s"] for r in runs) * 1000
+        pandas_loaded = any(r["pandas"] for r in runs)
+        print(
+            f"{label:<12} {import_ms:>12.1f} {construct_ms:>15.1f} "
+            f"{import_ms + construct_ms:>11.1f}  {'yes' if pandas_loaded else 'no'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+Benchmark suite: data loading, team scoring, feature extraction and model
+fitting on synthetic battle files of increasing size.
+
+Every (stage, size) pair runs in a fresh interpreter so its peak RSS is its
+own. Results are written as JSON; compare mode flags throughput drops and
+peak memory growth against a stored baseline.
+
+Stages:
+    snapshot      load_snapshot (size independent, measured once)
+    decode        stream-decode the battle file
+    score_scalar  type/meta/role scalar scores per team (first SCALAR_SAMPLE teams)
+    score_batch   score_teams / meta_coverage_scores / role_diversity_scores on all teams
+    extract       streamed feature extraction, as in train_on_real_data
+    fit           train_on_real_data's model for --backend (default: the trainer's
+                  DEFAULT_BACKEND), on the first --fit-max-battles
+
+Usage:
+    python benchmarks/bench_suite.py run --sizes 1000 10000 --output results.json
+    python benchmarks/bench_suite.py run --baseline baseline.json
+    python benchmarks/bench_suite.py compare baseline.json results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.models.backends import DEFAULT_BACKEND, TRAINER_BACKENDS, make_model  # noqa: E402
+
+STAGES = ("snapshot", "decode", "score_scalar", "score_batch", "extract", "fit")
+DEFAULT_SIZES = (1000, 10000, 100000, 1000000)
+SCALAR_SAMPLE = 20000
+DEFAULT_OUTPUT = REPO_ROOT / "data" / "cache" / "bench" / "results.json"
+
+
+def _rss_mb() -> float:
+    """Peak resident set size of this process so far, in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _analyzers():
+    from src.data.snapshot import load_snapshot
+    from src.features.coverage import CoverageAnalyzer
+    from src.features.meta import MetaAnalyzer
+
+    snapshot = load_snapshot()
+    coverage_analyzer = CoverageAnalyzer(snapshot.type_chart, snapshot.pokedex)
+    meta_analyzer = MetaAnalyzer(snapshot.type_chart, snapshot.pokedex, snapshot.usage_stats)
+    # Build the precomputed tables outside the timed region
+    coverage_analyzer.species_tables()
+    meta_analyzer.check_matrix
+    meta_analyzer.top_threats(15)
+    return snapshot.pokedex, coverage_analyzer, meta_analyzer
+
+
+def _teams(battles_file: Path, limit: int = None) -> list:
+    from src.data import battles as battle_io
+
+    teams = []
+    for battle in battle_io.iter_battles(battles_file):
+        teams.append(battle["p1_team"])
+        teams.append(battle["p2_team"])
+        if limit is not None and len(teams) >= limit:
+            return teams[:limit]
+    return teams
+
+
+def _extract(battles_file: Path, pokedex, coverage_analyzer, meta_analyzer, max_battles: int = None):
+    from itertools import islice
+
+    from src.data import battles as battle_io
+    from src.features.cache import TeamFeatureCache
+    from src.features.dataset import DatasetBuffer, extract_battles
+
+    dataset = DatasetBuffer()
+    cache = TeamFeatureCache()
+    battles = battle_io.iter_battles(battles_file)
+    if max_battles is not None:
+        battles = islice(battles, max_battles)
+    return extract_battles(battles, pokedex, coverage_analyzer, meta_analyzer, cache, dataset)
+
+
+def run_stage(stage: str, battles_file: Path, fit_max_battles: int, backend: str = DEFAULT_BACKEND) -> dict:
+    """Run one stage in this process; returns seconds, item count and unit."""
+    if stage == "snapshot":
+        started = time.perf_counter()
+        from src.data.snapshot import load_snapshot
+
+        snapshot = load_snapshot()
+        snapshot.usage_stats.get_top_k(15)
+        return {"seconds": time.perf_counter() - started, "items": 1, "unit": "loads"}
+
+    if stage == "decode":
+        from src.data import battles as battle_io
+
+        started = time.perf_counter()
+        n_battles = sum(1 for _ in battle_io.iter_battles(battles_file))
+        return {"seconds": time.perf_counter() - started, "items": n_battles, "unit": "battles"}
+
+    pokedex, coverage_analyzer, meta_analyzer = _analyzers()
+
+    if stage == "score_scalar":
+        from src.features.roles import RoleDetector
+
+        teams = [[pokedex.get(name) for name in team] for team in _teams(battles_file, SCALAR_SAMPLE)]
+        started = time.perf_counter()
+        for team in teams:
+            coverage_analyzer.type_coverage_score(team)
+            meta_analyzer.meta_coverage_score(team)
+            RoleDetector.role_diversity_score(team)
+        return {"seconds": time.perf_counter() - started, "items": len(teams), "unit": "teams"}
+
+    if stage == "score_batch":
+        from src.features.roles import RoleDetector
+
+        team_ids = pokedex.encode_teams(_teams(battles_file))
+        started = time.perf_counter()
+        coverage_analyzer.score_teams(team_ids)
+        meta_analyzer.meta_coverage_scores(team_ids)
+        RoleDetector.role_diversity_scores(pokedex, team_ids)
+        return {"seconds": time.perf_counter() - started, "items": len(team_ids), "unit": "teams"}
+
+    if stage == "extract":
+        started = time.perf_counter()
+        dataset = _extract(battles_file, pokedex, coverage_analyzer, meta_analyzer)
+        elapsed = time.perf_counter() - started
+        return {"seconds": elapsed, "items": len(dataset) // 2, "unit": "battles"}
+
+    if stage == "fit":
+        dataset = _extract(battles_file, pokedex, coverage_analyzer, meta_analyzer, fit_max_battles)
+        model = make_model(backend)
+        started = time.perf_counter()
+        model.fit(dataset.X, dataset.y)
+        return {"seconds": time.perf_counter() - started, "items": len(dataset), "unit": "rows"}
+
+    raise ValueError(f"Unknown stage {stage!r}")
+
+
+def _child(args):
+    rss_before = _rss_mb()
+    result = run_stage(args.stage, args.battles, args.fit_max_battles, args.backend)
+    result["peak_rss_mb"] = _rss_mb()
+    result["start_rss_mb"] = rss_before
+    print(json.dumps(result))
+
+
+def _run_child(stage: str, battles_file: Path, fit_max_battles: int, backend: str) -> dict:
+    command = [
+        sys.executable, str(Path(__file__).resolve()), "_stage",
+        "--stage", stage, "--battles", str(battles_file), "--fit-max-battles", str(fit_max_battles),
+        "--backend", backend,
+    ]
+    completed = subprocess.run(command, cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _environment() -> dict:
+    import numpy
+    import sklearn
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run_suite(sizes, stages, repeat: int, fit_max_battles: int, seed: int, backend: str = DEFAULT_BACKEND) -> dict:
+    """Run every stage for every size and return the JSON-ready report."""
+    from synthetic_battles import synthetic_battles_file
+
+    results = []
+    for n_battles in sizes:
+        battles_file = synthetic_battles_file(n_battles, seed)
+        for stage in stages:
+            if stage == "snapshot" and n_battles != sizes[0]:
+                continue
+            runs = [_run_child(stage, battles_file, fit_max_battles, backend) for _ in range(repeat)]
+            best = min(runs, key=lambda run: run["seconds"])
+            result = {
+                "stage": stage,
+                "n_battles": 0 if stage == "snapshot" else n_battles,
+                "seconds": best["seconds"],
+                "items": best["items"],
+                "unit": best["unit"],
+                "throughput": best["items"] / best["seconds"] if best["seconds"] > 0 else None,
+                "peak_rss_mb": max(run["peak_rss_mb"] for run in runs),
+                "start_rss_mb": min(run["start_rss_mb"] for run in runs),
+            }
+            results.append(result)
+            print(
+                f"{stage:<13} {result['n_battles']:>9} {result['seconds']:>9.3f}s "
+                f"{result['throughput']:>13,.0f} {result['unit']}/s {result['peak_rss_mb']:>8.1f} MiB",
+                flush=True,
+            )
+
+    return {
+        "environment": _environment(),
+        "seed": seed,
+        "fit_max_battles": fit_max_battles,
+        "backend": backend,
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float, memory_threshold: float) -> list[str]:
+    """
+    Print a comparison table and return descriptions of regressions.
+
+    A regression is a throughput drop of more than threshold, or a peak
+    memory increase of more than memory_threshold (both fractions).
+    """
+    baseline_results = {(r["stage"], r["n_battles"]): r for r in baseline["results"]}
+    regressions = []
+    # Results from before the backend was recorded fitted GradientBoostingRegressor
+    baseline_backend, current_backend = baseline.get("backend", "gbr"), current.get("backend", "gbr")
+    if baseline_backend != current_backend:
+        print(f"Note: fit stage backends differ (baseline {baseline_backend}, current {current_backend})\n")
+
+    print(f"{'Stage':<13} {'Battles':>9} {'Throughput':>11} {'Peak mem':>9}  Status")
+    print("-" * 56)
+    for result in current["results"]:
+        key = (result["stage"], result["n_battles"])
+        base = baseline_results.get(key)
+        if base is None or not base["throughput"] or not result["throughput"]:
+            print(f"{key[0]:<13} {key[1]:>9} {'':>11} {'':>9}  no baseline")
+            continue
+
+        speed_change = result["throughput"] / base["throughput"] - 1
+        memory_change = result["peak_rss_mb"] / base["peak_rss_mb"] - 1
+        problems = []
+        if speed_change < -threshold:
+            problems.append(f"throughput {speed_change:+.0%}")
+        if memory_change > memory_threshold:
+            problems.append(f"peak memory {memory_change:+.0%}")
+        if problems:
+            regressions.append(f"{key[0]} @ {key[1]}: {', '.join(problems)}")
+
+        status = "REGRESSION" if problems else "ok"
+        print(f"{key[0]:<13} {key[1]:>9} {speed_change:>+11.1%} {memory_change:>+9.1%}  {status}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the suite")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    run_parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    run_parser.add_argument("--repeat", type=int, default=1, help="Runs per stage (best time is kept)")
+    run_parser.add_argument("--fit-max-battles", type=int, default=100000, help="Battles used by the fit stage")
+    run_parser.add_argument("--backend", choices=sorted(TRAINER_BACKENDS), default=DEFAULT_BACKEND, help="Fit stage model")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    run_parser.add_argument("--baseline", type=Path, help="Compare against this results file")
+    run_parser.add_argument("--threshold", type=float, default=0.10, help="Allowed throughput drop")
+    run_parser.add_argument("--memory-threshold", type=float, default=0.20, help="Allowed peak memory growth")
+
+    compare_parser = commands.add_parser("compare", help="Compare two results files")
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("current", type=Path)
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="Allowed throughput drop")
+    compare_parser.add_argument("--memory-threshold", type=float, default=0.20, help="Allowed peak memory growth")
+
+    stage_parser = commands.add_parser("_stage")  # Internal: one measurement in a fresh process
+    stage_parser.add_argument("--stage", choices=STAGES, required=True)
+    stage_parser.add_argument("--battles", type=Path, required=True)
+    stage_parser.add_argument("--fit-max-battles", type=int, required=True)
+    stage_parser.add_argument("--backend", choices=sorted(TRAINER_BACKENDS), required=True)
+
+    args = parser.parse_args()
+
+    if args.command == "_stage":
+        _child(args)
+        return
+
+    if args.command == "run":
+        print(f"{'Stage':<13} {'Battles':>9} {'Time':>10} {'Throughput':>23} {'Peak mem':>12}")
+        print("-" * 71)
+        current = run_suite(sorted(args.sizes), args.stages, args.repeat, args.fit_max_battles, args.seed, args.backend)
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(current, indent=2))
+        print(f"\nResults written to {args.output}")
+        if args.baseline is None:
+            return
+        baseline = json.loads(args.baseline.read_text())
+    else:
+        baseline = json.loads(args.baseline.read_text())
+        current = json.loads(args.current.read_text())
+
+    print()
+    regressions = compare(baseline, current, args.threshold, args.memory_threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s):")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Load-test a running serve_model.py instance.
+
+Each client thread keeps one HTTP/1.1 connection open and sends /predict
+requests built from real battles until the duration elapses. Reports
+client-side requests/s, rows/s and latency percentiles, plus the server's
+own /stats (batch sizes, server-side latency).
+
+Usage:
+    python serve_model.py &
+    python benchmarks/load_test_service.py --concurrency 32 --duration 10 --teams-per-request 1
+"""
+
+import argparse
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.data import battles as battle_io  # noqa: E402
+
+
+def _client(host, port, payloads, deadline, latencies, errors, seed):
+    rng = random.Random(seed)
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    headers = {"Content-Type": "application/json"}
+    while time.monotonic() < deadline:
+        body = rng.choice(payloads)
+        started = time.monotonic()
+        try:
+            connection.request("POST", "/predict", body, headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+                continue
+        except (OSError, http.client.HTTPException):
+            errors.append(None)
+            connection.close()
+            connection = http.client.HTTPConnection(host, port, timeout=30)
+            continue
+        latencies.append(time.monotonic() - started)
+    connection.close()
+
+
+def _get_json(host, port, path) -> dict:
+    connection = http.client.HTTPConnection(host, port, timeout=10)
+    connection.request("GET", path)
+    body = json.loads(connection.getresponse().read())
+    connection.close()
+    return body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, default=16, help="Client threads")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds")
+    parser.add_argument("--teams-per-request", type=int, default=1)
+    parser.add_argument("--battles-mode", action="store_true", help="Send whole battles instead of teams")
+    parser.add_argument("--battles", type=Path, default=REPO_ROOT / "data/replays/battles_fast.jsonl")
+    args = parser.parse_args()
+
+    battles = battle_io.load_battles(args.battles)
+    rng = random.Random(0)
+    payloads = []
+    for _ in range(1000):
+        sample = rng.sample(battles, args.teams_per_request)
+        if args.battles_mode:
+            body = {"battles": [{"p1_team": b["p1_team"], "p2_team": b["p2_team"]} for b in sample]}
+        else:
+            body = {"teams": [b[rng.choice(("p1_team", "p2_team"))] for b in sample]}
+        payloads.append(json.dumps(body))
+    rows_per_request = args.teams_per_request * (2 if args.battles_mode else 1)
+
+    before = _get_json(args.host, args.port, "/stats")
+    latencies, errors = [], []
+    deadline = time.monotonic() + args.duration
+    threads = [
+        threading.Thread(target=_client, args=(args.host, args.port, payloads, deadline, latencies, errors, seed))
+        for seed in range(args.concurrency)
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    after = _get_json(args.host, args.port, "/stats")
+
+    latency_ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    batches = after["batches"] - before["batches"]
+    rows = after["rows"] - before["rows"]
+    print(f"{args.concurrency} clients × {args.duration:.0f}s, {rows_per_request} rows/request")
+    print(f"  Requests:   {len(latencies)} ok, {len(errors)} failed")
+    print(f"  Throughput: {len(latencies) / elapsed:,.0f} requests/s, {len(latencies) * rows_per_request / elapsed:,.0f} rows/s")
+    print(f"  Latency:    p50 {np.percentile(latency_ms, 50):.2f} ms, p99 {np.percentile(latency_ms, 99):.2f} ms (client)")
+    print(f"  Batching:   {batches} batches, {rows / batches if batches else 0:.1f} rows/batch on average")
+    print(f"  Server:     p50 {after['latency_p50_ms']:.2f} ms, p99 {after['latency_p99_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+"""
+Local stand-in for replay.pokemonshowdown.com, for load-testing the scrapers.
+
+Serves the two endpoints the scrapers use:
+
+    GET /search.json?format=<tier>&page=<n>   51 replays per page, newest first
+    GET /<battle_id>.json                     replay JSON in sample_replay.json's shape
+
+Replays are synthetic battles rendered by ReplayRenderer (ids
+<tier>-<start_id + i>), or the raw replays of a ReplayCache. Every
+response can be delayed and some replays 404. The server can also
+throttle with 429 + Retry-After above a request rate, and inject 5xx
+responses or dropped connections. Counters are kept per status code and
+per URL, so a client's retries can be read off the server's side.
+
+Usage:
+    python benchmarks/mock_showdown_server.py --port 8800 --latency 0.1 --max-rate 20 --error-rate 0.02
+    python scrape_fast.py --concurrent --base-url http://127.0.0.1:8800 --no-replay-cache
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from synthetic_battles import ReplayRenderer, synthetic_battles_file  # noqa: E402
+from src.data import battles as battle_io  # noqa: E402
+from src.scrape.replay_cache import ReplayCache  # noqa: E402
+
+PAGE_SIZE = 51  # Replays per search page, as on the real server
+DEFAULT_START_ID = 2466685514
+DEFAULT_PORT = 8800
+
+
+class SyntheticReplays:
+    """Synthetic battles served as replays, rendered on request."""
+
+    def __init__(self, n_replays: int, tier: str = "gen9ou", start_id: int = DEFAULT_START_ID, seed: int = 0):
+        self.tier = tier
+        self.renderer = ReplayRenderer()
+        battles = battle_io.load_battles(synthetic_battles_file(n_replays, seed))
+        self._battles = {}
+        for i, battle in enumerate(battles):
+            battle_id = f"{tier}-{start_id + i}"
+            self._battles[battle_id] = (dict(battle, battle_id=battle_id), self.renderer.template["uploadtime"] + i)
+        self.ids = list(self._battles)  # Oldest first
+
+    def listing(self, battle_id: str) -> dict:
+        battle, upload_time = self._battles[battle_id]
+        return {
+            "uploadtime": upload_time,
+            "id": battle_id,
+            "format": self.tier,
+            "players": [battle["p1_name"], battle["p2_name"]],
+            "rating": max(battle["p1_rating"], battle["p2_rating"]),
+            "private": 0,
+            "password": None,
+        }
+
+    def get(self, battle_id: str) -> bytes | None:
+        entry = self._battles.get(battle_id)
+        if entry is None:
+            return None
+        return json.dumps(self.renderer.render(*entry)).encode("utf-8")
+
+
+class CachedReplays:
+    """The raw replays of a ReplayCache (one tier), served as stored."""
+
+    def __init__(self, cache_path: Path, tier: str = "gen9ou"):
+        self.tier = tier
+        self.cache = ReplayCache(cache_path)
+        self._lock = threading.Lock()  # The cache's segment readers are shared
+        self._fetched = {
+            battle_id: fetched
+            for battle_id, _, fetched in self.cache.iter_raw()
+            if battle_id.startswith(f"{tier}-")
+        }
+        self.ids = sorted(self._fetched, key=lambda battle_id: (self._fetched[battle_id], battle_id))
+
+    def listing(self, battle_id: str) -> dict:
+        return {"uploadtime": self._fetched[battle_id], "id": battle_id, "format": self.tier}
+
+    def get(self, battle_id: str) -> bytes | None:
+        if battle_id not in self._fetched:
+            return None
+        with self._lock:
+            return self.cache.get(battle_id)
+
+
+class MockShowdownServer(ThreadingHTTPServer):
+    """Threaded HTTP server with configurable latency, missing replays, throttling and faults."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        replays,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        missing_rate: float = 0.0,
+        max_rate: float = 0.0,
+        burst: float = 10.0,
+        retry_after: float = 1.0,
+        error_rate: float = 0.0,
+        drop_rate: float = 0.0,
+        page_size: int = PAGE_SIZE,
+        seed: int = 0,
+    ):
+        """
+        Args:
+            replays: SyntheticReplays or CachedReplays
+            host: Interface to listen on
+            port: Port (0 picks a free one; see .url)
+            latency: Seconds added to every response
+            jitter: Up to this many extra seconds, uniformly
+            missing_rate: Fraction of listed replays whose /<id>.json is 404
+                (fixed per id, like replays made private after listing)
+            max_rate: Requests per second served before answering 429 (0: no limit)
+            burst: Requests allowed back-to-back under max_rate
+            retry_after: Retry-After seconds sent with 429s
+            error_rate: Fraction of requests answered with a 500/502/503
+            drop_rate: Fraction of requests whose connection is closed without a response
+            page_size: Replays per search page
+            seed: Seed for missing replays, latency jitter and fault injection
+        """
+        super().__init__((host, port), _Handler)
+        self.replays = replays
+        self.latency = latency
+        self.jitter = jitter
+        self.max_rate = max_rate
+        self.burst = max(1.0, burst)
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.page_size = page_size
+
+        missing = random.Random(seed)
+        self.missing = {battle_id for battle_id in replays.ids if missing.random() < missing_rate}
+        self._newest_first = replays.ids[::-1]
+        self._servable = {f"/{battle_id}.json" for battle_id in replays.ids if battle_id not in self.missing}
+        self._rng = random.Random(seed + 1)
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self.statuses = Counter()  # Status code (or "dropped") -> responses
+        self.urls = Counter()  # Request path -> requests
+        self.served = set()  # Replay paths answered with a replay at least once
+        self._thread = None
+
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return  # Client went away mid-response (e.g. a scraper run stopped on timeout)
+        super().handle_error(request, client_address)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def search_page(self, tier: str, page: int) -> list[dict]:
+        if tier != self.replays.tier or page < 1:
+            return []
+        battle_ids = self._newest_first[(page - 1) * self.page_size : page * self.page_size]
+        return [self.replays.listing(battle_id) for battle_id in battle_ids]
+
+    def get_replay(self, battle_id: str) -> bytes | None:
+        return None if battle_id in self.missing else self.replays.get(battle_id)
+
+    def draw(self) -> tuple[float, str | None]:
+        """(delay, injected fault) for one request: fault is "throttle", "error", "drop" or None."""
+        with self._lock:
+            delay = self.latency + self._rng.random() * self.jitter
+            if self.max_rate > 0:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.max_rate)
+                self._updated = now
+                if self._tokens < 1:
+                    return delay, "throttle"
+                self._tokens -= 1
+            roll = self._rng.random()
+            if roll < self.drop_rate:
+                return delay, "drop"
+            if roll < self.drop_rate + self.error_rate:
+                return delay, "error"
+            return delay, None
+
+    def error_status(self) -> int:
+        with self._lock:
+            return self._rng.choice((500, 502, 503))
+
+    def count(self, path: str, status):
+        with self._lock:
+            self.urls[path] += 1
+            self.statuses[status] += 1
+            if status == 200 and path != "/search.json":
+                self.served.add(path)
+
+    def reset_counters(self):
+        with self._lock:
+            self.statuses.clear()
+            self.urls.clear()
+            self.served.clear()
+
+    def counters(self) -> dict:
+        """
+        Request totals since the last reset.
+
+        retries are requests for a URL beyond its first; lost are replays
+        that were requested but never served although they exist (given up
+        after a 429, 5xx or dropped connection).
+        """
+        with self._lock:
+            replay_urls = {path: n for path, n in self.urls.items() if path != "/search.json"}
+            return {
+                "requests": sum(self.urls.values()),
+                "search_requests": self.urls["/search.json"],
+                "replay_requests": sum(replay_urls.values()),
+                "distinct_replays": len(replay_urls),
+                "retries": sum(replay_urls.values()) - len(replay_urls),
+                "replays_served": len(self.served),
+                "lost": len((replay_urls.keys() & self._servable) - self.served),
+                "ok": self.statuses[200],
+                "not_found": self.statuses[404],
+                "throttled": self.statuses[429],
+                "errors": sum(n for status, n in self.statuses.items() if isinstance(status, int) and status >= 500),
+                "dropped": self.statuses["dropped"],
+            }
+
+    def start(self) -> "MockShowdownServer":
+        """Serve on a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-showdown", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: MockShowdownServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, headers: dict = None):
+        self.server.count(urlparse(self.path).path, status)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        delay, fault = self.server.draw()
+        if delay > 0:
+            time.sleep(delay)
+        if fault == "throttle":
+            self._send(429, b'{"error": "throttled"}', {"Retry-After": f"{self.server.retry_after:g}"})
+            return
+        if fault == "drop":
+            self.server.count(urlparse(self.path).path, "dropped")
+            self.close_connection = True
+            return
+        if fault == "error":
+            self._send(self.server.error_status(), b'{"error": "injected"}')
+            return
+
+        url = urlparse(self.path)
+        if url.path == "/search.json":
+            query = parse_qs(url.query)
+            try:
+                page = int(query.get("page", ["1"])[0])
+            except ValueError:
+                self._send(400, b'{"error": "bad page"}')
+                return
+            listing = self.server.search_page(query.get("format", [""])[0], page)
+            self._send(200, json.dumps(listing).encode("utf-8"))
+        elif url.path.endswith(".json"):
+            raw = self.server.get_replay(url.path[1 : -len(".json")])
+            if raw is None:
+                self._send(404, b'{"error": "not found"}')
+            else:
+                self._send(200, raw)
+        else:
+            self._send(404, b'{"error": "not found"}')
+
+
+def add_server_arguments(parser: argparse.ArgumentParser):
+    """The replay source and fault options, shared with bench_scrapers.py."""
+    parser.add_argument("--replays", type=int, default=1000, help="Synthetic replays to serve")
+    parser.add_argument("--replay-cache", type=Path, help="Serve a replay cache's replays instead")
+    parser.add_argument("--tier", default="gen9ou")
+    parser.add_argument("--start-id", type=int, default=DEFAULT_START_ID, help="First synthetic battle number")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per response")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Extra random latency, up to (seconds)")
+    parser.add_argument("--missing-rate", type=float, default=0.05, help="Fraction of replays that 404")
+    parser.add_argument("--max-rate", type=float, default=0.0, help="Requests/s before 429s (0: unlimited)")
+    parser.add_argument("--burst", type=float, default=10.0, help="Back-to-back requests allowed under --max-rate")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds on 429s")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 5xx responses")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Fraction of dropped connections")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def server_from_args(args, host: str = "127.0.0.1", port: int = 0) -> MockShowdownServer:
+    if args.replay_cache is not None:
+        replays = CachedReplays(args.replay_cache, args.tier)
+    else:
+        replays = SyntheticReplays(args.replays, args.tier, args.start_id, args.seed)
+    return MockShowdownServer(
+        replays,
+        host=host,
+        port=port,
+        latency=args.latency,
+        jitter=args.jitter,
+        missing_rate=args.missing_rate,
+        max_rate=args.max_rate,
+        burst=args.burst,
+        retry_after=args.retry_after,
+        error_rate=args.error_rate,
+        drop_rate=args.drop_rate,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server = server_from_args(args, args.host, args.port)
+    n_pages = -(-len(server.replays.ids) // server.page_size)
+    print(f"Serving {len(server.replays.ids)} {args.tier} replays ({n_pages} search pages) on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(server.counters(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
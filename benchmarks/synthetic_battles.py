@@ -0,0 +1,211 @@
+"""
+Generate synthetic battle files for benchmarking.
+
+Teams are six distinct species drawn from the real dex, weighted by the
+latest OU usage distribution (species without usage data get the smallest
+observed weight). Records have the same fields as the scraped
+data/replays/battles_fast.jsonl; the winner is a fair coin flip.
+
+Raw replays (--replays) are the same battles rendered as replay JSON in
+sample_replay.json's shape: its log, with the |player|, |poke| and |win|
+lines replaced, one replay object per line.
+
+Usage:
+    python benchmarks/synthetic_battles.py 100000 data/cache/bench/battles_100000.jsonl
+    python benchmarks/synthetic_battles.py 20000 data/cache/bench/replays_20000.jsonl --replays
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.data import battles as battle_io  # noqa: E402
+from src.data.snapshot import load_snapshot  # noqa: E402
+
+DEFAULT_BENCH_DIR = REPO_ROOT / "data" / "cache" / "bench"
+
+SAMPLE_REPLAY = REPO_ROOT / "sample_replay.json"
+
+BLOCK_SIZE = 50000
+
+
+def species_weights(snapshot) -> np.ndarray:
+    """Sampling weight of every dex species, from its latest OU usage."""
+    pokedex = snapshot.pokedex
+    weights = np.zeros(len(pokedex), dtype=np.float64)
+    for entry in snapshot.usage_stats.get_top_k(k=len(snapshot.usage_stats.get_all_names())):
+        species_id = pokedex.id_of(entry.name)
+        if species_id >= 0 and weights[species_id] == 0:
+            weights[species_id] = entry.usage_pct
+    floor = weights[weights > 0].min() if (weights > 0).any() else 1.0
+    weights[weights <= 0] = floor
+    return weights / weights.sum()
+
+
+def sample_teams(weights: np.ndarray, n_teams: int, rng: np.random.Generator, team_size: int = 6) -> np.ndarray:
+    """
+    (n_teams, team_size) species ids sampled without replacement by weight.
+
+    Uses the Gumbel top-k trick, which matches drawing members one at a
+    time proportionally to weight, vectorized over a block of teams.
+    """
+    log_weights = np.log(weights)
+    teams = np.empty((n_teams, team_size), dtype=np.intp)
+    for start in range(0, n_teams, BLOCK_SIZE):
+        stop = min(start + BLOCK_SIZE, n_teams)
+        keys = log_weights + rng.gumbel(size=(stop - start, len(weights)))
+        teams[start:stop] = np.argpartition(-keys, team_size - 1, axis=1)[:, :team_size]
+    return teams
+
+
+def generate_battles(battles_file: Path, n_battles: int, seed: int = 0) -> Path:
+    """Write n_battles synthetic battles as JSONL (atomically)."""
+    snapshot = load_snapshot()
+    names = snapshot.pokedex.names
+    rng = np.random.default_rng(seed)
+
+    weights = species_weights(snapshot)
+    p1_teams = sample_teams(weights, n_battles, rng)
+    p2_teams = sample_teams(weights, n_battles, rng)
+    p1_wins = rng.random(n_battles) < 0.5
+    ratings = rng.integers(1000, 2000, size=(n_battles, 2))
+
+    battles_file = Path(battles_file)
+    battles_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = battles_file.with_name(battles_file.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        for i in range(n_battles):
+            p1_rating, p2_rating = int(ratings[i, 0]), int(ratings[i, 1])
+            battle = {
+                "battle_id": f"synthetic-{seed}-{i}",
+                "p1_name": f"p1-{i}",
+                "p2_name": f"p2-{i}",
+                "p1_team": [names[species_id] for species_id in p1_teams[i]],
+                "p2_team": [names[species_id] for species_id in p2_teams[i]],
+                "winner": "p1" if p1_wins[i] else "p2",
+                "p1_rating": p1_rating,
+                "p2_rating": p2_rating,
+                "rating_diff": abs(p1_rating - p2_rating),
+                "timestamp": "2025-01-01T00:00:00",
+            }
+            f.write(json.dumps(battle))
+            f.write("\n")
+    tmp_path.replace(battles_file)
+    return battles_file
+
+
+def synthetic_battles_file(n_battles: int, seed: int = 0, bench_dir: Path = None) -> Path:
+    """Path of a cached synthetic file of n_battles, generating it if needed."""
+    battles_file = Path(bench_dir or DEFAULT_BENCH_DIR) / f"battles_{n_battles}_seed{seed}.jsonl"
+    if not battles_file.exists() or battle_io.count_battles(battles_file) != n_battles:
+        generate_battles(battles_file, n_battles, seed)
+    return battles_file
+
+
+class ReplayRenderer:
+    """Renders battle records as replay JSON objects, using a real replay as the template."""
+
+    def __init__(self, template_path: Path = SAMPLE_REPLAY):
+        self.template = json.loads(Path(template_path).read_text())
+        # Split the template log around the lines that encode the record
+        self._segments = [[]]
+        self._slots = []
+        players_seen = pokes_seen = False
+        for line in self.template["log"].split("\n"):
+            parts = line.split("|")
+            if line.startswith("|player|") and len(parts) >= 6 and not players_seen:
+                players_seen = True
+                slot = "players"
+            elif line.startswith("|player|") and len(parts) >= 6:
+                continue
+            elif line.startswith("|poke|"):
+                if pokes_seen:
+                    continue
+                pokes_seen = True
+                slot = "pokes"
+            elif line.startswith("|win|"):
+                slot = "win"
+            else:
+                self._segments[-1].append(line)
+                continue
+            self._slots.append(slot)
+            self._segments.append([])
+        self._segments = ["\n".join(segment) for segment in self._segments]
+
+    def render_log(self, battle: dict) -> str:
+        lines = {
+            "players": (
+                f"|player|p1|{battle['p1_name']}|1|{battle['p1_rating']}\n"
+                f"|player|p2|{battle['p2_name']}|2|{battle['p2_rating']}"
+            ),
+            "pokes": "\n".join(
+                [f"|poke|p1|{name}, M|" for name in battle["p1_team"]]
+                + [f"|poke|p2|{name}, F|" for name in battle["p2_team"]]
+            ),
+            "win": f"|win|{battle[battle['winner'] + '_name']}",
+        }
+        pieces = [self._segments[0]]
+        for slot, segment in zip(self._slots, self._segments[1:]):
+            pieces.append(lines[slot])
+            pieces.append(segment)
+        return "\n".join(pieces)
+
+    def render(self, battle: dict, upload_time: int = 1761160311) -> dict:
+        """A replay object for the battle (same keys as the template)."""
+        replay = dict(self.template)
+        replay["id"] = battle["battle_id"]
+        replay["players"] = [battle["p1_name"], battle["p2_name"]]
+        replay["rating"] = max(battle["p1_rating"], battle["p2_rating"])
+        replay["uploadtime"] = upload_time
+        replay["log"] = self.render_log(battle)
+        return replay
+
+
+def generate_replays(replays_file: Path, n_battles: int, seed: int = 0) -> Path:
+    """Write n_battles synthetic raw replays as JSONL (atomically)."""
+    renderer = ReplayRenderer()
+    battles_file = synthetic_battles_file(n_battles, seed)
+
+    replays_file = Path(replays_file)
+    replays_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = replays_file.with_name(replays_file.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        for i, battle in enumerate(battle_io.iter_battles(battles_file)):
+            f.write(json.dumps(renderer.render(battle, upload_time=1761160311 + i)))
+            f.write("\n")
+    tmp_path.replace(replays_file)
+    return replays_file
+
+
+def synthetic_replays_file(n_battles: int, seed: int = 0, bench_dir: Path = None) -> Path:
+    """Path of a cached synthetic raw replay file of n_battles, generating it if needed."""
+    replays_file = Path(bench_dir or DEFAULT_BENCH_DIR) / f"replays_{n_battles}_seed{seed}.jsonl"
+    if not replays_file.exists() or battle_io.count_battles(replays_file) != n_battles:
+        generate_replays(replays_file, n_battles, seed)
+    return replays_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("n_battles", type=int)
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--replays", action="store_true", help="Write raw replay JSON instead of battle records")
+    args = parser.parse_args()
+
+    if args.replays:
+        generate_replays(args.output, args.n_battles, args.seed)
+        print(f"Wrote {args.n_battles} replays to {args.output}")
+    else:
+        generate_battles(args.output, args.n_battles, args.seed)
+        print(f"Wrote {args.n_battles} battles to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
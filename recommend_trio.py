@@ -0,0 +1,62 @@
+"""
+Recommend the best trios to complete a 3-Pokémon core.
+
+Usage:
+    python recommend_trio.py "Great Tusk" "Kingambit" "Gholdengo" --top 10
+    python recommend_trio.py "Great Tusk" "Kingambit" "Gholdengo" \
+        --model models/real_data_model.pkl --workers 4 --time-budget 2
+"""
+
+import argparse
+from pathlib import Path
+
+from src.features.recommend import DEFAULT_WEIGHTS, recommend_trios
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recommend trios to complete a team")
+    parser.add_argument("core", nargs=3, help="The 3 Pokémon already on the team")
+    parser.add_argument("--top", type=int, default=10, help="Number of completions to show")
+    parser.add_argument("--model", type=Path, help="Re-rank by a saved model's win prediction")
+    parser.add_argument("--rerank-pool", type=int, default=100, help="Shortlist size for --model")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes")
+    parser.add_argument("--time-budget", type=float, help="Return best-so-far after this many seconds")
+    for name, weight in DEFAULT_WEIGHTS.items():
+        parser.add_argument(
+            f"--{name.replace('_', '-')}-weight", type=float, default=weight, dest=name,
+            help=f"Weight of {name} (default: {weight})",
+        )
+    args = parser.parse_args()
+    for name in DEFAULT_WEIGHTS:
+        if getattr(args, name) < 0:
+            parser.error(f"--{name.replace('_', '-')}-weight must be non-negative")
+
+    result = recommend_trios(
+        args.core,
+        top_m=args.top,
+        weights={name: getattr(args, name) for name in DEFAULT_WEIGHTS},
+        model_path=args.model,
+        rerank_pool=args.rerank_pool,
+        workers=args.workers,
+        time_budget=args.time_budget,
+    )
+
+    print(f"Core: {', '.join(args.core)}")
+    print(f"{'#':>3}  {'Trio':<50} {'Score':>7} {'Type':>6} {'Meta':>6} {'Role':>6}")
+    print("-" * 84)
+    for rank, rec in enumerate(result.recommendations, 1):
+        trio = ", ".join(rec.trio)
+        print(
+            f"{rank:>3}  {trio:<50} {rec.score:>7.4f} {rec.scores.type_score:>6.3f} "
+            f"{rec.scores.meta_score:>6.3f} {rec.scores.role_score:>6.3f}"
+        )
+
+    status = "complete" if result.complete else "time budget reached, best so far"
+    print(
+        f"\n{result.evaluated} teams scored, {result.pruned} branches pruned "
+        f"in {result.elapsed:.2f}s ({status})"
+    )
+
+
+if __name__ == "__main__":
+    main()
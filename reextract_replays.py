@@ -0,0 +1,182 @@
+"""
+Rebuild a battles JSONL from the raw replay cache, without the network.
+
+The output's battles whose replays are cached are parsed again with the
+current parser and rules (MIN_RATING, forme handling, ...), and the output
+file is replaced with the result. Re-extracted records are timestamped with
+when their replay was fetched. Records without a cached replay (scraped
+before the cache existed) are kept as they are, ahead of the re-extracted
+ones. The output's resume checkpoint is kept, so scraping can continue
+afterwards.
+
+With --all-cached, every cached replay of the tier is parsed, not just the
+output's own battles: the cache is shared by all scrapers, so this merges
+replays fetched for other outputs (e.g. scrape_replays' battles.jsonl) into
+this one. Use it to pick up battles an earlier rule rejected.
+
+Feature stores built from the output are pruned afterwards (by default the
+training stores under data/cache/, when the output is the training file
+data/replays/battles_fast.jsonl): rows of battles that are gone or whose
+record changed are dropped by battle_id and content hash, so the next
+training run re-extracts the changed battles instead of training on stale
+rows.
+
+Usage:
+    python reextract_replays.py
+    python reextract_replays.py --output data/replays/battles.jsonl --min-rating 1200 --workers 4
+    python reextract_replays.py --min-rating 900 --all-cached
+    python reextract_replays.py --output data/replays/battles.jsonl --feature-store data/cache/features_seq
+"""
+
+import argparse
+import json
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator
+
+from scrape_replays import MIN_RATING, TIER
+from src.data import battles as battle_io
+from src.features.store import DEFAULT_STORE_PATH, FeatureStore
+from src.scrape.output import BattleOutput
+from src.scrape.parser import iter_parse_parallel
+from src.scrape.replay_cache import DEFAULT_REPLAY_CACHE_PATH, ReplayCache
+
+# The battles file train_on_real_data and tune_model build their stores from
+TRAINING_BATTLES_FILE = Path("data/replays/battles_fast.jsonl")
+TRAINING_STORE_PATHS = (DEFAULT_STORE_PATH, DEFAULT_STORE_PATH.with_name("features_matchup"))
+
+
+def iter_cached_chunks(
+    replay_cache: ReplayCache, tier: str, chunk_size: int, select: Callable[[str], bool] = None
+) -> Iterator[list]:
+    """Yield lists of (battle_id, raw bytes, fetched) for the tier's cached replays (those select accepts)."""
+    chunk = []
+    for battle_id, raw, fetched in replay_cache.iter_raw():
+        if tier and not battle_id.startswith(f"{tier}-"):
+            continue
+        if select is not None and not select(battle_id):
+            continue
+        chunk.append((battle_id, raw, fetched))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def prune_feature_stores(battles_file: Path, store_paths) -> None:
+    """Drop feature rows of battles no longer in battles_file, or whose record changed."""
+    for store_path in store_paths:
+        store = FeatureStore.open_existing(store_path)
+        if store is None:
+            continue
+        dropped = store.prune(battles_file)
+        print(f"  Feature store {store_path}: dropped {dropped} stale entries, {len(store)} battles kept")
+
+
+def reextract_replays(
+    output_file: Path = TRAINING_BATTLES_FILE,
+    replay_cache_path: Path = DEFAULT_REPLAY_CACHE_PATH,
+    tier: str = TIER,
+    min_rating: int = MIN_RATING,
+    workers: int = 1,
+    chunk_size: int = 1000,
+    all_cached: bool = False,
+    feature_stores: list[Path] = None,
+):
+    """
+    Rebuild output_file from the replay cache, keeping records that aren't cached.
+
+    Args:
+        output_file: Battles JSONL to rebuild
+        replay_cache_path: Raw replay cache directory
+        tier: Only replays whose battle_id starts with "<tier>-" ("" for all)
+        min_rating: Rating filter applied while parsing
+        workers: Parser processes
+        chunk_size: Replays per parse batch
+        all_cached: Parse every cached replay of the tier, not just the output's battles
+        feature_stores: Feature stores built from output_file, pruned after
+            it is replaced (default: the training stores if output_file is
+            the training battles file, else none)
+    """
+    started = time.perf_counter()
+    output_file = Path(output_file)
+    if feature_stores is None:
+        feature_stores = TRAINING_STORE_PATHS if output_file.resolve() == TRAINING_BATTLES_FILE.resolve() else ()
+    tmp_path = output_file.with_name(output_file.name + ".reextract.tmp")
+
+    n_replays = n_battles = n_kept = n_rebuilt = 0
+    with BattleOutput(output_file) as output, ReplayCache(replay_cache_path) as replay_cache:
+        n_stored = len(output)
+        print(f"Re-extracting {output_file} ({n_stored} battles) from {len(replay_cache)} cached replays")
+
+        def rebuildable(battle_id: str) -> bool:
+            return battle_id in replay_cache and (not tier or battle_id.startswith(f"{tier}-"))
+
+        with open(tmp_path, "w") as f:
+            # Records whose replay was never cached can't be rebuilt: keep them
+            for battle in battle_io.iter_battles(output.path):
+                if not rebuildable(battle_io.battle_key(battle)):
+                    f.write(json.dumps(battle) + "\n")
+                    n_kept += 1
+
+            # Chunks stream from the cache; their ids and fetch times wait
+            # here until the (in-order) parse results for the chunk come back
+            chunk_info = deque()
+
+            def raw_chunks():
+                select = None if all_cached else output.__contains__
+                for chunk in iter_cached_chunks(replay_cache, tier, chunk_size, select):
+                    chunk_info.append([(battle_id, fetched) for battle_id, _, fetched in chunk])
+                    yield [raw for _, raw, _ in chunk]
+
+            for records in iter_parse_parallel(raw_chunks(), workers, min_rating):
+                info = chunk_info.popleft()
+                n_replays += len(records)
+                for record, (battle_id, fetched_at) in zip(records, info):
+                    if record is not None:
+                        f.write(json.dumps(record.to_dict(datetime.fromtimestamp(fetched_at).isoformat())) + "\n")
+                        n_battles += 1
+                        n_rebuilt += battle_id in output
+
+        output.replace(tmp_path)
+
+    elapsed = time.perf_counter() - started
+    print(f"✓ {n_battles} battles from {n_replays} replays in {elapsed:.1f}s ({n_replays / elapsed:,.0f} replays/s)")
+    print(f"  Kept {n_kept} stored battles without a cached replay")
+    print(f"  {n_battles - n_rebuilt} battles added, {n_stored - n_kept - n_rebuilt} rejected by the current rules")
+    print(f"  Output: {output_file}")
+    prune_feature_stores(output_file, feature_stores)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild a battles JSONL from the raw replay cache")
+    parser.add_argument("--output", type=Path, default=TRAINING_BATTLES_FILE)
+    parser.add_argument("--replay-cache", type=Path, default=DEFAULT_REPLAY_CACHE_PATH)
+    parser.add_argument("--tier", default=TIER, help='Format id prefix of battle ids ("" for all)')
+    parser.add_argument("--min-rating", type=int, default=MIN_RATING)
+    parser.add_argument("--workers", type=int, default=1, help="Parser processes")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument(
+        "--all-cached", action="store_true", help="Merge every cached replay of the tier, not just the output's battles"
+    )
+    parser.add_argument(
+        "--feature-store",
+        type=Path,
+        action="append",
+        help="Feature store built from the output, pruned afterwards (repeatable; default: the training stores)",
+    )
+    args = parser.parse_args()
+
+    reextract_replays(
+        args.output,
+        args.replay_cache,
+        args.tier,
+        args.min_rating,
+        args.workers,
+        args.chunk_size,
+        args.all_cached,
+        args.feature_store,
+    )
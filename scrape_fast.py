@@ -3,14 +3,27 @@ FAST scraper using Pokemon Showdown's search API.
 
 Instead of trying sequential IDs, use the search endpoint which returns
 batches of 51 recent replays at a time.
+
+Usage:
+    python scrape_fast.py                                  # one request at a time
+    python scrape_fast.py --concurrent --concurrency 8 --rate 4
+    python scrape_fast.py --concurrent --base-url http://127.0.0.1:8800
+
+Progress is committed to data/replays/battles_fast.jsonl in batches with a
+checkpoint (see src/scrape/output.py); rerunning resumes where it stopped.
 """
 
+import argparse
+import asyncio
 import requests
-import json
 import time
+from contextlib import nullcontext
 from pathlib import Path
 from datetime import datetime
-from scrape_replays import extract_battle_data, fetch_replay
+from scrape_replays import BASE_URL, extract_battle_data, fetch_replay
+from src.scrape.async_scraper import AsyncReplayScraper
+from src.scrape.output import BattleOutput
+from src.scrape.replay_cache import DEFAULT_REPLAY_CACHE_PATH, ReplayCache
 
 # Configuration
 TIER = "gen9ou"
@@ -18,12 +31,18 @@ TARGET_REPLAYS = 5000  # Scale up for reliable training
 OUTPUT_DIR = Path("data/replays")
 RATE_LIMIT_DELAY = 0.5  # Can be faster with search API
 
-def fetch_recent_battle_ids(tier: str, page: int = 1) -> list[str]:
+# Concurrent mode: downloads in flight, and the request rate they share
+# (the same 2 requests/s budget as RATE_LIMIT_DELAY, but with the network
+# waits overlapped instead of added to it)
+CONCURRENCY = 8
+REQUESTS_PER_SECOND = 1 / RATE_LIMIT_DELAY
+
+def fetch_recent_battle_ids(tier: str, page: int = 1, base_url: str = BASE_URL) -> list[str]:
     """Fetch recent battle IDs using search API.
 
     Returns up to 51 battle IDs per page.
     """
-    url = f"https://replay.pokemonshowdown.com/search.json?format={tier}&page={page}"
+    url = f"{base_url}/search.json?format={tier}&page={page}"
 
     try:
         response = requests.get(url, timeout=10)
@@ -36,25 +55,41 @@ def fetch_recent_battle_ids(tier: str, page: int = 1) -> list[str]:
         return []
 
 
-def scrape_with_search_api(target_count: int):
-    """Scrape replays using search API (MUCH faster)."""
+def scrape_with_search_api(
+    target_count: int,
+    base_url: str = BASE_URL,
+    restart: bool = False,
+    replay_cache_path: Path | None = DEFAULT_REPLAY_CACHE_PATH,
+):
+    """Scrape replays using search API (MUCH faster).
+
+    Resumes from the output's checkpoint until it holds target_count battles.
+    Raw replays are kept in the replay cache (None disables it), and cached
+    ones are not fetched again.
+    """
 
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     output_file = OUTPUT_DIR / "battles_fast.jsonl"
 
     scraped_count = 0
     attempt_count = 0
-    page = 1
 
-    print(f"Fast scraping with search API")
-    print(f"Target: {target_count} replays")
-    print("-" * 60)
+    replay_cache = ReplayCache(replay_cache_path) if replay_cache_path is not None else None
+    with BattleOutput(output_file, restart=restart) as output, (
+        replay_cache if replay_cache is not None else nullcontext()
+    ):
+        page = output.position.get("page", 1)
 
-    with open(output_file, 'w') as f:
-        while scraped_count < target_count:
+        print(f"Fast scraping with search API")
+        print(f"Target: {target_count} replays")
+        if len(output):
+            print(f"Resuming: {len(output)} replays stored, from page {page}")
+        print("-" * 60)
+
+        while len(output) < target_count:
             # Fetch batch of battle IDs
             print(f"Fetching page {page}...")
-            battle_ids = fetch_recent_battle_ids(TIER, page)
+            battle_ids = fetch_recent_battle_ids(TIER, page, base_url)
 
             if not battle_ids:
                 print(f"No more battles found at page {page}")
@@ -64,35 +99,110 @@ def scrape_with_search_api(target_count: int):
 
             # Process each battle
             for battle_id in battle_ids:
-                if scraped_count >= target_count:
+                if len(output) >= target_count:
                     break
+                if battle_id in output:
+                    continue
 
-                replay = fetch_replay(battle_id)
+                cached = replay_cache is not None and battle_id in replay_cache
+                replay = fetch_replay(battle_id, base_url, replay_cache)
                 attempt_count += 1
 
                 if replay:
                     battle_data = extract_battle_data(replay)
-                    if battle_data:
-                        f.write(json.dumps(battle_data) + '\n')
-                        f.flush()
+                    if battle_data and output.add(battle_data):
                         scraped_count += 1
 
                         if scraped_count % 10 == 0:
                             success_rate = (scraped_count / attempt_count) * 100
-                            print(f"  ✓ {scraped_count}/{target_count} replays | "
+                            print(f"  ✓ {len(output)}/{target_count} replays | "
                                   f"Success rate: {success_rate:.1f}%")
 
-                time.sleep(RATE_LIMIT_DELAY)
-
-            page += 1
+                if not cached:
+                    time.sleep(RATE_LIMIT_DELAY)
+            else:
+                page += 1
+            output.set_position(page=page)
 
     print("-" * 60)
     print(f"✓ Scraping complete!")
-    print(f"  Valid replays: {scraped_count}")
+    print(f"  Valid replays: {scraped_count} new, {len(output)} total")
     print(f"  Total attempts: {attempt_count}")
-    print(f"  Success rate: {(scraped_count/attempt_count)*100:.1f}%")
+    if attempt_count:
+        print(f"  Success rate: {(scraped_count/attempt_count)*100:.1f}%")
+    print(f"  Output: {output_file}")
+
+
+def scrape_concurrent(
+    target_count: int,
+    base_url: str = BASE_URL,
+    concurrency: int = CONCURRENCY,
+    rate: float = REQUESTS_PER_SECOND,
+    restart: bool = False,
+    replay_cache_path: Path | None = DEFAULT_REPLAY_CACHE_PATH,
+):
+    """Scrape replays from the search API with concurrent downloads under a shared rate limit.
+
+    Resumes from the output's checkpoint until it holds target_count battles.
+    Raw replays are kept in the replay cache (None disables it), and cached
+    ones are not fetched again.
+    """
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    output_file = OUTPUT_DIR / "battles_fast.jsonl"
+
+    replay_cache = ReplayCache(replay_cache_path) if replay_cache_path is not None else None
+    scraper = AsyncReplayScraper(
+        extract_battle_data, base_url=base_url, concurrency=concurrency, rate=rate, replay_cache=replay_cache
+    )
+    try:
+        with BattleOutput(output_file, restart=restart) as output:
+            start_page = output.position.get("page", 1)
+
+            print(f"Concurrent scraping with search API")
+            print(f"Target: {target_count} replays | {concurrency} in flight | {rate:g} requests/s")
+            if len(output):
+                print(f"Resuming: {len(output)} replays stored, from page {start_page}")
+            print("-" * 60)
+
+            stats = asyncio.run(scraper.scrape_search(
+                TIER,
+                target_count - len(output),
+                output.add,
+                start_page=start_page,
+                progress_every=10,
+                skip=output.__contains__,
+                checkpoint=lambda page: output.set_position(page=page),
+            ))
+    finally:
+        scraper.close()
+        if replay_cache is not None:
+            replay_cache.close()
+
+    print("-" * 60)
+    print(f"✓ Scraping complete!")
+    print(f"  {stats.summary()}")
+    print(f"  Total stored: {len(output)}")
     print(f"  Output: {output_file}")
+    return stats
 
 
 if __name__ == "__main__":
-    scrape_with_search_api(TARGET_REPLAYS)
+    parser = argparse.ArgumentParser(description="Scrape replays via the search API")
+    parser.add_argument("--target", type=int, default=TARGET_REPLAYS, help="Replays to collect")
+    parser.add_argument("--base-url", default=BASE_URL, help="Replay server root")
+    parser.add_argument("--concurrent", action="store_true", help="Concurrent downloads (asyncio)")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="Downloads in flight")
+    parser.add_argument("--rate", type=float, default=REQUESTS_PER_SECOND, help="Max requests per second")
+    parser.add_argument("--restart", action="store_true", help="Discard stored replays and the checkpoint")
+    parser.add_argument("--replay-cache", type=Path, default=DEFAULT_REPLAY_CACHE_PATH, help="Raw replay cache directory")
+    parser.add_argument("--no-replay-cache", action="store_true", help="Don't read or store raw replays")
+    args = parser.parse_args()
+
+    replay_cache_path = None if args.no_replay_cache else args.replay_cache
+    if args.concurrent:
+        scrape_concurrent(
+            args.target, args.base_url.rstrip("/"), args.concurrency, args.rate, args.restart, replay_cache_path
+        )
+    else:
+        scrape_with_search_api(args.target, args.base_url.rstrip("/"), args.restart, replay_cache_path)
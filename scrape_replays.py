@@ -5,10 +5,13 @@ Fetches Gen 9 OU replays and extracts teams + battle outcomes.
 """
 
 import requests
-import json
 import time
+from contextlib import nullcontext
 from pathlib import Path
-from datetime import datetime
+
+from src.scrape.output import BattleOutput
+from src.scrape.parser import parse_replay
+from src.scrape.replay_cache import DEFAULT_REPLAY_CACHE_PATH, ReplayCache
 
 # Configuration
 TIER = "gen9ou"
@@ -17,17 +20,28 @@ TARGET_REPLAYS = 10  # Test run first
 RATE_LIMIT_DELAY = 1.0  # seconds between requests
 OUTPUT_DIR = Path("data/replays")
 
-# Pokemon Showdown replay API
+# Pokemon Showdown replay API (override to scrape a local stand-in server)
 # Format: https://replay.pokemonshowdown.com/gen9ou-2093847562.json
+BASE_URL = "https://replay.pokemonshowdown.com"
+
+def fetch_replay(battle_id: str, base_url: str = BASE_URL, replay_cache: ReplayCache = None) -> dict | None:
+    """Fetch a single replay via JSON API.
 
-def fetch_replay(battle_id: str) -> dict | None:
-    """Fetch a single replay via JSON API."""
-    url = f"https://replay.pokemonshowdown.com/{battle_id}.json"
+    With a replay cache, a cached replay is returned without a request and a
+    fetched one is stored raw.
+    """
+    if replay_cache is not None and battle_id in replay_cache:
+        return replay_cache.get_replay(battle_id)
+
+    url = f"{base_url}/{battle_id}.json"
 
     try:
         response = requests.get(url, timeout=10)
         if response.status_code == 200:
-            return response.json()
+            replay = response.json()
+            if replay_cache is not None:
+                replay_cache.put(battle_id, response.content)
+            return replay
         return None
     except Exception as e:
         print(f"Error fetching {battle_id}: {e}")
@@ -35,146 +49,95 @@ def fetch_replay(battle_id: str) -> dict | None:
 
 
 def extract_battle_data(replay: dict) -> dict | None:
-    """Extract teams and outcome from replay JSON."""
+    """Extract teams and outcome from replay JSON.
+
+    See src/scrape/parser.py: only |player|, |poke| and |win| lines are
+    read, and parsing stops at the result.
+    """
     try:
-        # Parse battle log
-        log = replay.get('log', '')
-        lines = log.split('\n')
-
-        # Extract player names and ratings from |player| lines
-        # Format: |player|p1|username|avatar|rating
-        p1_name = None
-        p2_name = None
-        p1_rating = 1500
-        p2_rating = 1500
-
-        p1_team = []
-        p2_team = []
-        winner = None
-
-        for line in lines:
-            parts = line.split('|')
-
-            # Parse player info
-            if len(parts) > 1 and parts[0] == '' and parts[1] == 'player':
-                if len(parts) < 6:
-                    continue
-                player_id = parts[2]  # 'p1' or 'p2'
-                username = parts[3]
-                rating = int(parts[5]) if parts[5].isdigit() else 1500
-
-                if player_id == 'p1':
-                    p1_name = username
-                    p1_rating = rating
-                elif player_id == 'p2':
-                    p2_name = username
-                    p2_rating = rating
-
-            # Parse team preview
-            # Format: |poke|p1|Garchomp, M|
-            elif len(parts) > 3 and parts[0] == '' and parts[1] == 'poke':
-                player_id = parts[2]
-                pokemon_name = parts[3].split(',')[0]  # Remove gender/forme details initially
-
-                if player_id == 'p1':
-                    p1_team.append(pokemon_name)
-                elif player_id == 'p2':
-                    p2_team.append(pokemon_name)
-
-            # Parse winner
-            # Format: |win|username
-            elif len(parts) > 2 and parts[0] == '' and parts[1] == 'win':
-                winner_name = parts[2]
-                if winner_name == p1_name:
-                    winner = 'p1'
-                elif winner_name == p2_name:
-                    winner = 'p2'
-
-        # Validation
-        if len(p1_team) != 6 or len(p2_team) != 6:
-            return None
-
-        if not winner:
-            return None  # No clear winner
-
-        # Filter by rating
-        if p1_rating < MIN_RATING or p2_rating < MIN_RATING:
-            return None
-
-        return {
-            'battle_id': replay.get('id', ''),
-            'p1_name': p1_name,
-            'p2_name': p2_name,
-            'p1_team': p1_team,
-            'p2_team': p2_team,
-            'winner': winner,
-            'p1_rating': p1_rating,
-            'p2_rating': p2_rating,
-            'rating_diff': abs(p1_rating - p2_rating),
-            'timestamp': datetime.now().isoformat()
-        }
+        record = parse_replay(replay, MIN_RATING)
+        return record.to_dict() if record else None
 
     except Exception as e:
         print(f"Error parsing replay: {e}")
         return None
 
 
-def scrape_replays(start_id: int, target_count: int):
-    """Scrape replays starting from a battle ID."""
+def scrape_replays(
+    start_id: int,
+    target_count: int,
+    base_url: str = BASE_URL,
+    restart: bool = False,
+    replay_cache_path: Path | None = DEFAULT_REPLAY_CACHE_PATH,
+):
+    """Scrape replays starting from a battle ID.
+
+    Resumes from the output's checkpoint (the next ID to try) until it holds
+    target_count battles. Raw replays are kept in the replay cache (None
+    disables it), and cached ones are not fetched again.
+    """
 
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     output_file = OUTPUT_DIR / "battles.jsonl"
 
     scraped_count = 0
     attempt_count = 0
-    battle_id = start_id
 
-    print(f"Starting scrape from battle {TIER}-{battle_id}")
-    print(f"Target: {target_count} valid replays")
-    print(f"Rate limit: {RATE_LIMIT_DELAY}s between requests")
-    print("-" * 60)
+    replay_cache = ReplayCache(replay_cache_path) if replay_cache_path is not None else None
+    with BattleOutput(output_file, restart=restart) as output, (
+        replay_cache if replay_cache is not None else nullcontext()
+    ):
+        battle_id = output.position.get("next_id", start_id)
+
+        print(f"Starting scrape from battle {TIER}-{battle_id}")
+        print(f"Target: {target_count} valid replays")
+        if len(output):
+            print(f"Resuming: {len(output)} replays stored")
+        print(f"Rate limit: {RATE_LIMIT_DELAY}s between requests")
+        print("-" * 60)
 
-    with open(output_file, 'a') as f:
-        while scraped_count < target_count:
+        while len(output) < target_count:
             # Construct battle ID
             full_id = f"{TIER}-{battle_id}"
 
-            # Fetch replay
-            replay = fetch_replay(full_id)
-            attempt_count += 1
+            if full_id not in output:
+                # Fetch replay (cache hits skip the network and the delay)
+                cached = replay_cache is not None and full_id in replay_cache
+                replay = fetch_replay(full_id, base_url, replay_cache)
+                attempt_count += 1
 
-            if replay:
-                # Parse and validate
-                battle_data = extract_battle_data(replay)
+                if replay:
+                    # Parse and validate
+                    battle_data = extract_battle_data(replay)
 
-                if battle_data:
-                    # Save to JSONL file
-                    f.write(json.dumps(battle_data) + '\n')
-                    f.flush()  # Ensure data is written
+                    if battle_data and output.add(battle_data):
+                        scraped_count += 1
 
-                    scraped_count += 1
+                        if scraped_count % 10 == 0:
+                            success_rate = (scraped_count / attempt_count) * 100
+                            print(f"✓ {len(output)}/{target_count} replays | "
+                                  f"Success rate: {success_rate:.1f}% | "
+                                  f"Battle: {full_id}")
 
-                    if scraped_count % 10 == 0:
-                        success_rate = (scraped_count / attempt_count) * 100
-                        print(f"✓ {scraped_count}/{target_count} replays | "
-                              f"Success rate: {success_rate:.1f}% | "
-                              f"Battle: {full_id}")
+                if not cached:
+                    time.sleep(RATE_LIMIT_DELAY)
 
-            # Increment battle ID and rate limit
+            # Increment battle ID (committed with the next batch of replays)
             battle_id += 1
-            time.sleep(RATE_LIMIT_DELAY)
+            output.set_position(next_id=battle_id)
 
     print("-" * 60)
     print(f"✓ Scraping complete!")
-    print(f"  Valid replays: {scraped_count}")
+    print(f"  Valid replays: {scraped_count} new, {len(output)} total")
     print(f"  Total attempts: {attempt_count}")
-    print(f"  Success rate: {(scraped_count/attempt_count)*100:.1f}%")
+    if attempt_count:
+        print(f"  Success rate: {(scraped_count/attempt_count)*100:.1f}%")
     print(f"  Output: {output_file}")
 
 
 if __name__ == "__main__":
     # Start from a recent battle ID (found via search API)
-    # Format: gen9ou-2466685514 (Oct 2025)
+    # Format: gen9ou-2466685514 (Oct 2025); a checkpoint overrides it
     START_ID = 2466685514
 
     # Quick test with 10 replays first, then increase TARGET_REPLAYS
@@ -0,0 +1,44 @@
+"""
+Serve a saved win-prediction model over HTTP with micro-batched inference.
+
+Usage:
+    python serve_model.py --model models/real_data_model.pkl --port 8765
+    curl -s localhost:8765/predict -d '{"teams": [["Great Tusk", "Kingambit", "Gholdengo",
+        "Dragapult", "Iron Valiant", "Corviknight"]]}'
+    curl -s localhost:8765/stats
+
+See src/models/service.py for the request and response formats.
+"""
+
+import argparse
+from pathlib import Path
+
+from src.models.service import InferenceServer, WinModelScorer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the win-prediction model")
+    parser.add_argument("--model", type=Path, default=Path("models/real_data_model.pkl"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-batch-size", type=int, default=512, help="Rows per batched predict call")
+    parser.add_argument("--max-wait-ms", type=float, default=2.0, help="Longest a request waits for a batch")
+    args = parser.parse_args()
+
+    print(f"Loading {args.model}...")
+    scorer = WinModelScorer(args.model)
+    server = InferenceServer(
+        (args.host, args.port), scorer, max_batch_size=args.max_batch_size, max_wait=args.max_wait_ms / 1000
+    )
+    kind = "battles (matchup model)" if scorer.needs_opponent else "teams or battles"
+    print(f"Serving {kind} on http://{args.host}:{server.server_address[1]} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
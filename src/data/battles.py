@@ -0,0 +1,123 @@
+"""Streaming loader for scraped battle JSONL files."""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Callable, Iterator, List
+
+try:
+    import orjson
+except ImportError:  # Optional faster decoder
+    orjson = None
+
+JSON_BACKENDS = ("auto", "orjson", "json")
+
+
+def get_json_decoder(backend: str = "auto") -> Callable[[bytes], dict]:
+    """
+    Get a function that decodes one JSON document from bytes.
+
+    Args:
+        backend: "orjson", "json", or "auto" (orjson if installed, else json)
+    """
+    if backend not in JSON_BACKENDS:
+        raise ValueError(f"Unknown JSON backend {backend!r}, expected one of {JSON_BACKENDS}")
+    if backend == "orjson" and orjson is None:
+        raise ImportError("orjson is not installed")
+    if backend in ("auto", "orjson") and orjson is not None:
+        return orjson.loads
+    return json.loads
+
+
+def battle_key(battle: dict) -> str:
+    """Stable identifier for a battle: its battle_id, or a content hash if it has none."""
+    battle_id = battle.get("battle_id")
+    if battle_id:
+        return battle_id
+    canonical = json.dumps(battle, sort_keys=True, separators=(",", ":"))
+    return "sha1:" + hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+def battle_content_hash(battle: dict) -> str:
+    """
+    Hash of a battle record's content, ignoring its timestamp.
+
+    The timestamp doesn't affect features and is rewritten when battles are
+    re-extracted from the replay cache, so it isn't part of the hash.
+    """
+    content = {key: value for key, value in battle.items() if key != "timestamp"}
+    canonical = json.dumps(content, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+def count_battles(battles_file: Path) -> int:
+    """Count non-empty lines without decoding them."""
+    count = 0
+    with open(battles_file, "rb") as f:
+        for line in f:
+            if line.strip():
+                count += 1
+    return count
+
+
+def iter_battles(battles_file: Path, backend: str = "auto") -> Iterator[dict]:
+    """Yield battles one at a time from a JSONL file."""
+    loads = get_json_decoder(backend)
+    with open(battles_file, "rb") as f:
+        for line in f:
+            if line.strip():
+                yield loads(line)
+
+
+def iter_battle_chunks(
+    battles_file: Path, chunk_size: int = 10000, backend: str = "auto"
+) -> Iterator[List[dict]]:
+    """
+    Yield battles in lists of at most chunk_size.
+
+    Only one chunk is held in memory at a time, however large the file is.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+
+    chunk = []
+    for battle in iter_battles(battles_file, backend):
+        chunk.append(battle)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_line_chunks(battles_file: Path, chunk_size: int = 10000) -> Iterator[List[bytes]]:
+    """
+    Yield raw, undecoded JSONL lines in lists of at most chunk_size.
+
+    Used to hand work to other processes, which decode it themselves with
+    decode_battles.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+
+    chunk = []
+    with open(battles_file, "rb") as f:
+        for line in f:
+            if line.strip():
+                chunk.append(line)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+    if chunk:
+        yield chunk
+
+
+def decode_battles(lines: List[bytes], backend: str = "auto") -> List[dict]:
+    """Decode a chunk from iter_line_chunks."""
+    loads = get_json_decoder(backend)
+    return [loads(line) for line in lines]
+
+
+def load_battles(battles_file: Path, backend: str = "auto") -> List[dict]:
+    """Load all battles from a JSONL file into a list."""
+    return list(iter_battles(battles_file, backend))
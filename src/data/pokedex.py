@@ -1,67 +1,330 @@
 """Pokémon data loading and utilities."""
 
+import hashlib
 import json
-from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Column order of Pokedex.stats
+STAT_KEYS = ("hp", "atk", "def", "spa", "spd", "spe")
+SPEED_COLUMN = STAT_KEYS.index("spe")
+
+DEFAULT_DATA_PATH = Path(__file__).parents[2] / "data" / "raw" / "pokedex.json"
 
 
-@dataclass
 class Pokemon:
-    """Pokémon species data."""
+    """
+    Pokémon species data.
+
+    A lightweight view over one row of a Pokedex's columnar arrays; all data
+    lives in the Pokedex, the view only holds the dex and the species id (and
+    caches types and base_stats once read). Use from_fields to build a
+    standalone species, as the Pokemon(name=..., types=..., ...) dataclass
+    constructor did.
+    """
+
+    __slots__ = ("dex", "id", "_types", "_base_stats")
+
+    def __init__(self, dex: "Pokedex", species_id: int):
+        self.dex = dex
+        self.id = species_id
+        self._types = None
+        self._base_stats = None
 
-    name: str
-    types: List[str]
-    base_stats: Dict[str, int]
-    learnset: List[str]
-    sprite: str = ""
+    @classmethod
+    def from_fields(
+        cls, name: str, types: List[str], base_stats: Dict[str, int], learnset: List[str], sprite: str = ""
+    ) -> "Pokemon":
+        """Build a species outside any data file (backed by a one-species Pokedex)."""
+        entry = {"name": name, "types": list(types), "baseStats": dict(base_stats), "learnset": list(learnset)}
+        if sprite:
+            entry["sprite"] = sprite
+        return Pokedex.from_entries([entry]).get_by_id(0)
+
+    @property
+    def name(self) -> str:
+        return self.dex.names[self.id]
+
+    @property
+    def types(self) -> List[str]:
+        if self._types is None:
+            self._types = list(self.dex.type_combos[self.dex.type_combo_ids[self.id]])
+        return self._types
+
+    @property
+    def base_stats(self) -> Dict[str, int]:
+        if self._base_stats is None:
+            self._base_stats = dict(zip(STAT_KEYS, self.dex.stats[self.id].tolist()))
+        return self._base_stats
+
+    @property
+    def learnset(self) -> List[str]:
+        return self.dex.learnset_of(self.id)
+
+    @property
+    def sprite(self) -> str:
+        return self.dex.sprites[self.id]
 
     @property
     def speed(self) -> int:
-        return self.base_stats["spe"]
+        return int(self.dex.stats[self.id, SPEED_COLUMN])
 
     def can_learn(self, move: str) -> bool:
         """Check if this Pokémon can learn a specific move."""
-        return move in self.learnset
+        return self.dex.can_learn(self.id, move)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Pokemon):
+            return NotImplemented
+        return self.dex is other.dex and self.id == other.id
+
+    def __hash__(self) -> int:
+        return hash((id(self.dex), self.id))
+
+    def __repr__(self) -> str:
+        return f"Pokemon(name={self.name!r}, types={self.types!r})"
 
 
 class Pokedex:
-    """Load and query Pokémon species data."""
+    """
+    Load and query Pokémon species data.
+
+    Species are stored column-wise and indexed by species id (file order):
+
+    - names: species names; name_to_id maps back
+    - stats: int16 array of shape (N, 6), columns in STAT_KEYS order
+    - type_combo_ids: index of each species' typing into type_combos
+    - learnset_bits: uint64 array of shape (N, W); bit m of a row is set if
+      the species learns move_names[m]
+    - move_species / type_species: inverted indexes to sorted species ids
+    """
 
     def __init__(self, data_path: Path = None):
         if data_path is None:
-            data_path = Path(__file__).parents[2] / "data" / "raw" / "pokedex.json"
+            data_path = DEFAULT_DATA_PATH
+
+        raw = Path(data_path).read_bytes()
+        self.source_hash = hashlib.sha256(raw).hexdigest()
+        self._init_entries(json.loads(raw))
+
+    @classmethod
+    def from_entries(cls, entries: List[dict], source_hash: str = None) -> "Pokedex":
+        """
+        Build a Pokedex from species entries in the data file's format.
 
-        with open(data_path) as f:
-            raw_data = json.load(f)
+        Args:
+            entries: Dicts with name, types, baseStats, learnset and optionally sprite
+            source_hash: Identifies the data (default: a hash of the entries)
+        """
+        pokedex = cls.__new__(cls)
+        if source_hash is None:
+            canonical = json.dumps(entries, sort_keys=True, separators=(",", ":"))
+            source_hash = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+        pokedex.source_hash = source_hash
+        pokedex._init_entries(entries)
+        return pokedex
+
+    def _init_entries(self, raw_data: List[dict]):
+        """Build the columnar arrays from species entries."""
+        names = []
+        sprites = []
+        stats = []
+        type_combos: List[Tuple[str, ...]] = []
+        combo_index: Dict[Tuple[str, ...], int] = {}
+        type_combo_ids = []
+        move_names: List[str] = []
+        move_index: Dict[str, int] = {}
+        learnset_ids = []
 
-        self.pokemon: Dict[str, Pokemon] = {}
         for entry in raw_data:
-            mon = Pokemon(
-                name=entry["name"],
-                types=entry["types"],
-                base_stats=entry["baseStats"],
-                learnset=entry["learnset"],
-                sprite=entry.get("sprite", ""),
+            names.append(entry["name"])
+            sprites.append(entry.get("sprite", ""))
+            stats.append([entry["baseStats"][key] for key in STAT_KEYS])
+
+            combo = tuple(entry["types"])
+            if combo not in combo_index:
+                combo_index[combo] = len(type_combos)
+                type_combos.append(combo)
+            type_combo_ids.append(combo_index[combo])
+
+            move_ids = []
+            for move in entry["learnset"]:
+                if move not in move_index:
+                    move_index[move] = len(move_names)
+                    move_names.append(move)
+                move_ids.append(move_index[move])
+            learnset_ids.append(move_ids)
+
+        n_words = max(1, (len(move_names) + 63) // 64)
+        learnset_bits = np.zeros((len(names), n_words), dtype=np.uint64)
+        for species_id, move_ids in enumerate(learnset_ids):
+            for move_id in move_ids:
+                learnset_bits[species_id, move_id >> 6] |= np.uint64(1 << (move_id & 63))
+
+        self._init_columns(
+            names=names,
+            sprites=sprites,
+            stats=np.array(stats, dtype=np.int16).reshape(len(names), len(STAT_KEYS)),
+            type_combos=type_combos,
+            type_combo_ids=np.array(type_combo_ids, dtype=np.int16),
+            move_names=move_names,
+            learnset_bits=learnset_bits,
+        )
+
+    @classmethod
+    def from_arrays(
+        cls,
+        names: List[str],
+        sprites: List[str],
+        stats: np.ndarray,
+        type_combos: List[Tuple[str, ...]],
+        type_combo_ids: np.ndarray,
+        move_names: List[str],
+        learnset_bits: np.ndarray,
+        source_hash: str,
+    ) -> "Pokedex":
+        """Rebuild a Pokedex from its columnar arrays (e.g. a snapshot)."""
+        pokedex = cls.__new__(cls)
+        pokedex.source_hash = source_hash
+        pokedex._init_columns(
+            names=names,
+            sprites=sprites,
+            stats=stats,
+            type_combos=type_combos,
+            type_combo_ids=type_combo_ids,
+            move_names=move_names,
+            learnset_bits=learnset_bits,
+        )
+        return pokedex
+
+    def _init_columns(
+        self,
+        names: List[str],
+        sprites: List[str],
+        stats: np.ndarray,
+        type_combos: List[Tuple[str, ...]],
+        type_combo_ids: np.ndarray,
+        move_names: List[str],
+        learnset_bits: np.ndarray,
+    ):
+        """Attach the columnar arrays and build the derived indexes."""
+        self.names = names
+        self.sprites = sprites
+        self.stats = stats
+        self.type_combos = type_combos
+        self.type_combo_ids = type_combo_ids
+        self.move_names = move_names
+        self.learnset_bits = learnset_bits
+
+        self.name_to_id: Dict[str, int] = {name: i for i, name in enumerate(names)}
+        self.move_index: Dict[str, int] = {move: i for i, move in enumerate(move_names)}
+
+        # Unpacked (N, n_moves) bool view, used to build indexes and decode learnsets
+        learn_matrix = self._unpack_learnsets()
+        self.move_species: Dict[str, np.ndarray] = {
+            move: np.flatnonzero(learn_matrix[:, move_id])
+            for move_id, move in enumerate(move_names)
+        }
+
+        type_names: List[str] = []
+        for combo in type_combos:
+            type_names.extend(t for t in combo if t not in type_names)
+        self.type_names = type_names
+        self.type_species: Dict[str, np.ndarray] = {
+            type_name: np.flatnonzero(
+                np.isin(
+                    type_combo_ids,
+                    [i for i, combo in enumerate(type_combos) if type_name in combo],
+                )
             )
-            self.pokemon[mon.name] = mon
+            for type_name in type_names
+        }
+
+        self._views = [Pokemon(self, species_id) for species_id in range(len(names))]
+        self.pokemon: Dict[str, Pokemon] = dict(zip(names, self._views))
+
+    def _unpack_learnsets(self) -> np.ndarray:
+        """Expand learnset bitsets into an (N, n_moves) bool matrix."""
+        as_bytes = self.learnset_bits.astype("<u8", copy=False).view(np.uint8)
+        bits = np.unpackbits(as_bytes, axis=1, bitorder="little")
+        return bits[:, : len(self.move_names)].astype(bool)
+
+    def __len__(self) -> int:
+        return len(self.names)
 
     def get(self, name: str) -> Pokemon:
         """Get Pokémon by name."""
         return self.pokemon.get(name)
 
+    def get_by_id(self, species_id: int) -> Pokemon:
+        """Get Pokémon by species id."""
+        return self._views[species_id]
+
+    def id_of(self, name: str) -> int:
+        """Get the species id for a name, or -1 if it is not in the dex."""
+        return self.name_to_id.get(name, -1)
+
+    def encode_team(self, team_names: List[str], team_size: int = 6) -> np.ndarray:
+        """
+        Encode a team of names as species ids.
+
+        Names missing from the dex are dropped; if the remaining team is not
+        exactly team_size long, the row is all -1 (an invalid team).
+        """
+        ids = [self.name_to_id[name] for name in team_names if name in self.name_to_id]
+        if len(ids) != team_size:
+            return np.full(team_size, -1, dtype=np.intp)
+        return np.array(ids, dtype=np.intp)
+
+    def encode_teams(self, teams: List[List[str]], team_size: int = 6) -> np.ndarray:
+        """
+        Encode many teams as an (N, team_size) species id matrix.
+
+        Invalid teams (see encode_team) are rows of -1; filter them with
+        (ids >= 0).all(axis=1).
+        """
+        ids = np.full((len(teams), team_size), -1, dtype=np.intp)
+        for row, team_names in enumerate(teams):
+            ids[row] = self.encode_team(team_names, team_size)
+        return ids
+
     def exists(self, name: str) -> bool:
         """Check if a Pokémon exists in the dex."""
         return name in self.pokemon
 
     def all_names(self) -> List[str]:
         """Get list of all Pokémon names."""
-        return list(self.pokemon.keys())
+        return list(self.names)
+
+    def can_learn(self, species_id: int, move: str) -> bool:
+        """Check if a species can learn a move (O(1) bitset test)."""
+        move_id = self.move_index.get(move)
+        if move_id is None:
+            return False
+        word = int(self.learnset_bits[species_id, move_id >> 6])
+        return bool((word >> (move_id & 63)) & 1)
+
+    def learnset_of(self, species_id: int) -> List[str]:
+        """Decode a species' learnset into move names."""
+        row = self.learnset_bits[species_id : species_id + 1]
+        as_bytes = row.astype("<u8", copy=False).view(np.uint8)
+        bits = np.unpackbits(as_bytes, bitorder="little")[: len(self.move_names)]
+        return [self.move_names[i] for i in np.flatnonzero(bits)]
+
+    def species_with_type(self, type_name: str) -> np.ndarray:
+        """Get ids of all species that have a specific type."""
+        return self.type_species.get(type_name, np.empty(0, dtype=np.intp))
+
+    def species_with_move(self, move: str) -> np.ndarray:
+        """Get ids of all species that can learn a specific move."""
+        return self.move_species.get(move, np.empty(0, dtype=np.intp))
 
     def filter_by_type(self, type_name: str) -> List[Pokemon]:
         """Get all Pokémon that have a specific type."""
-        return [mon for mon in self.pokemon.values() if type_name in mon.types]
+        return [self.get_by_id(i) for i in self.species_with_type(type_name)]
 
     def filter_by_move(self, move: str) -> List[Pokemon]:
         """Get all Pokémon that can learn a specific move."""
-        return [mon for mon in self.pokemon.values() if mon.can_learn(move)]
+        return [self.get_by_id(i) for i in self.species_with_move(move)]
@@ -0,0 +1,268 @@
+"""
+Compiled binary snapshot of the Pokédex, type chart and usage stats.
+
+Parsing the raw JSON/CSV sources is the bulk of process startup, so the
+parsed arrays are written once to a single file and memory-mapped back on
+later runs. Layout:
+
+    magic (8 bytes) | header length (uint64 LE) | JSON header | arrays
+
+The JSON header holds the interned names, the hash of the source files and
+the offset/dtype/shape of every array. Arrays start on 64-byte boundaries and
+are returned as read-only zero-copy views into the mapping.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from src.data import pokedex as pokedex_module
+from src.data import types as types_module
+from src.data import usage as usage_module
+from src.data.pokedex import Pokedex
+from src.data.types import TypeChart
+from src.data.usage import UsageStats
+
+MAGIC = b"PKSNAP01"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+DEFAULT_SNAPSHOT_PATH = Path(__file__).parents[2] / "data" / "cache" / "snapshot.bin"
+
+
+@dataclass
+class Snapshot:
+    """Ready-to-use data objects loaded from a snapshot."""
+
+    pokedex: Pokedex
+    type_chart: TypeChart
+    usage_stats: UsageStats
+    source_hash: str
+
+
+def _file_hash(path: Path) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def _combined_hash(file_hashes: dict) -> str:
+    digest = hashlib.sha256(f"v{FORMAT_VERSION}".encode())
+    for key in ("pokedex", "type_chart", "usage"):
+        digest.update(file_hashes[key].encode())
+    return digest.hexdigest()
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def build_snapshot(
+    snapshot_path: Path = None,
+    pokedex_path: Path = None,
+    type_chart_path: Path = None,
+    usage_path: Path = None,
+) -> Path:
+    """
+    Parse the raw sources and write a snapshot file.
+
+    The file is written to a temporary path and renamed into place, so
+    concurrent readers never see a partial snapshot.
+
+    Returns:
+        Path of the written snapshot
+    """
+    snapshot_path = Path(snapshot_path or DEFAULT_SNAPSHOT_PATH)
+
+    pokedex = Pokedex(pokedex_path)
+    type_chart = TypeChart(type_chart_path)
+    usage_stats = UsageStats(usage_path)
+    file_hashes = {
+        "pokedex": pokedex.source_hash,
+        "type_chart": type_chart.source_hash,
+        "usage": usage_stats.source_hash,
+    }
+
+    usage_columns = usage_stats.columns
+    arrays = {
+        "pokedex.stats": np.ascontiguousarray(pokedex.stats),
+        "pokedex.type_combo_ids": np.ascontiguousarray(pokedex.type_combo_ids),
+        "pokedex.learnset_bits": np.ascontiguousarray(pokedex.learnset_bits),
+        "type_chart.matrix": np.ascontiguousarray(type_chart.matrix),
+        "type_chart.combo_defense": np.ascontiguousarray(type_chart.combo_defense),
+        "usage.usage_pct": np.asarray(usage_columns["usage_pct"], dtype=np.float64),
+        "usage.generation": np.asarray(usage_columns["generation"], dtype=np.int64),
+    }
+
+    header = {
+        "format_version": FORMAT_VERSION,
+        "source_hash": _combined_hash(file_hashes),
+        "file_hashes": file_hashes,
+        "pokedex": {
+            "names": pokedex.names,
+            "sprites": pokedex.sprites,
+            "type_combos": [list(combo) for combo in pokedex.type_combos],
+            "move_names": pokedex.move_names,
+        },
+        "type_chart": {"types": type_chart.types},
+        "usage": {
+            "name": list(usage_columns["name"]),
+            "tier": list(usage_columns["tier"]),
+            "month": [str(month) for month in usage_columns["month"]],
+        },
+        "arrays": {},
+    }
+
+    # Offsets are relative to the start of the data section, which begins at
+    # the first aligned position after the header
+    offset = 0
+    for key, array in arrays.items():
+        offset = _align(offset)
+        header["arrays"][key] = {
+            "offset": offset,
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+        }
+        offset += array.nbytes
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = _align(len(MAGIC) + 8 + len(header_bytes))
+
+    snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = snapshot_path.with_name(f"{snapshot_path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for key, array in arrays.items():
+            f.seek(data_start + header["arrays"][key]["offset"])
+            f.write(array.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, snapshot_path)
+
+    return snapshot_path
+
+
+def _read_header(buffer) -> tuple[dict, int]:
+    if buffer[: len(MAGIC)] != MAGIC:
+        raise ValueError("Not a snapshot file")
+    (header_len,) = struct.unpack_from("<Q", buffer, len(MAGIC))
+    header_start = len(MAGIC) + 8
+    header = json.loads(bytes(buffer[header_start : header_start + header_len]))
+    return header, _align(header_start + header_len)
+
+
+def _open_snapshot(snapshot_path: Path) -> Snapshot:
+    with open(snapshot_path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    header, data_start = _read_header(buffer)
+
+    def array(key: str) -> np.ndarray:
+        spec = header["arrays"][key]
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        view = np.frombuffer(
+            buffer, dtype=dtype, count=count, offset=data_start + spec["offset"]
+        )
+        return view.reshape(spec["shape"])
+
+    file_hashes = header["file_hashes"]
+    dex_meta = header["pokedex"]
+    pokedex = Pokedex.from_arrays(
+        names=dex_meta["names"],
+        sprites=dex_meta["sprites"],
+        stats=array("pokedex.stats"),
+        type_combos=[tuple(combo) for combo in dex_meta["type_combos"]],
+        type_combo_ids=array("pokedex.type_combo_ids"),
+        move_names=dex_meta["move_names"],
+        learnset_bits=array("pokedex.learnset_bits"),
+        source_hash=file_hashes["pokedex"],
+    )
+    type_chart = TypeChart.from_arrays(
+        types=header["type_chart"]["types"],
+        matrix=array("type_chart.matrix"),
+        combo_defense=array("type_chart.combo_defense"),
+        source_hash=file_hashes["type_chart"],
+    )
+    usage_meta = header["usage"]
+    usage_stats = UsageStats.from_columns(
+        {
+            "name": usage_meta["name"],
+            "usage_pct": array("usage.usage_pct"),
+            "tier": usage_meta["tier"],
+            "generation": array("usage.generation"),
+            "month": usage_meta["month"],
+        },
+        source_hash=file_hashes["usage"],
+    )
+
+    return Snapshot(
+        pokedex=pokedex,
+        type_chart=type_chart,
+        usage_stats=usage_stats,
+        source_hash=header["source_hash"],
+    )
+
+
+def _snapshot_hash(snapshot_path: Path) -> str | None:
+    """Read the source hash stored in a snapshot, or None if unreadable."""
+    try:
+        with open(snapshot_path, "rb") as f:
+            prefix = f.read(len(MAGIC) + 8)
+            if len(prefix) < len(MAGIC) + 8 or prefix[: len(MAGIC)] != MAGIC:
+                return None
+            (header_len,) = struct.unpack_from("<Q", prefix, len(MAGIC))
+            header = json.loads(f.read(header_len))
+    except (OSError, ValueError):
+        return None
+    if header.get("format_version") != FORMAT_VERSION:
+        return None
+    return header.get("source_hash")
+
+
+def load_snapshot(
+    snapshot_path: Path = None,
+    pokedex_path: Path = None,
+    type_chart_path: Path = None,
+    usage_path: Path = None,
+    rebuild: bool = False,
+) -> Snapshot:
+    """
+    Load Pokedex, TypeChart and UsageStats from a compiled snapshot.
+
+    The snapshot is (re)built automatically if it is missing, was written by
+    a different format version, or the source files' hashes have changed.
+
+    Args:
+        snapshot_path: Snapshot file (default: data/cache/snapshot.bin)
+        pokedex_path: Raw Pokédex JSON (default: data/raw/pokedex.json)
+        type_chart_path: Raw type chart JSON (default: data/raw/type_chart.json)
+        usage_path: Raw usage CSV (default: data/raw/usage_ou.csv)
+        rebuild: Force a rebuild even if the snapshot is current
+
+    Returns:
+        Snapshot with ready-to-use data objects
+    """
+    snapshot_path = Path(snapshot_path or DEFAULT_SNAPSHOT_PATH)
+    pokedex_path = Path(pokedex_path or pokedex_module.DEFAULT_DATA_PATH)
+    type_chart_path = Path(type_chart_path or types_module.DEFAULT_DATA_PATH)
+    usage_path = Path(usage_path or usage_module.DEFAULT_DATA_PATH)
+
+    expected_hash = _combined_hash(
+        {
+            "pokedex": _file_hash(pokedex_path),
+            "type_chart": _file_hash(type_chart_path),
+            "usage": _file_hash(usage_path),
+        }
+    )
+
+    if rebuild or _snapshot_hash(snapshot_path) != expected_hash:
+        build_snapshot(snapshot_path, pokedex_path, type_chart_path, usage_path)
+
+    return _open_snapshot(snapshot_path)
@@ -1,8 +1,13 @@
 """Type effectiveness data loading and utilities."""
 
+import hashlib
 import json
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+DEFAULT_DATA_PATH = Path(__file__).parents[2] / "data" / "raw" / "type_chart.json"
 
 
 class TypeChart:
@@ -10,12 +15,82 @@ class TypeChart:
 
     def __init__(self, data_path: Path = None):
         if data_path is None:
-            data_path = Path(__file__).parents[2] / "data" / "raw" / "type_chart.json"
+            data_path = DEFAULT_DATA_PATH
 
-        with open(data_path) as f:
-            self.chart: Dict[str, Dict[str, float]] = json.load(f)
+        raw = Path(data_path).read_bytes()
+        self.source_hash = hashlib.sha256(raw).hexdigest()
+        self.chart: Dict[str, Dict[str, float]] = json.loads(raw)
 
         self.types = list(self.chart.keys())
+        self._build_tables()
+
+    @classmethod
+    def from_arrays(
+        cls, types: List[str], matrix: np.ndarray, combo_defense: np.ndarray, source_hash: str
+    ) -> "TypeChart":
+        """Rebuild a TypeChart from precomputed tables (e.g. a snapshot)."""
+        type_chart = cls.__new__(cls)
+        type_chart.source_hash = source_hash
+        type_chart.types = list(types)
+        type_chart.chart = {
+            atk: dict(zip(type_chart.types, row)) for atk, row in zip(types, matrix.tolist())
+        }
+        type_chart._build_tables(matrix=matrix, combo_defense=combo_defense)
+        return type_chart
+
+    def _build_tables(self, matrix: np.ndarray = None, combo_defense: np.ndarray = None):
+        """
+        Build the dense effectiveness matrix and the dual-type defense table.
+
+        matrix[a, d] is the multiplier of attacking type a against defending
+        type d. combo_defense[c, a] is the combined multiplier of attacking type
+        a against defensive profile c, where profiles are every single type
+        followed by every unordered pair of distinct types (171 for 18 types).
+        """
+        self.type_index: Dict[str, int] = {t: i for i, t in enumerate(self.types)}
+
+        n_types = len(self.types)
+        if matrix is None:
+            matrix = np.array(
+                [[self.chart[atk][dfn] for dfn in self.types] for atk in self.types],
+                dtype=np.float64,
+            )
+        self.matrix = matrix
+
+        self.combos: List[Tuple[str, ...]] = [(t,) for t in self.types]
+        for i in range(n_types):
+            for j in range(i + 1, n_types):
+                self.combos.append((self.types[i], self.types[j]))
+
+        # Both orderings of a dual type map to the same profile
+        self.combo_index: Dict[Tuple[str, ...], int] = {}
+        for combo_id, combo in enumerate(self.combos):
+            self.combo_index[combo] = combo_id
+            self.combo_index[combo[::-1]] = combo_id
+
+        if combo_defense is None:
+            # Multiply column by column, in defender order, exactly as get_matchup did
+            combo_defense = np.ones((len(self.combos), n_types), dtype=np.float64)
+            for combo_id, combo in enumerate(self.combos):
+                for def_type in combo:
+                    combo_defense[combo_id] *= self.matrix[:, self.type_index[def_type]]
+        self.combo_defense = combo_defense
+
+    def type_id(self, type_name: str) -> int:
+        """Get the interned index of a type."""
+        return self.type_index[type_name]
+
+    def combo_id(self, defending_types: list[str]) -> int:
+        """
+        Get the defensive profile index for a Pokémon with 1-2 types.
+
+        Args:
+            defending_types: List of defending types (1 or 2 elements)
+
+        Returns:
+            Row index into combo_defense
+        """
+        return self.combo_index[tuple(defending_types)]
 
     def get_effectiveness(self, attacking_type: str, defending_type: str) -> float:
         """
@@ -41,11 +116,41 @@ class TypeChart:
         Returns:
             Combined effectiveness (e.g., 0.25, 0.5, 1, 2, 4)
         """
+        combo_id = self.combo_index.get(tuple(defending_types))
+        if combo_id is not None:
+            return float(self.combo_defense[combo_id, self.type_index[attacking_type]])
+
+        # Unusual profiles (e.g. a repeated type) fall back to the direct product
         multiplier = 1.0
         for def_type in defending_types:
             multiplier *= self.get_effectiveness(attacking_type, def_type)
         return multiplier
 
+    def get_matchups(self, attack_ids, defender_combo_ids) -> np.ndarray:
+        """
+        Batch lookup of combined effectiveness.
+
+        Args:
+            attack_ids: Attacking type indices (array-like)
+            defender_combo_ids: Defensive profile indices (array-like)
+
+        Returns:
+            Array of multipliers, broadcast over the two inputs
+        """
+        return self.combo_defense[np.asarray(defender_combo_ids), np.asarray(attack_ids)]
+
+    def get_defensive_profiles(self, defender_combo_ids) -> np.ndarray:
+        """
+        Get full defensive rows for a batch of profiles.
+
+        Args:
+            defender_combo_ids: Defensive profile indices (array-like)
+
+        Returns:
+            Array of shape (..., 18) with the multiplier of every attacking type
+        """
+        return self.combo_defense[np.asarray(defender_combo_ids)]
+
     def get_defensive_matchups(self, defending_types: list[str]) -> Dict[str, float]:
         """
         Get all offensive type matchups against a given defender.
@@ -56,6 +161,10 @@ class TypeChart:
         Returns:
             Dict mapping attacking type to effectiveness multiplier
         """
+        combo_id = self.combo_index.get(tuple(defending_types))
+        if combo_id is not None:
+            return dict(zip(self.types, self.combo_defense[combo_id].tolist()))
+
         return {
             atk_type: self.get_matchup(atk_type, defending_types)
             for atk_type in self.types
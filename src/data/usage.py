@@ -1,12 +1,20 @@
 """Usage statistics loading and utilities."""
 
-import pandas as pd
+import csv
+import hashlib
+import io
+import numpy as np
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
+DEFAULT_DATA_PATH = Path(__file__).parents[2] / "data" / "raw" / "usage_ou.csv"
 
-@dataclass
+# (tier, generation, month) identifies one ranking period in the CSV
+PeriodKey = Tuple[str, int, str]
+
+
+@dataclass(frozen=True)
 class UsageEntry:
     """Usage stats for a single Pokémon."""
 
@@ -18,47 +26,174 @@ class UsageEntry:
 
 
 class UsageStats:
-    """Load and query competitive usage statistics."""
+    """
+    Load and query competitive usage statistics.
+
+    The CSV may hold several tiers, generations and months. Name lookups and
+    per-tier and per-period rankings are indexed once at load time. Rankings
+    cover every row of the tier unless they name a generation/month, or ask
+    for the latest period (latest=True).
+
+    The CSV is parsed with the stdlib csv module into plain columns. pandas is
+    only imported if a caller asks for the .df DataFrame.
+    """
 
     def __init__(self, data_path: Path = None):
         if data_path is None:
-            data_path = Path(__file__).parents[2] / "data" / "raw" / "usage_ou.csv"
+            data_path = DEFAULT_DATA_PATH
+
+        raw = Path(data_path).read_bytes()
+        self.source_hash = hashlib.sha256(raw).hexdigest()
+
+        reader = csv.DictReader(io.StringIO(raw.decode("utf-8")))
+        rows = list(reader)
+        self.columns: Dict[str, np.ndarray | list] = {
+            "name": [row["name"] for row in rows],
+            "usage_pct": np.array([float(row["usage_pct"]) for row in rows], dtype=np.float64),
+            "tier": [row["tier"] for row in rows],
+            "generation": np.array([int(row["generation"]) for row in rows], dtype=np.int64),
+            "month": [row["month"] for row in rows],
+        }
+        self._df = None
+        self._build_indexes()
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, list], source_hash: str) -> "UsageStats":
+        """Rebuild UsageStats from column arrays (e.g. a snapshot)."""
+        usage_stats = cls.__new__(cls)
+        usage_stats.source_hash = source_hash
+        usage_stats.columns = columns
+        usage_stats._df = None
+        usage_stats._build_indexes()
+        return usage_stats
+
+    @property
+    def df(self):
+        """Usage data as a pandas DataFrame (imports pandas on first access)."""
+        if self._df is None:
+            import pandas as pd
+
+            self._df = pd.DataFrame(self.columns)
+        return self._df
+
+    def _build_indexes(self):
+        """Build name→usage hash indexes and pre-sorted per-period rankings."""
+        columns = self.columns
+        self.entries: List[UsageEntry] = [
+            UsageEntry(name=name, usage_pct=usage_pct, tier=tier, generation=generation, month=month)
+            for name, usage_pct, tier, generation, month in zip(
+                list(columns["name"]),
+                np.asarray(columns["usage_pct"], dtype=np.float64).tolist(),
+                list(columns["tier"]),
+                np.asarray(columns["generation"], dtype=np.int64).tolist(),
+                [str(month) for month in columns["month"]],
+            )
+        ]
+
+        # First row wins, matching a top-to-bottom scan of the file
+        self._usage_by_name: Dict[str, float] = {}
+        period_rows: Dict[PeriodKey, List[int]] = {}
+        for row, entry in enumerate(self.entries):
+            self._usage_by_name.setdefault(entry.name, entry.usage_pct)
+            period_rows.setdefault((entry.tier, entry.generation, entry.month), []).append(row)
+
+        usage = np.asarray(columns["usage_pct"], dtype=np.float64)
+        self._tier_rankings: Dict[str, np.ndarray] = {}
+        for tier in dict.fromkeys(entry.tier for entry in self.entries):
+            rows = np.array([row for row, entry in enumerate(self.entries) if entry.tier == tier], dtype=np.intp)
+            self._tier_rankings[tier] = rows[np.argsort(-usage[rows], kind="stable")]
 
-        self.df = pd.read_csv(data_path)
+        self._rankings: Dict[PeriodKey, np.ndarray] = {}
+        self._usage_by_period: Dict[PeriodKey, Dict[str, float]] = {}
+        for key, rows in period_rows.items():
+            rows = np.array(rows, dtype=np.intp)
+            # Stable sort keeps file order among ties, like DataFrame.nlargest
+            self._rankings[key] = rows[np.argsort(-usage[rows], kind="stable")]
+            by_name: Dict[str, float] = {}
+            for row in rows:
+                by_name.setdefault(self.entries[row].name, self.entries[row].usage_pct)
+            self._usage_by_period[key] = by_name
 
-    def get_usage(self, name: str) -> float:
-        """Get usage percentage for a Pokémon (0-100 range)."""
-        match = self.df[self.df["name"] == name]
-        if match.empty:
+        self._latest_period: Dict[str, PeriodKey] = {}
+        for key in self._rankings:
+            tier, generation, month = key
+            current = self._latest_period.get(tier)
+            if current is None or (generation, month) > current[1:]:
+                self._latest_period[tier] = key
+
+        self._top_k_cache: Dict[tuple, Tuple[UsageEntry, ...]] = {}
+
+    def _period(self, tier: str, generation: Optional[int], month: Optional[str]) -> Optional[PeriodKey]:
+        """Resolve a (possibly partial) period to a key in the rankings; no generation/month means the latest."""
+        if generation is None and month is None:
+            return self._latest_period.get(tier)
+
+        candidates = [
+            key
+            for key in self._rankings
+            if key[0] == tier
+            and (generation is None or key[1] == generation)
+            and (month is None or key[2] == month)
+        ]
+        return max(candidates, key=lambda key: key[1:]) if candidates else None
+
+    def periods(self, tier: str = None) -> List[PeriodKey]:
+        """Get all (tier, generation, month) periods in the data."""
+        return sorted(key for key in self._rankings if tier is None or key[0] == tier)
+
+    def get_usage(
+        self, name: str, tier: str = None, generation: int = None, month: str = None
+    ) -> float:
+        """
+        Get usage percentage for a Pokémon (0-100 range).
+
+        Without a tier, returns the first value for the name in the file.
+        """
+        if tier is None:
+            return self._usage_by_name.get(name, 0.0)
+
+        period = self._period(tier, generation, month)
+        if period is None:
             return 0.0
-        return match.iloc[0]["usage_pct"]
+        return self._usage_by_period[period].get(name, 0.0)
+
+    def _ranking(self, tier: str, generation: Optional[int], month: Optional[str], latest: bool) -> np.ndarray:
+        """Rows ranked by usage: the whole tier, or one period if one is named or latest is set."""
+        if generation is None and month is None and not latest:
+            return self._tier_rankings.get(tier, np.empty(0, dtype=np.intp))
+        period = self._period(tier, generation, month)
+        if period is None:
+            return np.empty(0, dtype=np.intp)
+        return self._rankings[period]
 
-    def get_top_k(self, k: int = 15, tier: str = "OU") -> List[UsageEntry]:
+    def get_top_k(
+        self, k: int = 15, tier: str = "OU", generation: int = None, month: str = None, latest: bool = False
+    ) -> Tuple[UsageEntry, ...]:
         """
         Get top K most-used Pokémon in a tier.
 
         Args:
             k: Number of Pokémon to return
             tier: Competitive tier (default: OU)
+            generation: Only rank this generation (latest month unless month is given)
+            month: Only rank this month, e.g. "2025-09"
+            latest: Only rank the tier's most recent generation/month
 
         Returns:
-            List of UsageEntry objects, sorted by usage descending
+            Tuple of UsageEntry objects, sorted by usage descending (rows
+            from every period of the tier, unless a period is selected)
         """
-        tier_df = self.df[self.df["tier"] == tier]
-        top_k = tier_df.nlargest(k, "usage_pct")
-
-        return [
-            UsageEntry(
-                name=row["name"],
-                usage_pct=row["usage_pct"],
-                tier=row["tier"],
-                generation=row["generation"],
-                month=row["month"],
-            )
-            for _, row in top_k.iterrows()
-        ]
+        cache_key = (k, tier, generation, month, latest)
+        cached = self._top_k_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        top_k = tuple(self.entries[row] for row in self._ranking(tier, generation, month, latest)[:k])
+        self._top_k_cache[cache_key] = top_k
+        return top_k
 
-    def get_all_names(self, tier: str = "OU") -> List[str]:
-        """Get all Pokémon names in a tier, sorted by usage."""
-        tier_df = self.df[self.df["tier"] == tier]
-        return tier_df.sort_values("usage_pct", ascending=False)["name"].tolist()
+    def get_all_names(
+        self, tier: str = "OU", generation: int = None, month: str = None, latest: bool = False
+    ) -> List[str]:
+        """Get all Pokémon names in a tier (or one period of it, as in get_top_k), sorted by usage."""
+        return [self.entries[row].name for row in self._ranking(tier, generation, month, latest)]
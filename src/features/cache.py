@@ -0,0 +1,103 @@
+"""LRU cache for per-team scores and features."""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from src.data.pokedex import Pokemon
+
+_MISSING = object()
+
+
+@dataclass
+class CacheStats:
+    """Counters for a TeamFeatureCache."""
+
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int  # Entries found but computed from different data
+    size: int
+    maxsize: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def team_signature(team: list[Pokemon]) -> tuple[int, ...]:
+    """Canonical team key: the sorted tuple of species ids."""
+    return tuple(sorted(mon.id for mon in team))
+
+
+def data_version(*sources) -> tuple[str, ...]:
+    """Version tag for cached values: the source hashes of the data they came from."""
+    return tuple(source.source_hash for source in sources)
+
+
+class TeamFeatureCache:
+    """
+    Least-recently-used cache of team-level values.
+
+    Keys are a namespace plus a team_signature, so the same six-species core
+    hits regardless of member order. Every entry stores the data_version it
+    was computed from; a lookup with a different version (the dex, type chart
+    or usage data changed) is treated as a miss and recomputed.
+    """
+
+    def __init__(self, maxsize: int = 65536):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key, version, default=None):
+        """Get a cached value, or default if missing or stale."""
+        entry = self._entries.get(key, _MISSING)
+        if entry is not _MISSING:
+            if entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._entries[key]
+            self.invalidations += 1
+        self.misses += 1
+        return default
+
+    def put(self, key, version, value):
+        """Store a value, evicting the least recently used entry if full."""
+        self._entries[key] = (version, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_compute(self, key, version, compute):
+        """Get a cached value, computing and storing it on a miss."""
+        value = self.get(key, version, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, version, value)
+        return value
+
+    def clear(self):
+        """Drop all entries (counters are kept)."""
+        self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        """Snapshot of the cache counters."""
+        return CacheStats(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            invalidations=self.invalidations,
+            size=len(self._entries),
+            maxsize=self.maxsize,
+        )
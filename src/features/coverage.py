@@ -1,15 +1,68 @@
 """Type coverage analysis for Pokémon teams."""
 
+from dataclasses import dataclass
 
-from src.data.pokedex import Pokemon
+import numpy as np
+
+from src.data.pokedex import Pokedex, Pokemon
 from src.data.types import TypeChart
+from src.features.cache import TeamFeatureCache, data_version, team_signature
+
+
+@dataclass
+class TeamCoverage:
+    """Coverage scores for a batch of N teams."""
+
+    offensive: np.ndarray  # (N,) offensive_coverage_score (NaN for invalid teams)
+    defensive: np.ndarray  # (N,) defensive_coverage_score (NaN for invalid teams)
+    combined: np.ndarray  # (N,) type_coverage_score (NaN for invalid teams)
+    weaknesses: np.ndarray  # (N, 18) members weak to each attacking type (-1 for invalid teams)
+    resistances: np.ndarray  # (N, 18) members resisting each attacking type (-1 for invalid teams)
 
 
 class CoverageAnalyzer:
     """Analyze offensive and defensive type coverage for teams."""
 
-    def __init__(self, type_chart: TypeChart):
+    def __init__(
+        self, type_chart: TypeChart, pokedex: Pokedex = None, cache: TeamFeatureCache = None
+    ):
         self.type_chart = type_chart
+        self.pokedex = pokedex
+        self.cache = cache
+        self._tables_key = None
+
+    def species_tables(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Per-species effectiveness rows, built once per (dex, type chart).
+
+        Returns:
+            defense: (N, 18) multiplier of each attacking type against each species
+            offense: (N, 18) bool, species hits the defending type super-effectively with STAB
+        """
+        if self.pokedex is None:
+            raise ValueError("CoverageAnalyzer needs a pokedex for species-id batch scoring")
+
+        key = (id(self.pokedex), self.pokedex.source_hash, id(self.type_chart), self.type_chart.source_hash)
+        if self._tables_key != key:
+            chart = self.type_chart
+            combo_rows = np.array(
+                [chart.combo_id(combo) for combo in self.pokedex.type_combos], dtype=np.intp
+            )
+            species_rows = combo_rows[self.pokedex.type_combo_ids]
+            self._species_defense = chart.combo_defense[species_rows]
+
+            super_effective = chart.matrix > 1.0
+            combo_offense = np.array(
+                [
+                    np.any([super_effective[chart.type_id(t)] for t in combo], axis=0)
+                    for combo in self.pokedex.type_combos
+                ],
+                dtype=bool,
+            ).reshape(len(self.pokedex.type_combos), len(chart.types))
+            self._species_offense = combo_offense[self.pokedex.type_combo_ids]
+            self._tables_key = key
+
+        return self._species_defense, self._species_offense
 
     def offensive_coverage_score(self, team: list[Pokemon]) -> float:
         """
@@ -70,11 +123,68 @@ class CoverageAnalyzer:
 
         Default weights: 60% offensive, 40% defensive
         """
+        if (
+            self.cache is not None
+            and self.pokedex is not None
+            and all(mon.dex is self.pokedex for mon in team)
+        ):
+            return self.cache.get_or_compute(
+                ("type_coverage", offensive_weight, defensive_weight, team_signature(team)),
+                data_version(self.pokedex, self.type_chart),
+                lambda: self._type_coverage_score(team, offensive_weight, defensive_weight),
+            )
+
+        return self._type_coverage_score(team, offensive_weight, defensive_weight)
+
+    def _type_coverage_score(
+        self, team: list[Pokemon], offensive_weight: float, defensive_weight: float
+    ) -> float:
         offensive = self.offensive_coverage_score(team)
         defensive = self.defensive_coverage_score(team)
 
         return offensive_weight * offensive + defensive_weight * defensive
 
+    def score_teams(
+        self, team_ids: np.ndarray, offensive_weight: float = 0.6, defensive_weight: float = 0.4
+    ) -> TeamCoverage:
+        """
+        Score many teams at once from an (N, team_size) species id matrix.
+
+        Gives the same values as offensive_coverage_score,
+        defensive_coverage_score and type_coverage_score per row, and the
+        get_team_weaknesses / get_team_resistances counts as dense arrays
+        (columns in type_chart.types order). Rows with an unknown species
+        (-1, see Pokedex.encode_teams) get NaN scores and -1 counts.
+        """
+        defense, offense = self.species_tables()
+        team_ids = np.asarray(team_ids, dtype=np.intp)
+        invalid = (team_ids < 0).any(axis=1)
+        team_ids = np.where(team_ids < 0, 0, team_ids)  # Any valid row; masked below
+
+        n_types = len(self.type_chart.types)
+        covered = offense[team_ids].any(axis=1).sum(axis=1)
+        offensive = covered / float(n_types)
+
+        effectiveness = defense[team_ids]  # (N, team_size, 18)
+        weaknesses = (effectiveness > 1.0).sum(axis=1)
+        resistances = (effectiveness < 1.0).sum(axis=1)
+        penalty = ((weaknesses >= 2) & (resistances == 0)).sum(axis=1)
+        defensive = 1.0 - (penalty / float(n_types))
+
+        if invalid.any():
+            offensive[invalid] = np.nan
+            defensive[invalid] = np.nan
+            weaknesses[invalid] = -1
+            resistances[invalid] = -1
+
+        return TeamCoverage(
+            offensive=offensive,
+            defensive=defensive,
+            combined=offensive_weight * offensive + defensive_weight * defensive,
+            weaknesses=weaknesses,
+            resistances=resistances,
+        )
+
     def get_team_weaknesses(self, team: list[Pokemon]) -> dict:
         """Get all attacking types and how many team members are weak to each."""
         weakness_counts = {}
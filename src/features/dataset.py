@@ -0,0 +1,265 @@
+"""Battle-level dataset construction for the win-prediction model."""
+
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List
+
+import numpy as np
+
+from src.data.battles import battle_key, decode_battles
+from src.data.snapshot import load_snapshot
+from src.features.cache import TeamFeatureCache
+from src.features.coverage import CoverageAnalyzer
+from src.features.matchup import MATCHUP_FEATURE_NAMES, MatchupTable
+from src.features.meta import MetaAnalyzer
+from src.features.team_features import FEATURE_NAMES, extract_features
+
+
+def dataset_feature_names(matchup: bool = False) -> list[str]:
+    """Column names of extracted rows, with or without the matchup stage."""
+    return FEATURE_NAMES + MATCHUP_FEATURE_NAMES if matchup else list(FEATURE_NAMES)
+
+
+class DatasetBuffer:
+    """
+    Growable float32 feature matrix with int8 labels.
+
+    Rows are written in place into preallocated arrays that double in size
+    when full, so building the dataset never holds a Python list of per-team
+    arrays. Pass the expected row count as capacity to avoid any regrowth.
+    """
+
+    def __init__(self, n_features: int = len(FEATURE_NAMES), capacity: int = 1024):
+        self.n_features = n_features
+        self._X = np.empty((max(1, capacity), n_features), dtype=np.float32)
+        self._y = np.empty(max(1, capacity), dtype=np.int8)
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _reserve(self, n_rows: int):
+        needed = self.size + n_rows
+        if needed <= len(self._X):
+            return
+        capacity = max(needed, 2 * len(self._X))
+        X = np.empty((capacity, self.n_features), dtype=np.float32)
+        y = np.empty(capacity, dtype=np.int8)
+        X[: self.size] = self._X[: self.size]
+        y[: self.size] = self._y[: self.size]
+        self._X, self._y = X, y
+
+    def append(self, features: np.ndarray, label: int):
+        """Append one row."""
+        self._reserve(1)
+        self._X[self.size] = features
+        self._y[self.size] = label
+        self.size += 1
+
+    def extend(self, X: np.ndarray, y: np.ndarray):
+        """Append a block of rows."""
+        self._reserve(len(X))
+        self._X[self.size : self.size + len(X)] = X
+        self._y[self.size : self.size + len(X)] = y
+        self.size += len(X)
+
+    @property
+    def X(self) -> np.ndarray:
+        return self._X[: self.size]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self._y[: self.size]
+
+
+def add_battle_rows(
+    dataset: DatasetBuffer,
+    battle: dict,
+    pokedex,
+    coverage_analyzer,
+    meta_analyzer,
+    cache: TeamFeatureCache = None,
+) -> bool:
+    """
+    Append one battle's two labeled team rows (p1 first, then p2).
+
+    Label: winner = 1, loser = 0. Battles where either team can't be
+    featurized are skipped.
+
+    Returns:
+        True if the battle was added
+    """
+    p1_features = extract_features(battle['p1_team'], pokedex, coverage_analyzer, meta_analyzer, cache)
+    p2_features = extract_features(battle['p2_team'], pokedex, coverage_analyzer, meta_analyzer, cache)
+
+    if p1_features is None or p2_features is None:
+        return False
+
+    p1_won = battle['winner'] == 'p1'
+    dataset.append(p1_features, 1 if p1_won else 0)
+    dataset.append(p2_features, 0 if p1_won else 1)
+    return True
+
+
+def extract_battles(
+    battles: Iterable[dict],
+    pokedex,
+    coverage_analyzer,
+    meta_analyzer,
+    cache: TeamFeatureCache = None,
+    dataset: DatasetBuffer = None,
+) -> DatasetBuffer:
+    """Featurize battles into a DatasetBuffer (a new one unless given)."""
+    if dataset is None:
+        dataset = DatasetBuffer()
+    for battle in battles:
+        add_battle_rows(dataset, battle, pokedex, coverage_analyzer, meta_analyzer, cache)
+    return dataset
+
+
+@dataclass
+class ExtractedChunk:
+    """Features for a chunk of battles, in input order."""
+
+    battle_ids: list[str]
+    X: np.ndarray
+    y: np.ndarray
+    row_counts: np.ndarray  # Rows per battle: 2, or 0 if it was skipped
+
+
+def extract_chunk(
+    battles: List[dict],
+    pokedex,
+    coverage_analyzer,
+    meta_analyzer,
+    cache: TeamFeatureCache = None,
+    matchup_table: MatchupTable = None,
+) -> ExtractedChunk:
+    """
+    Featurize a chunk of battles, recording which ones produced rows.
+
+    With a matchup_table, the battle-level matchup features of each row's
+    team against its opponent are appended as extra columns (see
+    dataset_feature_names). They are computed for the whole chunk at once.
+    """
+    dataset = DatasetBuffer(capacity=2 * len(battles))
+    row_counts = np.zeros(len(battles), dtype=np.uint8)
+    for i, battle in enumerate(battles):
+        if add_battle_rows(dataset, battle, pokedex, coverage_analyzer, meta_analyzer, cache):
+            row_counts[i] = 2
+
+    X = dataset.X
+    if matchup_table is not None:
+        added = [battle for battle, count in zip(battles, row_counts) if count]
+        p1_features, p2_features = matchup_table.battle_features(
+            pokedex.encode_teams([battle['p1_team'] for battle in added]),
+            pokedex.encode_teams([battle['p2_team'] for battle in added]),
+        )
+        matchup = np.empty((len(X), len(MATCHUP_FEATURE_NAMES)), dtype=np.float32)
+        matchup[0::2] = p1_features
+        matchup[1::2] = p2_features
+        X = np.hstack([X, matchup])
+
+    return ExtractedChunk(
+        battle_ids=[battle_key(battle) for battle in battles],
+        X=X,
+        y=dataset.y,
+        row_counts=row_counts,
+    )
+
+
+# Per-process extraction state for pool workers
+_worker_state = None
+
+
+def _init_worker(snapshot_path, cache_size, json_backend, matchup):
+    global _worker_state
+    snapshot = load_snapshot(snapshot_path)
+    pokedex = snapshot.pokedex
+    coverage_analyzer = CoverageAnalyzer(snapshot.type_chart, pokedex)
+    meta_analyzer = MetaAnalyzer(snapshot.type_chart, pokedex, snapshot.usage_stats)
+    cache = TeamFeatureCache(cache_size) if cache_size > 0 else None
+    matchup_table = MatchupTable(meta_analyzer) if matchup else None
+    _worker_state = (pokedex, coverage_analyzer, meta_analyzer, cache, matchup_table, json_backend)
+
+
+def _extract_chunk(lines: List[bytes]) -> ExtractedChunk:
+    pokedex, coverage_analyzer, meta_analyzer, cache, matchup_table, json_backend = _worker_state
+    return extract_chunk(
+        decode_battles(lines, json_backend), pokedex, coverage_analyzer, meta_analyzer, cache, matchup_table
+    )
+
+
+def iter_extract_parallel(
+    line_chunks: Iterable[List[bytes]],
+    workers: int,
+    snapshot_path: Path = None,
+    cache_size: int = 65536,
+    json_backend: str = "auto",
+    matchup: bool = False,
+) -> Iterator[ExtractedChunk]:
+    """
+    Featurize raw JSONL chunks (from iter_line_chunks) in worker processes.
+
+    Each worker loads the snapshot and builds its analyzers and feature cache
+    once, then decodes and featurizes whole chunks. Results are yielded in
+    input order, so consumers see exactly what a serial run would produce.
+    At most 2 * workers chunks are in flight at a time.
+
+    Args:
+        line_chunks: Lists of raw JSONL lines
+        workers: Worker processes
+        snapshot_path: Data snapshot to load (default: data/cache/snapshot.bin)
+        cache_size: Max teams kept in each worker's feature cache (0 disables it)
+        json_backend: "auto", "orjson" or "json"
+        matchup: Append the matchup feature columns
+    """
+    context = multiprocessing.get_context()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(snapshot_path, cache_size, json_backend, matchup),
+    ) as executor:
+        pending = deque()
+        for lines in line_chunks:
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+            pending.append(executor.submit(_extract_chunk, lines))
+        while pending:
+            yield pending.popleft().result()
+
+
+def extract_battles_parallel(
+    line_chunks: Iterable[List[bytes]],
+    workers: int,
+    snapshot_path: Path = None,
+    cache_size: int = 65536,
+    json_backend: str = "auto",
+    dataset: DatasetBuffer = None,
+    progress: Callable[[int], None] = None,
+) -> DatasetBuffer:
+    """
+    Featurize raw JSONL chunks in worker processes into a DatasetBuffer.
+
+    See iter_extract_parallel; the dataset is identical to a serial run.
+
+    Args:
+        dataset: Buffer to append to (a new one unless given)
+        progress: Called with the number of battles in each finished chunk
+
+    Returns:
+        The dataset
+    """
+    if dataset is None:
+        dataset = DatasetBuffer()
+
+    for chunk in iter_extract_parallel(line_chunks, workers, snapshot_path, cache_size, json_backend):
+        dataset.extend(chunk.X, chunk.y)
+        if progress is not None:
+            progress(len(chunk.battle_ids))
+
+    return dataset
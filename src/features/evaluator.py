@@ -0,0 +1,146 @@
+"""Incremental team evaluation for single-member add/remove/swap moves."""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.features.coverage import CoverageAnalyzer
+from src.features.meta import MetaAnalyzer
+from src.features.roles import ROLE_BITS, ROLES, RoleDetector
+
+
+@dataclass
+class TeamScores:
+    """Scores for one team, as returned by the individual analyzers."""
+
+    type_score: float  # CoverageAnalyzer.type_coverage_score
+    meta_score: float  # MetaAnalyzer.meta_coverage_score
+    role_score: float  # RoleDetector.role_diversity_score
+
+
+class TeamEvaluator:
+    """
+    Stateful team scorer with O(18 + k) member updates.
+
+    Keeps per-type STAB coverage, weakness and resistance counters, per-threat
+    check counts for the top-k threats and per-role counts for the current
+    team. Adding, removing or swapping one member adjusts the counters by that
+    species' precomputed rows instead of rescoring the team, so local search
+    over teams only pays for the member that changed. Scores are identical to
+    the analyzers' own methods.
+    """
+
+    def __init__(
+        self,
+        coverage_analyzer: CoverageAnalyzer,
+        meta_analyzer: MetaAnalyzer,
+        team_ids=(),
+        top_k: int = 15,
+        offensive_weight: float = 0.6,
+        defensive_weight: float = 0.4,
+    ):
+        if coverage_analyzer.pokedex is not meta_analyzer.pokedex:
+            raise ValueError("Coverage and meta analyzers must share the same pokedex")
+
+        self.pokedex = meta_analyzer.pokedex
+        self.offensive_weight = offensive_weight
+        self.defensive_weight = defensive_weight
+
+        defense, offense = coverage_analyzer.species_tables()
+        self._offense_rows = offense.astype(np.int64)
+        self._weak_rows = (defense > 1.0).astype(np.int64)
+        self._resist_rows = (defense < 1.0).astype(np.int64)
+        self.n_types = defense.shape[1]
+
+        _, threat_ids, weights, total_weight = meta_analyzer.top_threats(top_k)
+        self._check_rows = meta_analyzer.check_matrix[:, threat_ids].astype(np.int64)
+        self._threat_weights = weights
+        self._total_weight = total_weight
+
+        masks = RoleDetector.species_role_masks(self.pokedex)
+        self._role_rows = np.stack(
+            [(masks & ROLE_BITS[role]) != 0 for role in ROLES], axis=1
+        ).astype(np.int64)
+
+        self.members: list[int] = []
+        self.offense_counts = np.zeros(self.n_types, dtype=np.int64)
+        self.weak_counts = np.zeros(self.n_types, dtype=np.int64)
+        self.resist_counts = np.zeros(self.n_types, dtype=np.int64)
+        self.check_counts = np.zeros(len(threat_ids), dtype=np.int64)
+        self.role_counts = np.zeros(len(ROLES), dtype=np.int64)
+
+        for species_id in team_ids:
+            self.add(int(species_id))
+
+    def _apply(self, species_id: int, sign: int):
+        self.offense_counts += sign * self._offense_rows[species_id]
+        self.weak_counts += sign * self._weak_rows[species_id]
+        self.resist_counts += sign * self._resist_rows[species_id]
+        self.check_counts += sign * self._check_rows[species_id]
+        self.role_counts += sign * self._role_rows[species_id]
+
+    def add(self, species_id: int):
+        """Add a member to the team."""
+        self.members.append(species_id)
+        self._apply(species_id, 1)
+
+    def remove(self, slot: int) -> int:
+        """Remove the member in a team slot and return its species id."""
+        species_id = self.members.pop(slot)
+        self._apply(species_id, -1)
+        return species_id
+
+    def swap(self, slot: int, species_id: int) -> int:
+        """Replace the member in a team slot and return the old species id."""
+        old_id = self.members[slot]
+        self._apply(old_id, -1)
+        self.members[slot] = species_id
+        self._apply(species_id, 1)
+        return old_id
+
+    def evaluate_swap(self, slot: int, species_id: int) -> TeamScores:
+        """Score the team with one slot swapped, leaving the team unchanged."""
+        old_id = self.swap(slot, species_id)
+        try:
+            return self.scores()
+        finally:
+            self.swap(slot, old_id)
+
+    def type_score(self) -> float:
+        """Same value as CoverageAnalyzer.type_coverage_score for the current team."""
+        offensive = int(np.count_nonzero(self.offense_counts)) / 18.0
+
+        penalty = int(np.count_nonzero((self.weak_counts >= 2) & (self.resist_counts == 0)))
+        defensive = 1.0 - (penalty / 18.0)
+
+        return self.offensive_weight * offensive + self.defensive_weight * defensive
+
+    def meta_score(self) -> float:
+        """Same value as MetaAnalyzer.meta_coverage_score for the current team."""
+        if self._total_weight <= 0:
+            return 0.0
+
+        total_weighted = 0.0
+        for weight, check_count in zip(self._threat_weights, self.check_counts.tolist()):
+            total_weighted += weight * (1.0 if check_count > 0 else 0.0)
+
+        return total_weighted / self._total_weight
+
+    def role_score(self) -> float:
+        """Same value as RoleDetector.role_diversity_score for the current team."""
+        role_count = int(np.count_nonzero(self.role_counts))
+        base_score = role_count / 4.0
+
+        # Bonus for complete coverage
+        if role_count == 4:
+            return min(1.0, base_score + 0.1)
+
+        return base_score
+
+    def scores(self) -> TeamScores:
+        """Score the current team."""
+        return TeamScores(
+            type_score=self.type_score(),
+            meta_score=self.meta_score(),
+            role_score=self.role_score(),
+        )
@@ -0,0 +1,234 @@
+"""
+Opt-in timing instrumentation for the training pipeline.
+
+Stages are timed with the stage() context manager. Hot-path functions
+(the analyzers' per-team scores, role detection, extract_features) are
+timed by wrapping them in place while instrumentation is enabled, and
+restored afterwards. A disabled Instrumentation wraps nothing, and its
+stage() returns a shared no-op context, so the hot paths run unmodified.
+
+Only the current process is measured; with worker processes the per-call
+timings cover in-process work only, while stage timings still apply.
+"""
+
+import array
+import cProfile
+import contextlib
+import functools
+import io
+import json
+import pstats
+import random
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.features import dataset as dataset_module
+from src.features.coverage import CoverageAnalyzer
+from src.features.meta import MetaAnalyzer
+from src.features.roles import RoleDetector
+
+# Per-call latencies kept for percentiles; beyond this a uniform reservoir
+# sample is kept, while count/total/max stay exact
+MAX_SAMPLES = 100000
+
+# (owner, attribute, timer name) of the hot-path functions wrapped by enable()
+HOT_PATHS = (
+    (CoverageAnalyzer, "type_coverage_score", "type_coverage_score"),
+    (MetaAnalyzer, "meta_coverage_score", "meta_coverage_score"),
+    (RoleDetector, "team_role_mask", "role_detection"),
+    (dataset_module, "extract_features", "extract_features"),
+)
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+class Timer:
+    """Call count, total, max and a latency sample for percentiles."""
+
+    def __init__(self, rng: random.Random):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = array.array("d")
+        self._rng = rng
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(seconds)
+        else:
+            slot = self._rng.randrange(self.count)
+            if slot < MAX_SAMPLES:
+                self.samples[slot] = seconds
+
+    def summary(self) -> dict:
+        samples = np.frombuffer(self.samples, dtype=np.float64) if self.samples else np.zeros(1)
+        p50, p90, p99 = np.percentile(samples, [50, 90, 99])
+        return {
+            "calls": self.count,
+            "total_s": self.total,
+            "mean_s": self.total / self.count if self.count else 0.0,
+            "p50_s": float(p50),
+            "p90_s": float(p90),
+            "p99_s": float(p99),
+            "max_s": self.max,
+        }
+
+
+class Instrumentation:
+    """
+    Collects stage and hot-path timings, counters and cache statistics.
+
+    Usage:
+        instrumentation = Instrumentation(enabled=True, profile_path=Path("train.pstats"))
+        with instrumentation:
+            with instrumentation.stage("fit"):
+                model.fit(X, y)
+        instrumentation.write_json(Path("timings.json"))
+    """
+
+    def __init__(self, enabled: bool = False, profile_path: Path = None, seed: int = 0):
+        """
+        Args:
+            enabled: Record anything at all
+            profile_path: If set (and enabled), run cProfile and dump pstats here
+            seed: Seed for the latency reservoir sample
+        """
+        self.enabled = enabled
+        self.profile_path = Path(profile_path) if profile_path else None
+        self.timers: dict[str, Timer] = {}
+        self.counters: dict[str, int] = {}
+        self.caches = {}
+        self._rng = random.Random(seed)
+        self._originals = []
+        self._profiler = None
+        self._started = None
+        self._elapsed = 0.0
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.disable()
+
+    def enable(self):
+        """Wrap the hot paths and start the profiler, if enabled."""
+        if not self.enabled or self._started is not None:
+            return
+        for owner, attribute, name in HOT_PATHS:
+            original = owner.__dict__[attribute]
+            function = original.__func__ if isinstance(original, staticmethod) else original
+            wrapper = self._timed(function, name)
+            setattr(owner, attribute, staticmethod(wrapper) if isinstance(original, staticmethod) else wrapper)
+            self._originals.append((owner, attribute, original))
+        if self.profile_path is not None:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._started = time.perf_counter()
+
+    def disable(self):
+        """Restore the hot paths and dump the profile."""
+        if self._started is None:
+            return
+        self._elapsed += time.perf_counter() - self._started
+        self._started = None
+        for owner, attribute, original in reversed(self._originals):
+            setattr(owner, attribute, original)
+        self._originals = []
+        if self._profiler is not None:
+            self._profiler.disable()
+            self.profile_path.parent.mkdir(parents=True, exist_ok=True)
+            self._profiler.dump_stats(self.profile_path)
+            self._profiler = None
+
+    def _timed(self, function, name: str):
+        timer = self._timer(name)
+        perf_counter = time.perf_counter
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                timer.add(perf_counter() - started)
+
+        return wrapper
+
+    def _timer(self, name: str) -> Timer:
+        if name not in self.timers:
+            self.timers[name] = Timer(self._rng)
+        return self.timers[name]
+
+    @contextlib.contextmanager
+    def _stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._timer(name).add(time.perf_counter() - started)
+
+    def stage(self, name: str):
+        """Context manager timing one pipeline stage (a no-op when disabled)."""
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return self._stage(name)
+
+    def count(self, name: str, n: int = 1):
+        """Add to a named counter."""
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_cache(self, name: str, cache):
+        """Report a cache's stats() (e.g. a TeamFeatureCache) in the summary."""
+        if self.enabled and cache is not None:
+            self.caches[name] = cache
+
+    def summary(self) -> dict:
+        """Timings, counters and cache hit rates as a JSON-ready dict."""
+        elapsed = self._elapsed
+        if self._started is not None:
+            elapsed += time.perf_counter() - self._started
+        caches = {}
+        for name, cache in self.caches.items():
+            stats = cache.stats()
+            caches[name] = {**vars(stats), "hit_rate": stats.hit_rate}
+        return {
+            "elapsed_s": elapsed,
+            "timers": {name: timer.summary() for name, timer in self.timers.items()},
+            "counters": dict(self.counters),
+            "caches": caches,
+            "profile": str(self.profile_path) if self.profile_path else None,
+        }
+
+    def write_json(self, path: Path):
+        """Write summary() as JSON."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.summary(), indent=2))
+
+    def report(self, top: int = 15) -> str:
+        """Human-readable table of the timers, plus the top profile entries."""
+        lines = [f"{'Timer':<22} {'Calls':>9} {'Total (s)':>10} {'p50 (ms)':>9} {'p99 (ms)':>9}", "-" * 63]
+        for name, timer in sorted(self.timers.items(), key=lambda item: item[1].total, reverse=True):
+            stats = timer.summary()
+            lines.append(
+                f"{name:<22} {stats['calls']:>9} {stats['total_s']:>10.3f} "
+                f"{stats['p50_s'] * 1000:>9.3f} {stats['p99_s'] * 1000:>9.3f}"
+            )
+        for name, cache in self.caches.items():
+            stats = cache.stats()
+            lines.append(f"cache {name}: {stats.hits} hits, {stats.misses} misses ({stats.hit_rate:.1%} hit rate)")
+        for name, value in self.counters.items():
+            lines.append(f"{name}: {value}")
+        if self.profile_path is not None and self.profile_path.exists():
+            stream = io.StringIO()
+            pstats.Stats(str(self.profile_path), stream=stream).sort_stats("cumulative").print_stats(top)
+            lines.append(stream.getvalue())
+        return "\n".join(lines)
@@ -0,0 +1,86 @@
+"""Cross-team (p1 vs p2) matchup features for the win-prediction model."""
+
+import numpy as np
+
+from src.data.pokedex import SPEED_COLUMN, Pokemon
+from src.features.meta import MetaAnalyzer
+
+# Column order of MatchupTable.battle_features, from one side's point of view
+MATCHUP_FEATURE_NAMES = [
+    'opp_checked',      # Opponent members checked by at least one of ours (0-6)
+    'checked_by_opp',   # Our members checked by at least one of theirs (0-6)
+    'outspeed_share',   # Share of the 36 member pairs where ours is faster
+    'speed_overlap',    # Share of member pairs within SPEED_TIER_MARGIN base speed
+]
+
+# Base speeds this close are treated as the same speed tier
+SPEED_TIER_MARGIN = 10
+
+
+class MatchupTable:
+    """
+    Species × species tables for features between two teams.
+
+    The check relation is MetaAnalyzer.check_matrix (the has_check
+    heuristic), and speed comparisons are precomputed once per dex, so a
+    batch of battles is scored with one gather over its (member, opponent)
+    pairs and a few reductions instead of per-pair Python comparisons.
+    """
+
+    def __init__(self, meta_analyzer: MetaAnalyzer, speed_tier_margin: int = SPEED_TIER_MARGIN):
+        self.meta_analyzer = meta_analyzer
+        self.speed_tier_margin = speed_tier_margin
+        self._speed_key = None
+
+    @property
+    def pokedex(self):
+        return self.meta_analyzer.pokedex
+
+    def _speed_tables(self) -> tuple[np.ndarray, np.ndarray]:
+        """(N, N) bool tables: faster[a, b] and same_tier[a, b]."""
+        key = (id(self.pokedex), self.pokedex.source_hash)
+        if self._speed_key != key:
+            speed = self.pokedex.stats[:, SPEED_COLUMN].astype(np.int64)
+            diff = speed[:, None] - speed[None, :]
+            self._faster = diff > 0
+            self._same_tier = np.abs(diff) <= self.speed_tier_margin
+            self._speed_key = key
+        return self._faster, self._same_tier
+
+    def battle_features(self, p1_ids: np.ndarray, p2_ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Matchup features for a batch of battles.
+
+        Args:
+            p1_ids: (B, team_size) species ids of the p1 teams (valid rows only)
+            p2_ids: (B, team_size) species ids of the p2 teams
+
+        Returns:
+            (B, len(MATCHUP_FEATURE_NAMES)) float64 arrays from p1's and from p2's side
+        """
+        p1_ids = np.asarray(p1_ids, dtype=np.intp)
+        p2_ids = np.asarray(p2_ids, dtype=np.intp)
+        check = self.meta_analyzer.check_matrix
+        faster, same_tier = self._speed_tables()
+
+        # (B, i, j) over p1 member i and p2 member j
+        rows = p1_ids[:, :, None]
+        cols = p2_ids[:, None, :]
+        p1_checks = check[rows, cols]
+        p2_checks = check[cols, rows]  # p2 member j checks p1 member i
+        p1_faster = faster[rows, cols]
+        p2_faster = faster[cols, rows]
+        overlap = same_tier[rows, cols].mean(axis=(1, 2))
+
+        p1_checked = p1_checks.any(axis=1).sum(axis=1).astype(np.float64)  # p2 members checked by p1
+        p2_checked = p2_checks.any(axis=2).sum(axis=1).astype(np.float64)  # p1 members checked by p2
+
+        p1_features = np.column_stack([p1_checked, p2_checked, p1_faster.mean(axis=(1, 2)), overlap])
+        p2_features = np.column_stack([p2_checked, p1_checked, p2_faster.mean(axis=(1, 2)), overlap])
+        return p1_features, p2_features
+
+    def matchup_features(self, team: list[Pokemon], opponent: list[Pokemon]) -> np.ndarray:
+        """Matchup features of one team against one opponent, from team's side."""
+        team_ids = np.array([[mon.id for mon in team]], dtype=np.intp)
+        opponent_ids = np.array([[mon.id for mon in opponent]], dtype=np.intp)
+        return self.battle_features(team_ids, opponent_ids)[0][0]
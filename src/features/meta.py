@@ -1,18 +1,108 @@
 """Meta matchup analysis against top threats."""
 
+import numpy as np
 
-from src.data.pokedex import Pokedex, Pokemon
+from src.data.pokedex import SPEED_COLUMN, Pokedex, Pokemon
 from src.data.types import TypeChart
 from src.data.usage import UsageStats
+from src.features.cache import TeamFeatureCache, data_version, team_signature
 
 
 class MetaAnalyzer:
-    """Analyze team matchups against meta threats."""
-
-    def __init__(self, type_chart: TypeChart, pokedex: Pokedex, usage_stats: UsageStats):
+    """
+    Analyze team matchups against meta threats.
+
+    The has_check heuristic is precomputed once over the whole dex as a
+    species × species boolean matrix (check_matrix[a, b] is True if species a
+    checks species b), so team queries are array lookups. The matrix and the
+    cached threat lists are rebuilt automatically when the dex, type chart or
+    usage stats change.
+    """
+
+    def __init__(
+        self,
+        type_chart: TypeChart,
+        pokedex: Pokedex,
+        usage_stats: UsageStats,
+        cache: TeamFeatureCache = None,
+    ):
         self.type_chart = type_chart
         self.pokedex = pokedex
         self.usage_stats = usage_stats
+        self.cache = cache
+        self._matrix_key = None
+        self._threats_key = None
+        self._threats = {}
+
+    @property
+    def check_matrix(self) -> np.ndarray:
+        """(N, N) bool matrix: check_matrix[a, b] is True if species a checks species b."""
+        key = (id(self.pokedex), self.pokedex.source_hash, id(self.type_chart), self.type_chart.source_hash)
+        if self._matrix_key != key:
+            self._check_matrix = self._build_check_matrix()
+            self._matrix_key = key
+        return self._check_matrix
+
+    def _build_check_matrix(self) -> np.ndarray:
+        """Evaluate the has_check heuristic for every (member, threat) species pair."""
+        chart = self.type_chart
+        dex = self.pokedex
+
+        combo_rows = np.array([chart.combo_id(combo) for combo in dex.type_combos], dtype=np.intp)
+        # defense[s, t]: multiplier of attacking type t against species s
+        defense = chart.combo_defense[combo_rows[dex.type_combo_ids]]
+
+        # has_type[s, t]: species s has type t
+        combo_types = np.zeros((len(dex.type_combos), len(chart.types)), dtype=np.int64)
+        for combo_id, combo in enumerate(dex.type_combos):
+            for type_name in combo:
+                combo_types[combo_id, chart.type_id(type_name)] = 1
+        has_type = combo_types[dex.type_combo_ids]
+
+        # Member a resists threat b if every type of b is < 1.0 against a
+        not_resisted = (defense >= 1.0).astype(np.int64)
+        resists = (not_resisted @ has_type.T) == 0
+
+        # Member a hits threat b super-effectively if any type of a is > 1.0 against b
+        super_effective = (has_type @ (defense > 1.0).astype(np.int64).T) > 0
+
+        speed = dex.stats[:, SPEED_COLUMN].astype(np.int64)
+        faster = speed[:, None] > speed[None, :]
+
+        return resists | (super_effective & faster)
+
+    def _team_ids(self, team: list[Pokemon]) -> np.ndarray | None:
+        """Species ids for a team, or None if any member is from another dex."""
+        if any(mon.dex is not self.pokedex for mon in team):
+            return None
+        return np.fromiter((mon.id for mon in team), dtype=np.intp, count=len(team))
+
+    def top_threats(self, top_k: int) -> tuple[list[str], np.ndarray, list[float], float]:
+        """
+        Top-K threats that exist in the dex, cached per usage/dex version.
+
+        Returns:
+            names, species ids, usage weights and the total weight
+        """
+        key = (id(self.usage_stats), self.usage_stats.source_hash, id(self.pokedex), self.pokedex.source_hash)
+        if self._threats_key != key:
+            self._threats = {}
+            self._threats_key = key
+
+        if top_k not in self._threats:
+            names, ids, weights = [], [], []
+            total_weight = 0.0
+            for entry in self.usage_stats.get_top_k(k=top_k):
+                species_id = self.pokedex.id_of(entry.name)
+                if species_id < 0:
+                    continue  # Skip if not in Pokédex
+                names.append(entry.name)
+                ids.append(species_id)
+                weights.append(entry.usage_pct)
+                total_weight += entry.usage_pct
+            self._threats[top_k] = (names, np.array(ids, dtype=np.intp), weights, total_weight)
+
+        return self._threats[top_k]
 
     def has_check(self, team: list[Pokemon], threat: Pokemon) -> bool:
         """
@@ -22,6 +112,10 @@ class MetaAnalyzer:
         - Type advantage (resists threat's types OR super-effective against threat)
         - Speed advantage (faster than threat)
         """
+        team_ids = self._team_ids(team)
+        if team_ids is not None and threat.dex is self.pokedex:
+            return bool(self.check_matrix[team_ids, threat.id].any())
+
         for mon in team:
             # Check type advantage
             # Can mon resist threat's attacks?
@@ -60,6 +154,16 @@ class MetaAnalyzer:
         if not top_threats:
             return 0.0
 
+        team_ids = self._team_ids(team)
+        if team_ids is not None and self.cache is not None:
+            return self.cache.get_or_compute(
+                ("meta_coverage", top_k, team_signature(team)),
+                data_version(self.pokedex, self.type_chart, self.usage_stats),
+                lambda: self._meta_coverage_score(team_ids, top_k),
+            )
+        if team_ids is not None:
+            return self._meta_coverage_score(team_ids, top_k)
+
         total_weighted = 0.0
         total_weight = 0.0
 
@@ -76,8 +180,50 @@ class MetaAnalyzer:
 
         return total_weighted / total_weight if total_weight > 0 else 0.0
 
+    def _meta_coverage_score(self, team_ids: np.ndarray, top_k: int) -> float:
+        _, threat_ids, weights, total_weight = self.top_threats(top_k)
+        checked = self.check_matrix[np.ix_(team_ids, threat_ids)].any(axis=0).tolist()
+
+        total_weighted = 0.0
+        for weight, has_check in zip(weights, checked):
+            total_weighted += weight * (1.0 if has_check else 0.0)
+
+        return total_weighted / total_weight if total_weight > 0 else 0.0
+
+    def meta_coverage_scores(self, team_ids: np.ndarray, top_k: int = 15) -> np.ndarray:
+        """
+        Batch meta_coverage_score for an (N, team_size) species id matrix.
+
+        An any-reduce over the check matrix followed by a usage-weighted sum.
+        Weights are accumulated threat by threat in the same order as the
+        scalar method, so results are identical to it. Rows with an unknown
+        species (-1, see Pokedex.encode_teams) are NaN.
+        """
+        team_ids = np.asarray(team_ids, dtype=np.intp)
+        invalid = (team_ids < 0).any(axis=1)
+        _, threat_ids, weights, total_weight = self.top_threats(top_k)
+        if total_weight <= 0:
+            return np.where(invalid, np.nan, 0.0)
+
+        # (N, k): does any member check threat j
+        checked = self.check_matrix[:, threat_ids][np.where(team_ids < 0, 0, team_ids)].any(axis=1)
+
+        total_weighted = np.zeros(len(team_ids), dtype=np.float64)
+        for j, weight in enumerate(weights):
+            total_weighted += weight * checked[:, j].astype(np.float64)
+
+        scores = total_weighted / total_weight
+        scores[invalid] = np.nan
+        return scores
+
     def get_unchecked_threats(self, team: list[Pokemon], top_k: int = 15) -> list[str]:
         """Get list of meta threats that the team struggles against."""
+        team_ids = self._team_ids(team)
+        if team_ids is not None:
+            names, threat_ids, _, _ = self.top_threats(top_k)
+            checked = self.check_matrix[np.ix_(team_ids, threat_ids)].any(axis=0)
+            return [name for name, has_check in zip(names, checked) if not has_check]
+
         top_threats = self.usage_stats.get_top_k(k=top_k)
         unchecked = []
 
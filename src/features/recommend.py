@@ -0,0 +1,421 @@
+"""Branch-and-bound search for the best trio to complete a partial team."""
+
+import heapq
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from src.data.pokedex import Pokedex
+from src.data.snapshot import load_snapshot
+from src.data.types import TypeChart
+from src.data.usage import UsageStats
+from src.features.coverage import CoverageAnalyzer
+from src.features.evaluator import TeamScores
+from src.features.meta import MetaAnalyzer
+from src.features.roles import ROLE_POPCOUNT, RoleDetector
+from src.features.team_features import extract_features
+from src.models.backends import win_probability
+
+# Weights of the analyzer scores in the default ranking
+DEFAULT_WEIGHTS = {"type_score": 0.3, "meta_score": 0.4, "role_score": 0.3}
+
+# Guards against pruning a branch whose bound only differs by rounding
+BOUND_EPSILON = 1e-12
+
+
+@dataclass
+class TrioRecommendation:
+    """One completed team, ranked by score."""
+
+    trio: tuple[str, str, str]
+    score: float
+    scores: TeamScores
+
+
+@dataclass
+class RecommendationResult:
+    """Ranked completions and search statistics."""
+
+    recommendations: list[TrioRecommendation]
+    complete: bool  # False if the time budget cut the search short
+    evaluated: int  # Full teams scored
+    pruned: int  # Branches cut by the upper bound
+    elapsed: float  # Seconds
+
+
+def _bits(row) -> int:
+    """Pack a boolean row into an int bitset."""
+    mask = 0
+    for i in np.flatnonzero(row):
+        mask |= 1 << int(i)
+    return mask
+
+
+def _popcount(mask: int) -> int:
+    return bin(mask).count("1")
+
+
+class _TrioSearch:
+    """
+    Search state for one core: per-species rows and suffix bounds.
+
+    Candidates are ordered by how much they improve the core on their own,
+    so strong trios are found early (which tightens pruning and gives good
+    anytime answers). For a partial team P and the candidates after position
+    p, each score component is bounded above by assuming every remaining
+    candidate's contribution at once:
+
+    - STAB coverage, threat checks and roles only grow, so their bound is P
+      OR the union of the remaining candidates' bits
+    - a type stays penalized if P is already 2+ weak with no resist and no
+      remaining candidate resists it
+
+    Bounding the total by the bounded components needs non-negative
+    weights, so negative ones are rejected.
+    """
+
+    def __init__(
+        self,
+        pokedex: Pokedex,
+        type_chart: TypeChart,
+        usage_stats: UsageStats,
+        core_ids: list[int],
+        top_k: int,
+        weights: dict,
+    ):
+        negative = sorted(name for name, weight in weights.items() if weight < 0)
+        if negative:
+            raise ValueError(f"Weights must be non-negative: {', '.join(negative)}")
+        coverage_analyzer = CoverageAnalyzer(type_chart, pokedex)
+        meta_analyzer = MetaAnalyzer(type_chart, pokedex, usage_stats)
+
+        defense, offense = coverage_analyzer.species_tables()
+        _, threat_ids, self.threat_weights, self.total_weight = meta_analyzer.top_threats(top_k)
+
+        self.pokedex = pokedex
+        self.weights = weights
+        self.offense = offense
+        self.weak = (defense > 1.0).astype(np.int64)
+        self.resist = (defense < 1.0).astype(np.int64)
+        self.checks = meta_analyzer.check_matrix[:, threat_ids]
+        self.role_masks = RoleDetector.species_role_masks(pokedex).astype(np.int64)
+
+        self.core_ids = list(core_ids)
+        self.core_state = self._state(self.core_ids)
+
+        core = set(self.core_ids)
+        candidates = np.array([s for s in range(len(pokedex)) if s not in core], dtype=np.intp)
+        single_scores = self._score_batch(self.core_state, candidates)[0]
+        self.candidates = candidates[np.argsort(-single_scores, kind="stable")]
+
+        # suffix_*[p]: union over candidates[p:], with an empty union at the end
+        n = len(self.candidates)
+        self.suffix_offense = [0] * (n + 1)
+        self.suffix_resist = [0] * (n + 1)
+        self.suffix_checks = [0] * (n + 1)
+        self.suffix_roles = [0] * (n + 1)
+        for p in range(n - 1, -1, -1):
+            species_id = self.candidates[p]
+            self.suffix_offense[p] = self.suffix_offense[p + 1] | _bits(self.offense[species_id])
+            self.suffix_resist[p] = self.suffix_resist[p + 1] | _bits(self.resist[species_id])
+            self.suffix_checks[p] = self.suffix_checks[p + 1] | _bits(self.checks[species_id])
+            self.suffix_roles[p] = self.suffix_roles[p + 1] | int(self.role_masks[species_id])
+
+    def _state(self, species_ids) -> tuple:
+        species_ids = list(species_ids)
+        return (
+            self.offense[species_ids].any(axis=0),
+            self.weak[species_ids].sum(axis=0),
+            self.resist[species_ids].sum(axis=0),
+            self.checks[species_ids].any(axis=0),
+            int(np.bitwise_or.reduce(self.role_masks[species_ids])) if species_ids else 0,
+        )
+
+    def _add(self, state: tuple, species_id: int) -> tuple:
+        offense, weak, resist, checks, roles = state
+        return (
+            offense | self.offense[species_id],
+            weak + self.weak[species_id],
+            resist + self.resist[species_id],
+            checks | self.checks[species_id],
+            roles | int(self.role_masks[species_id]),
+        )
+
+    def _meta(self, checked) -> float:
+        if self.total_weight <= 0:
+            return 0.0
+        total_weighted = 0.0
+        for weight, has_check in zip(self.threat_weights, checked):
+            total_weighted += weight * (1.0 if has_check else 0.0)
+        return total_weighted / self.total_weight
+
+    @staticmethod
+    def _role_score(role_count):
+        base_score = role_count / 4.0
+        return np.where(role_count == 4, np.minimum(1.0, base_score + 0.1), base_score)
+
+    def _combine(self, type_score, meta_score, role_score):
+        return (
+            self.weights["type_score"] * type_score
+            + self.weights["meta_score"] * meta_score
+            + self.weights["role_score"] * role_score
+        )
+
+    def _score_batch(self, state: tuple, species_ids: np.ndarray) -> tuple:
+        """
+        Exact scores of state + each species, computed like the analyzers.
+
+        Returns:
+            (combined, type_score, meta_score, role_score) arrays
+        """
+        offense, weak, resist, checks, roles = state
+
+        offensive = (offense | self.offense[species_ids]).sum(axis=1) / 18.0
+        weak = weak + self.weak[species_ids]
+        resist = resist + self.resist[species_ids]
+        penalty = ((weak >= 2) & (resist == 0)).sum(axis=1)
+        defensive = 1.0 - (penalty / 18.0)
+        type_score = 0.6 * offensive + 0.4 * defensive
+
+        checked = checks | self.checks[species_ids]
+        meta_score = np.zeros(len(species_ids), dtype=np.float64)
+        if self.total_weight > 0:
+            for j, weight in enumerate(self.threat_weights):
+                meta_score += weight * checked[:, j].astype(np.float64)
+            meta_score /= self.total_weight
+
+        role_masks = roles | self.role_masks[species_ids]
+        role_score = self._role_score(ROLE_POPCOUNT[role_masks])
+
+        return self._combine(type_score, meta_score, role_score), type_score, meta_score, role_score
+
+    def _upper_bound(self, state: tuple, position: int) -> float:
+        """Bound on any completion of state using candidates[position:]."""
+        offense, weak, resist, checks, roles = state
+
+        offensive = _popcount(_bits(offense) | self.suffix_offense[position]) / 18.0
+        penalized = _bits((weak >= 2) & (resist == 0))
+        defensive = 1.0 - (_popcount(penalized & ~self.suffix_resist[position]) / 18.0)
+        type_score = 0.6 * offensive + 0.4 * defensive
+
+        check_bits = _bits(checks) | self.suffix_checks[position]
+        meta_score = self._meta([(check_bits >> j) & 1 for j in range(len(self.threat_weights))])
+
+        role_score = float(self._role_score(_popcount(roles | self.suffix_roles[position])))
+
+        return float(self._combine(type_score, meta_score, role_score))
+
+    def search(self, first_positions, top_m: int, deadline: float = None, shared_threshold=None):
+        """
+        Branch-and-bound over trios whose first member is at one of first_positions.
+
+        Args:
+            first_positions: Candidate positions this shard starts trios from
+            top_m: Number of best trios to keep
+            deadline: time.monotonic() value after which to stop (anytime mode)
+            shared_threshold: multiprocessing.Value holding the best known
+                M-th score across all workers, used to prune harder
+
+        Returns:
+            (best, complete, evaluated, pruned), best being a list of
+            (score, type, meta, role, species ids) tuples
+        """
+        heap = []  # min-heap of (score, trio) holding the local top-M
+        evaluated = 0
+        pruned = 0
+        complete = True
+        n = len(self.candidates)
+
+        def threshold() -> float:
+            local = heap[0][0] if len(heap) >= top_m else -np.inf
+            if shared_threshold is not None:
+                return max(local, shared_threshold.value)
+            return local
+
+        for a in first_positions:
+            if deadline is not None and time.monotonic() > deadline:
+                complete = False
+                break
+
+            state_a = self._add(self.core_state, self.candidates[a])
+            if self._upper_bound(state_a, a + 1) + BOUND_EPSILON <= threshold():
+                pruned += 1
+                continue
+
+            for b in range(a + 1, n - 1):
+                if deadline is not None and time.monotonic() > deadline:
+                    complete = False
+                    break
+
+                state_b = self._add(state_a, self.candidates[b])
+                current = threshold()
+                if self._upper_bound(state_b, b + 1) + BOUND_EPSILON <= current:
+                    pruned += 1
+                    continue
+
+                third = self.candidates[b + 1 :]
+                combined, type_score, meta_score, role_score = self._score_batch(state_b, third)
+                evaluated += len(third)
+
+                for c in np.flatnonzero(combined > current):
+                    item = (
+                        float(combined[c]),
+                        float(type_score[c]),
+                        float(meta_score[c]),
+                        float(role_score[c]),
+                        (int(self.candidates[a]), int(self.candidates[b]), int(third[c])),
+                    )
+                    if len(heap) < top_m:
+                        heapq.heappush(heap, item)
+                    elif item > heap[0]:
+                        heapq.heapreplace(heap, item)
+
+                if shared_threshold is not None and len(heap) >= top_m:
+                    with shared_threshold.get_lock():
+                        if heap[0][0] > shared_threshold.value:
+                            shared_threshold.value = heap[0][0]
+
+            if not complete:
+                break
+
+        return heap, complete, evaluated, pruned
+
+
+# Per-process search state for pool workers
+_worker_search = None
+_worker_threshold = None
+
+
+def _init_worker(snapshot_path, core_ids, top_k, weights, shared_threshold):
+    global _worker_search, _worker_threshold
+    snapshot = load_snapshot(snapshot_path)
+    _worker_search = _TrioSearch(
+        snapshot.pokedex, snapshot.type_chart, snapshot.usage_stats, core_ids, top_k, weights
+    )
+    _worker_threshold = shared_threshold
+
+
+def _search_shard(first_positions, top_m, deadline):
+    return _worker_search.search(first_positions, top_m, deadline, _worker_threshold)
+
+
+def recommend_trios(
+    core: list[str],
+    top_m: int = 10,
+    weights: dict = None,
+    model_path: Path = None,
+    rerank_pool: int = 100,
+    workers: int = 1,
+    time_budget: float = None,
+    top_k: int = 15,
+    snapshot_path: Path = None,
+) -> RecommendationResult:
+    """
+    Find the best trios to complete a 3-Pokémon core.
+
+    Trios are ranked by a weighted sum of the type coverage, meta coverage
+    and role diversity scores. If a model is given, the best rerank_pool
+    trios by weighted score are re-ranked by the model's win prediction.
+
+    Args:
+        core: Names of the 3 Pokémon already on the team
+        top_m: Number of completions to return
+        weights: Non-negative weights for "type_score", "meta_score", "role_score"
+        model_path: Optional saved model (e.g. models/real_data_model.pkl)
+        rerank_pool: Weighted-score shortlist size for model re-ranking
+        workers: Worker processes (1 searches in-process)
+        time_budget: Seconds after which the best trios so far are returned
+        top_k: Number of meta threats to score against
+        snapshot_path: Data snapshot to load (default: data/cache/snapshot.bin)
+
+    Returns:
+        RecommendationResult, best first
+    """
+    started = time.monotonic()
+    deadline = started + time_budget if time_budget is not None else None
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+
+    snapshot = load_snapshot(snapshot_path)
+    pokedex = snapshot.pokedex
+    core_ids = [pokedex.id_of(name) for name in core]
+    if len(core) != 3:
+        raise ValueError(f"Expected a core of 3 Pokémon, got {len(core)}")
+    missing = [name for name, species_id in zip(core, core_ids) if species_id < 0]
+    if missing:
+        raise ValueError(f"Not in the Pokédex: {', '.join(missing)}")
+
+    pool_size = max(top_m, rerank_pool) if model_path is not None else top_m
+
+    search = _TrioSearch(
+        pokedex, snapshot.type_chart, snapshot.usage_stats, core_ids, top_k, weights
+    )
+    n_first = max(0, len(search.candidates) - 2)
+    complete_shards = True
+
+    if workers <= 1:
+        shard_results = [search.search(range(n_first), pool_size, deadline)]
+    else:
+        # Interleave first positions so every shard gets a share of the
+        # promising (early) candidates
+        n_shards = workers * 4
+        shards = [list(range(s, n_first, n_shards)) for s in range(n_shards)]
+        context = multiprocessing.get_context()
+        shared_threshold = context.Value("d", -np.inf)
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(snapshot_path, core_ids, top_k, weights, shared_threshold),
+        )
+        try:
+            # Shards check the deadline themselves; the grace second covers
+            # the one running between checks
+            futures = [executor.submit(_search_shard, shard, pool_size, deadline) for shard in shards if shard]
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic()) + 1.0
+            done, not_done = wait(futures, timeout=timeout)
+            shard_results = [future.result() for future in done]
+            complete_shards = len(not_done) == 0
+        finally:
+            # Past the deadline, don't wait for stragglers (they stop at their
+            # next deadline check); queued shards are cancelled either way
+            executor.shutdown(wait=deadline is None, cancel_futures=True)
+
+    best = heapq.nlargest(pool_size, (item for heap, *_ in shard_results for item in heap))
+    complete = complete_shards and all(result[1] for result in shard_results)
+
+    recommendations = [
+        TrioRecommendation(
+            trio=tuple(pokedex.names[species_id] for species_id in trio_ids),
+            score=score,
+            scores=TeamScores(type_score=type_score, meta_score=meta_score, role_score=role_score),
+        )
+        for score, type_score, meta_score, role_score, trio_ids in best
+    ]
+
+    if model_path is not None and recommendations:
+        import joblib
+
+        model = joblib.load(model_path)
+        coverage_analyzer = CoverageAnalyzer(snapshot.type_chart, pokedex)
+        meta_analyzer = MetaAnalyzer(snapshot.type_chart, pokedex, snapshot.usage_stats)
+        X = np.array(
+            [
+                extract_features(list(core) + list(rec.trio), pokedex, coverage_analyzer, meta_analyzer)
+                for rec in recommendations
+            ]
+        )
+        for rec, model_score in zip(recommendations, win_probability(model, X)):
+            rec.score = float(model_score)
+        recommendations.sort(key=lambda rec: rec.score, reverse=True)
+
+    return RecommendationResult(
+        recommendations=recommendations[:top_m],
+        complete=complete,
+        evaluated=sum(result[2] for result in shard_results),
+        pruned=sum(result[3] for result in shard_results),
+        elapsed=time.monotonic() - started,
+    )
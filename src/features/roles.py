@@ -1,66 +1,158 @@
 """Role detection for Pokémon based on learnsets and stats."""
 
+import hashlib
+import json
+import weakref
 
-from src.data.pokedex import Pokemon
+import numpy as np
 
-# Role-defining moves
-HAZARD_MOVES = {"Stealth Rock", "Spikes", "Toxic Spikes"}
-REMOVAL_MOVES = {"Rapid Spin", "Defog"}
-PIVOT_MOVES = {"U-turn", "Volt Switch", "Flip Turn"}
-PRIORITY_MOVES = {
+from src.data.pokedex import SPEED_COLUMN, Pokedex, Pokemon
+
+# Role-defining moves (frozen: change them through RoleDetector.configure,
+# which also invalidates the cached role masks)
+HAZARD_MOVES = frozenset({"Stealth Rock", "Spikes", "Toxic Spikes"})
+REMOVAL_MOVES = frozenset({"Rapid Spin", "Defog"})
+PIVOT_MOVES = frozenset({"U-turn", "Volt Switch", "Flip Turn"})
+PRIORITY_MOVES = frozenset({
     "Extreme Speed",
     "Aqua Jet",
     "Mach Punch",
     "Sucker Punch",
     "Ice Shard",
     "Thunderclap",
-}
+})
 
 # Speed tiers
 FAST_SPEED_THRESHOLD = 100  # Base speed >= 100 is considered "fast"
 
+# Roles are stored as bitmasks: bit i is set if the Pokémon fills ROLES[i]
+ROLES = ("hazard_setter", "hazard_removal", "pivot", "speed_control")
+ROLE_BITS = {role: 1 << i for i, role in enumerate(ROLES)}
+ALL_ROLES_MASK = (1 << len(ROLES)) - 1
+
+# Number of set bits for every possible role mask
+ROLE_POPCOUNT = np.array([bin(mask).count("1") for mask in range(1 << len(ROLES))], dtype=np.int64)
+
+# Bumped by RoleDetector.configure so cached masks are recomputed
+_config_version = 0
+
+# Per-dex species role masks: dex -> (cache key, (N,) uint8 masks)
+_mask_cache: "weakref.WeakKeyDictionary[Pokedex, tuple]" = weakref.WeakKeyDictionary()
+
 
 class RoleDetector:
-    """Detect competitive roles for Pokémon."""
+    """
+    Detect competitive roles for Pokémon.
+
+    Roles are computed once per species as a small bitmask (see ROLES) the
+    first time a dex is queried, and team queries OR the member masks. Change
+    the role-move tables through configure() so the cached masks are rebuilt.
+    """
 
     @staticmethod
-    def detect_roles(pokemon: Pokemon) -> set[str]:
+    def configure(
+        hazard_moves: set[str] = None,
+        removal_moves: set[str] = None,
+        pivot_moves: set[str] = None,
+        priority_moves: set[str] = None,
+        fast_speed_threshold: int = None,
+    ):
+        """Replace any of the role-move tables or the speed threshold."""
+        global HAZARD_MOVES, REMOVAL_MOVES, PIVOT_MOVES, PRIORITY_MOVES, FAST_SPEED_THRESHOLD, _config_version
+
+        if hazard_moves is not None:
+            HAZARD_MOVES = frozenset(hazard_moves)
+        if removal_moves is not None:
+            REMOVAL_MOVES = frozenset(removal_moves)
+        if pivot_moves is not None:
+            PIVOT_MOVES = frozenset(pivot_moves)
+        if priority_moves is not None:
+            PRIORITY_MOVES = frozenset(priority_moves)
+
+        if fast_speed_threshold is not None:
+            FAST_SPEED_THRESHOLD = fast_speed_threshold
+
+        _config_version += 1
+
+    @staticmethod
+    def config_version() -> int:
+        """Counter bumped by every configure() call, for versioning cached role-derived values."""
+        return _config_version
+
+    @staticmethod
+    def config_hash() -> str:
+        """Hash of the current role-move tables and speed threshold, for versioning values kept on disk."""
+        config = {
+            "hazard_moves": sorted(HAZARD_MOVES),
+            "removal_moves": sorted(REMOVAL_MOVES),
+            "pivot_moves": sorted(PIVOT_MOVES),
+            "priority_moves": sorted(PRIORITY_MOVES),
+            "fast_speed_threshold": FAST_SPEED_THRESHOLD,
+        }
+        return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()
+
+    @staticmethod
+    def species_role_masks(pokedex: Pokedex) -> np.ndarray:
         """
-        Detect all roles a Pokémon can fill.
+        Get role bitmasks for every species in a dex.
 
         Returns:
-            Set of role names: "hazard_setter", "hazard_removal", "pivot", "speed_control"
+            (N,) uint8 array indexed by species id
         """
-        roles = set()
+        key = (pokedex.source_hash, _config_version)
+        cached = _mask_cache.get(pokedex)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        masks = np.zeros(len(pokedex), dtype=np.uint8)
+        for role, moves in (
+            ("hazard_setter", HAZARD_MOVES),
+            ("hazard_removal", REMOVAL_MOVES),
+            ("pivot", PIVOT_MOVES),
+            ("speed_control", PRIORITY_MOVES),
+        ):
+            for move in moves:
+                masks[pokedex.species_with_move(move)] |= ROLE_BITS[role]
 
-        # Check for hazard setter
-        if any(move in pokemon.learnset for move in HAZARD_MOVES):
-            roles.add("hazard_setter")
+        # Fast Pokémon fill speed control even without priority
+        fast = pokedex.stats[:, SPEED_COLUMN] >= FAST_SPEED_THRESHOLD
+        masks[fast] |= ROLE_BITS["speed_control"]
 
-        # Check for hazard removal
-        if any(move in pokemon.learnset for move in REMOVAL_MOVES):
-            roles.add("hazard_removal")
+        _mask_cache[pokedex] = (key, masks)
+        return masks
 
-        # Check for pivot
-        if any(move in pokemon.learnset for move in PIVOT_MOVES):
-            roles.add("pivot")
+    @staticmethod
+    def role_mask(pokemon: Pokemon) -> int:
+        """Get the role bitmask of a single Pokémon."""
+        return int(RoleDetector.species_role_masks(pokemon.dex)[pokemon.id])
 
-        # Check for speed control
-        # Fast Pokémon OR priority users
-        if pokemon.speed >= FAST_SPEED_THRESHOLD or any(
-            move in pokemon.learnset for move in PRIORITY_MOVES
-        ):
-            roles.add("speed_control")
+    @staticmethod
+    def roles_from_mask(mask: int) -> set[str]:
+        """Expand a role bitmask into role names."""
+        return {role for role in ROLES if mask & ROLE_BITS[role]}
 
-        return roles
+    @staticmethod
+    def detect_roles(pokemon: Pokemon) -> set[str]:
+        """
+        Detect all roles a Pokémon can fill.
+
+        Returns:
+            Set of role names: "hazard_setter", "hazard_removal", "pivot", "speed_control"
+        """
+        return RoleDetector.roles_from_mask(RoleDetector.role_mask(pokemon))
+
+    @staticmethod
+    def team_role_mask(team: list[Pokemon]) -> int:
+        """Get the OR of all members' role bitmasks."""
+        mask = 0
+        for mon in team:
+            mask |= RoleDetector.role_mask(mon)
+        return mask
 
     @staticmethod
     def team_role_coverage(team: list[Pokemon]) -> set[str]:
         """Get all roles covered by a team."""
-        all_roles = set()
-        for mon in team:
-            all_roles.update(RoleDetector.detect_roles(mon))
-        return all_roles
+        return RoleDetector.roles_from_mask(RoleDetector.team_role_mask(team))
 
     @staticmethod
     def role_diversity_score(team: list[Pokemon]) -> float:
@@ -71,15 +163,46 @@ class RoleDetector:
         Score = (number of roles present) / 4
         Bonus: +0.1 if all 4 roles covered
         """
-        roles = RoleDetector.team_role_coverage(team)
-        base_score = len(roles) / 4.0
+        role_count = int(ROLE_POPCOUNT[RoleDetector.team_role_mask(team)])
+        base_score = role_count / 4.0
 
         # Bonus for complete coverage
-        if len(roles) == 4:
+        if role_count == 4:
             return min(1.0, base_score + 0.1)
 
         return base_score
 
+    @staticmethod
+    def team_role_masks(pokedex: Pokedex, team_ids: np.ndarray) -> np.ndarray:
+        """
+        Batch team role bitmasks for an (N, team_size) species id matrix of valid teams.
+
+        Returns:
+            (N,) uint8 array of OR-reduced member masks
+        """
+        masks = RoleDetector.species_role_masks(pokedex)
+        return np.bitwise_or.reduce(masks[np.asarray(team_ids, dtype=np.intp)], axis=1)
+
+    @staticmethod
+    def role_counts(pokedex: Pokedex, team_ids: np.ndarray) -> np.ndarray:
+        """Batch number of distinct roles per team."""
+        return ROLE_POPCOUNT[RoleDetector.team_role_masks(pokedex, team_ids)]
+
+    @staticmethod
+    def role_diversity_scores(pokedex: Pokedex, team_ids: np.ndarray) -> np.ndarray:
+        """
+        Batch role_diversity_score for an (N, team_size) species id matrix.
+
+        Rows with an unknown species (-1, see Pokedex.encode_teams) are NaN.
+        """
+        team_ids = np.asarray(team_ids, dtype=np.intp)
+        invalid = (team_ids < 0).any(axis=1)
+        role_count = RoleDetector.role_counts(pokedex, np.where(team_ids < 0, 0, team_ids))
+        base_score = role_count / 4.0
+        scores = np.where(role_count == 4, np.minimum(1.0, base_score + 0.1), base_score)
+        scores[invalid] = np.nan
+        return scores
+
     @staticmethod
     def get_roles_added(input_team: list[Pokemon], full_team: list[Pokemon]) -> list[str]:
         """
@@ -96,11 +219,11 @@ class RoleDetector:
             "speed_control": "Speed Control",
         }
 
-        input_roles = RoleDetector.team_role_coverage(input_team)
-        full_roles = RoleDetector.team_role_coverage(full_team)
+        input_mask = RoleDetector.team_role_mask(input_team)
+        full_mask = RoleDetector.team_role_mask(full_team)
 
         # Roles that were added
-        added_roles = full_roles - input_roles
+        added_mask = full_mask & ~input_mask
 
         # Convert to user-friendly names
-        return [role_name_map.get(role, role) for role in added_roles]
+        return [role_name_map.get(role, role) for role in ROLES if added_mask & ROLE_BITS[role]]
@@ -0,0 +1,465 @@
+"""
+Persistent on-disk store of per-battle training features.
+
+Features are computed once per battle and kept across training runs. A
+store is a directory:
+
+    meta.json   committed entry/row counts and the feature version
+    index.tsv   one "battle_id<TAB>content hash<TAB>row count" line per entry
+    X.f32       float32 feature rows, one column per feature name
+    y.i8        int8 labels, one per row
+
+Data files are appended first and meta.json is replaced atomically last, so
+a crash mid-append leaves a tail that is ignored and truncated on the next
+open. Rows are read back as read-only memory maps.
+
+Entries are keyed by battle_id and the hash of the battle record's content
+(battles.battle_content_hash). update() scans the battles file, extracts
+battles that are new or whose record changed (the newer entry supersedes the
+old one), and remembers which entries the file still holds; training reads
+only those rows (dataset()). Rows of battles that were removed or changed
+are stale: they are compacted away once they outnumber the live ones, or by
+prune().
+
+The store is tagged with feature_version: a hash of the feature code, the
+role configuration and the snapshot's source hash. Opening it with a
+different version discards it.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Callable, Iterator, List
+
+import numpy as np
+
+from src.data import battles as battle_io
+from src.data import pokedex as pokedex_module
+from src.data import types as types_module
+from src.data import usage as usage_module
+from src.data.snapshot import Snapshot
+from src.features import coverage as coverage_module
+from src.features import dataset as dataset_module
+from src.features import matchup as matchup_module
+from src.features import meta as meta_module
+from src.features import roles as roles_module
+from src.features import team_features as team_features_module
+from src.features.dataset import ExtractedChunk, extract_chunk, iter_extract_parallel
+from src.features.roles import RoleDetector
+from src.features.team_features import FEATURE_NAMES
+
+STORE_FORMAT_VERSION = 2
+
+DEFAULT_STORE_PATH = Path(__file__).parents[2] / "data" / "cache" / "features"
+
+# Modules whose code determines feature values and labels
+FEATURE_CODE_MODULES = (
+    pokedex_module,
+    types_module,
+    usage_module,
+    coverage_module,
+    matchup_module,
+    meta_module,
+    roles_module,
+    team_features_module,
+    dataset_module,
+)
+
+
+def feature_version(snapshot: Snapshot, feature_names: list[str] = FEATURE_NAMES) -> str:
+    """Hash of the feature code, feature names, role configuration and the snapshot's source data."""
+    digest = hashlib.sha256(f"v{STORE_FORMAT_VERSION}".encode())
+    digest.update(json.dumps(list(feature_names)).encode())
+    for module in FEATURE_CODE_MODULES:
+        digest.update(Path(module.__file__).read_bytes())
+    # RoleDetector.configure changes role features without touching the code
+    digest.update(RoleDetector.config_hash().encode())
+    digest.update(snapshot.source_hash.encode())
+    return digest.hexdigest()
+
+
+class FeatureStore:
+    """
+    Append-only feature rows keyed by battle_id and record content hash.
+
+    Every processed battle is indexed, including ones that produced no rows
+    (unknown species), so they aren't retried on every run. A battle whose
+    record changed gets a new entry; the old one's rows become stale.
+    """
+
+    def __init__(
+        self,
+        path: Path = None,
+        version: str = None,
+        rebuild: bool = False,
+        feature_names: list[str] = FEATURE_NAMES,
+    ):
+        """
+        Open a store, creating it if needed.
+
+        Args:
+            path: Store directory (default: data/cache/features)
+            version: Expected feature_version; a store with another version is discarded
+            rebuild: Discard any existing contents
+            feature_names: Column names of the stored rows
+        """
+        self.path = Path(path or DEFAULT_STORE_PATH)
+        self.version = version
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+        self._X = None
+        self._y = None
+        self.live = None  # battle_id -> content hash of the battles file, set by update()/prune()
+
+        meta = self._read_meta()
+        self.rebuilt = rebuild or meta is None or meta["feature_version"] != version
+        if self.rebuilt:
+            self._reset()
+        else:
+            self.n_entries = meta["n_entries"]
+            self.n_rows = meta["n_rows"]
+            self._load_index()
+            self._truncate()
+
+    @property
+    def _meta_path(self) -> Path:
+        return self.path / "meta.json"
+
+    @property
+    def _index_path(self) -> Path:
+        return self.path / "index.tsv"
+
+    @property
+    def _X_path(self) -> Path:
+        return self.path / "X.f32"
+
+    @property
+    def _y_path(self) -> Path:
+        return self.path / "y.i8"
+
+    def _read_meta(self) -> dict | None:
+        try:
+            meta = json.loads(self._meta_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+        if meta.get("format_version") != STORE_FORMAT_VERSION or meta.get("feature_names") != self.feature_names:
+            return None
+        return meta
+
+    def _write_meta(self):
+        meta = {
+            "format_version": STORE_FORMAT_VERSION,
+            "feature_version": self.version,
+            "feature_names": self.feature_names,
+            "n_entries": self.n_entries,
+            "n_rows": self.n_rows,
+        }
+        tmp_path = self._meta_path.with_name(f"meta.json.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._meta_path)
+
+    def _reset(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        for file_path in (self._index_path, self._X_path, self._y_path):
+            file_path.write_bytes(b"")
+        self.n_entries = 0
+        self.n_rows = 0
+        self._entries = {}
+        self._index_bytes = 0
+        self._write_meta()
+
+    def _load_index(self):
+        """Read the committed index lines into a battle_id -> (content hash, first row, row count) map."""
+        self._entries = {}
+        self._index_bytes = 0
+        row = 0
+        with open(self._index_path, "rb") as f:
+            for _ in range(self.n_entries):
+                line = f.readline()
+                battle_id, content_hash, count = line.decode("utf-8").rstrip("\n").split("\t")
+                self._entries[battle_id] = (content_hash, row, int(count))  # Later entries supersede
+                row += int(count)
+                self._index_bytes += len(line)
+        if row != self.n_rows:
+            raise ValueError(f"Feature store index at {self.path} is inconsistent with meta.json")
+
+    def _truncate(self):
+        """Drop anything written after the last committed append."""
+        sizes = {
+            self._index_path: self._index_bytes,
+            self._X_path: self.n_rows * self.n_features * 4,
+            self._y_path: self.n_rows,
+        }
+        for file_path, size in sizes.items():
+            if file_path.stat().st_size != size:
+                with open(file_path, "r+b") as f:
+                    f.truncate(size)
+
+    @classmethod
+    def open_existing(cls, path: Path = None) -> "FeatureStore | None":
+        """Open a store with the version and feature names it was built with; None if there is none."""
+        path = Path(path or DEFAULT_STORE_PATH)
+        try:
+            meta = json.loads((path / "meta.json").read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+        if meta.get("format_version") != STORE_FORMAT_VERSION:
+            return None
+        return cls(path, meta["feature_version"], feature_names=meta["feature_names"])
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, battle_id: str) -> bool:
+        return battle_id in self._entries
+
+    def new_battle_lines(
+        self, battles_file: Path, chunk_size: int = 10000, backend: str = "auto", present: dict = None
+    ) -> Iterator[List[bytes]]:
+        """
+        Yield raw JSONL lines of battles that are new or changed, in chunks.
+
+        Battles repeated within the file are considered once (first occurrence).
+
+        Args:
+            present: If given, filled with battle_id -> content hash of every
+                battle in the file, as the file is read
+        """
+        loads = battle_io.get_json_decoder(backend)
+        if present is None:
+            present = {}
+        for lines in battle_io.iter_line_chunks(battles_file, chunk_size):
+            new_lines = []
+            for line in lines:
+                battle = loads(line)
+                key = battle_io.battle_key(battle)
+                if key in present:
+                    continue
+                content_hash = battle_io.battle_content_hash(battle)
+                present[key] = content_hash
+                entry = self._entries.get(key)
+                if entry is None or entry[0] != content_hash:
+                    new_lines.append(line)
+            if new_lines:
+                yield new_lines
+
+    def append(self, chunk: ExtractedChunk, content_hashes: dict):
+        """
+        Append a chunk of extracted battles and commit it.
+
+        Args:
+            chunk: Extracted battles; a battle already stored is superseded
+            content_hashes: battle_id -> content hash of each battle in the chunk
+        """
+        X = np.ascontiguousarray(chunk.X, dtype=np.float32)
+        y = np.ascontiguousarray(chunk.y, dtype=np.int8)
+        if X.shape != (int(chunk.row_counts.sum()), self.n_features) or len(y) != len(X):
+            raise ValueError("Chunk rows don't match its row counts")
+
+        index_lines = []
+        entries = {}
+        row = self.n_rows
+        for battle_id, count in zip(chunk.battle_ids, chunk.row_counts.tolist()):
+            if "\t" in battle_id or "\n" in battle_id:
+                raise ValueError(f"Invalid battle_id {battle_id!r}")
+            if battle_id in entries:
+                raise ValueError(f"Battle {battle_id} appears twice in the chunk")
+            content_hash = content_hashes[battle_id]
+            index_lines.append(f"{battle_id}\t{content_hash}\t{count}\n")
+            entries[battle_id] = (content_hash, row, count)
+            row += count
+        index_bytes = "".join(index_lines).encode("utf-8")
+
+        for file_path, data in ((self._X_path, X.tobytes()), (self._y_path, y.tobytes()), (self._index_path, index_bytes)):
+            with open(file_path, "ab") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+
+        self.n_entries += len(chunk.battle_ids)
+        self.n_rows = row
+        self._index_bytes += len(index_bytes)
+        self._entries.update(entries)
+        self._X = self._y = None
+        self._write_meta()
+
+    def update(
+        self,
+        battles_file: Path,
+        pokedex,
+        coverage_analyzer,
+        meta_analyzer,
+        cache=None,
+        matchup_table=None,
+        chunk_size: int = 1000,
+        json_backend: str = "auto",
+        workers: int = 1,
+        progress: Callable[[int], None] = None,
+        snapshot_path: Path = None,
+    ) -> int:
+        """
+        Bring the store in line with battles_file.
+
+        Extracts and appends every battle that is new or whose record
+        changed, then marks the battles in the file as live (see dataset())
+        and compacts the store if most of its rows are stale.
+
+        Args:
+            battles_file: Battle JSONL file
+            pokedex, coverage_analyzer, meta_analyzer: Used for in-process extraction
+            cache: Optional TeamFeatureCache (workers get their own of the same size)
+            matchup_table: Append the matchup feature columns (must match feature_names)
+            chunk_size: Battles per chunk (and per commit)
+            json_backend: "auto", "orjson" or "json"
+            workers: Extraction processes (1 extracts in-process)
+            progress: Called with the running count of new battles after each chunk
+            snapshot_path: Snapshot the workers load (default: the bundled one);
+                must be the one pokedex and the analyzers came from
+
+        Returns:
+            Number of new or changed battles processed
+        """
+        present = {}
+        line_chunks = self.new_battle_lines(battles_file, chunk_size, json_backend, present)
+        if workers <= 1:
+            chunks = (
+                extract_chunk(
+                    battle_io.decode_battles(lines, json_backend),
+                    pokedex,
+                    coverage_analyzer,
+                    meta_analyzer,
+                    cache,
+                    matchup_table,
+                )
+                for lines in line_chunks
+            )
+        else:
+            chunks = iter_extract_parallel(
+                line_chunks,
+                workers,
+                snapshot_path=snapshot_path,
+                cache_size=cache.maxsize if cache is not None else 0,
+                json_backend=json_backend,
+                matchup=matchup_table is not None,
+            )
+
+        processed = 0
+        for chunk in chunks:
+            self.append(chunk, present)
+            processed += len(chunk.battle_ids)
+            if progress is not None:
+                progress(processed)
+
+        self.live = present
+        live_rows = sum(self._entries[battle_id][2] for battle_id in present)
+        if self.n_rows - live_rows > live_rows or self.n_entries - len(present) > len(present):
+            self._compact()
+        return processed
+
+    def prune(self, battles_file: Path, chunk_size: int = 10000, json_backend: str = "auto") -> int:
+        """
+        Drop the rows of battles that are no longer in battles_file, or whose record changed.
+
+        Doesn't extract anything: changed and new battles are extracted by
+        the next update(). Returns the number of entries dropped.
+        """
+        present = {}
+        for _ in self.new_battle_lines(battles_file, chunk_size, json_backend, present):
+            pass
+        self.live = {
+            battle_id: content_hash
+            for battle_id, content_hash in present.items()
+            if battle_id in self._entries and self._entries[battle_id][0] == content_hash
+        }
+        dropped = self.n_entries - len(self.live)
+        if dropped:
+            self._compact()
+        return dropped
+
+    def _compact(self, batch_size: int = 10000):
+        """Rewrite the store with only the live entries, in battles file order."""
+        compact_path = self.path.with_name(self.path.name + ".compact")
+        old_path = self.path.with_name(self.path.name + ".old")
+        for stale_path in (compact_path, old_path):
+            if stale_path.exists():
+                shutil.rmtree(stale_path)
+
+        compacted = FeatureStore(compact_path, self.version, rebuild=True, feature_names=self.feature_names)
+        battle_ids = list(self.live)
+        for batch_start in range(0, len(battle_ids), batch_size):
+            batch = battle_ids[batch_start : batch_start + batch_size]
+            rows = self._rows_of(batch)
+            compacted.append(
+                ExtractedChunk(
+                    battle_ids=batch,
+                    X=self.X[rows],
+                    y=self.y[rows],
+                    row_counts=np.array([self._entries[battle_id][2] for battle_id in batch], dtype=np.int64),
+                ),
+                self.live,
+            )
+
+        self._X = self._y = None
+        os.replace(self.path, old_path)
+        os.replace(compact_path, self.path)
+        shutil.rmtree(old_path)
+        self.n_entries = compacted.n_entries
+        self.n_rows = compacted.n_rows
+        self._entries = compacted._entries
+        self._index_bytes = compacted._index_bytes
+
+    def _rows_of(self, battle_ids) -> np.ndarray:
+        """Row indices of the given battles' entries, in order."""
+        spans = [self._entries[battle_id][1:] for battle_id in battle_ids]
+        if not spans:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.arange(start, start + count, dtype=np.int64) for start, count in spans])
+
+    def live_rows(self) -> np.ndarray:
+        """Row indices of the battles in the battles file last passed to update() or prune()."""
+        if self.live is None:
+            raise RuntimeError("Call update() or prune() before reading the live rows")
+        return self._rows_of(self.live)
+
+    def dataset(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Feature rows and labels of the live battles, in battles file order.
+
+        Memory maps of the whole store when every row is live, else copies.
+        """
+        rows = self.live_rows()
+        if len(rows) == self.n_rows and np.array_equal(rows, np.arange(self.n_rows)):
+            return self.X, self.y
+        return self.X[rows], self.y[rows]
+
+    @property
+    def X(self) -> np.ndarray:
+        """(n_rows, n_features) float32 read-only memory map of all rows, stale ones included, in append order."""
+        if self._X is None:
+            self._X = self._map(self._X_path, np.float32, (self.n_rows, self.n_features))
+        return self._X
+
+    @property
+    def y(self) -> np.ndarray:
+        """(n_rows,) int8 read-only memory map of all labels."""
+        if self._y is None:
+            self._y = self._map(self._y_path, np.int8, (self.n_rows,))
+        return self._y
+
+    @staticmethod
+    def _map(file_path: Path, dtype, shape: tuple) -> np.ndarray:
+        if shape[0] == 0:
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(file_path, dtype=dtype, mode="r", shape=shape)
+
+    def rows(self, battle_id: str) -> tuple[np.ndarray, np.ndarray] | None:
+        """Feature rows and labels of a battle's latest entry, or None if it isn't stored."""
+        if battle_id not in self._entries:
+            return None
+        _, start, count = self._entries[battle_id]
+        return self.X[start : start + count], self.y[start : start + count]
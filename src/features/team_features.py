@@ -0,0 +1,146 @@
+"""Team-level features for the win-prediction model."""
+
+import numpy as np
+
+from src.data.pokedex import STAT_KEYS
+from src.features.cache import TeamFeatureCache, data_version, team_signature
+from src.features.roles import ROLE_POPCOUNT, RoleDetector
+
+# Column order of extract_features
+FEATURE_NAMES = [
+    'type_score',
+    'meta_score',
+    'role_score',
+    'avg_speed',
+    'type_diversity',
+    'balance',
+    'avg_bulk'
+]
+
+
+def extract_features(
+    team_names: list[str],
+    pokedex,
+    coverage_analyzer,
+    meta_analyzer,
+    cache: TeamFeatureCache = None,
+) -> np.ndarray:
+    """
+    Extract 7 features from a team (same as synthetic model).
+
+    With a cache, features are memoized per team_signature (the same six
+    species in any order) and recomputed when the dex, type chart, usage
+    data or role configuration (RoleDetector.configure) change.
+    """
+
+    # Convert names to Pokemon objects
+    team = []
+    for name in team_names:
+        mon = pokedex.get(name)
+        if mon:
+            team.append(mon)
+
+    if len(team) != 6:
+        return None
+
+    if cache is None:
+        return _team_features(team, coverage_analyzer, meta_analyzer)
+
+    return cache.get_or_compute(
+        ("features", team_signature(team)),
+        data_version(pokedex, coverage_analyzer.type_chart, meta_analyzer.usage_stats)
+        + (f"roles:{RoleDetector.config_version()}",),
+        lambda: _team_features(team, coverage_analyzer, meta_analyzer),
+    )
+
+
+def _team_features(team: list, coverage_analyzer, meta_analyzer) -> np.ndarray:
+    # Canonical member order, so features don't depend on how the team was
+    # listed (avg_bulk sums floats) and cached values match uncached ones
+    team = sorted(team, key=lambda mon: mon.id)
+
+    # Type coverage features
+    type_score = coverage_analyzer.type_coverage_score(team)
+
+    # Meta matchup
+    meta_score = meta_analyzer.meta_coverage_score(team)
+
+    # Role diversity (OR of the members' precomputed role bitmasks)
+    role_mask = RoleDetector.team_role_mask(team)
+    role_score = int(ROLE_POPCOUNT[role_mask]) / 4  # Max 4 roles
+
+    # Members' base stats, read straight from the dex columns (Pokemon.base_stats
+    # builds a dict per access)
+    stats = team[0].dex.stats[[mon.id for mon in team]].astype(np.int64)
+    column = {key: stats[:, i] for i, key in enumerate(STAT_KEYS)}
+
+    # Secondary features
+    avg_speed = column['spe'].mean()
+    type_diversity = len(set([t for mon in team for t in mon.types]))
+
+    # Physical/special balance
+    physical_count = int((column['atk'] > column['spa']).sum())
+    balance = min(physical_count, 6 - physical_count) / 3
+
+    # Bulk
+    avg_bulk = ((column['hp'] + column['def'] + column['spd']) / 3).mean()
+
+    features = np.array([
+        type_score,
+        meta_score,
+        role_score,
+        avg_speed,
+        type_diversity,
+        balance,
+        avg_bulk
+    ])
+    features.setflags(write=False)
+    return features
+
+
+def team_feature_matrix(team_ids: np.ndarray, pokedex, coverage_analyzer, meta_analyzer) -> np.ndarray:
+    """
+    Batch extract_features for an (N, 6) species id matrix of valid teams.
+
+    Uses the analyzers' batch scoring and per-species stat/type tables, and
+    sums members in the same (sorted id) order as the scalar path, so rows
+    equal extract_features of the same teams.
+
+    Returns:
+        (N, len(FEATURE_NAMES)) float64 array
+    """
+    team_ids = np.sort(np.asarray(team_ids, dtype=np.intp), axis=1)
+    team_size = team_ids.shape[1]
+
+    type_score = coverage_analyzer.score_teams(team_ids).combined
+    meta_score = meta_analyzer.meta_coverage_scores(team_ids)
+    role_score = RoleDetector.role_counts(pokedex, team_ids) / 4
+
+    stats = pokedex.stats.astype(np.int64)
+    column = {key: stats[:, i] for i, key in enumerate(STAT_KEYS)}
+    avg_speed = column['spe'][team_ids].mean(axis=1)
+
+    # has_type[s, t]: species s has the dex's t-th type name
+    type_index = {type_name: i for i, type_name in enumerate(pokedex.type_names)}
+    combo_types = np.zeros((len(pokedex.type_combos), len(pokedex.type_names)), dtype=bool)
+    for combo_id, combo in enumerate(pokedex.type_combos):
+        for type_name in combo:
+            combo_types[combo_id, type_index[type_name]] = True
+    has_type = combo_types[pokedex.type_combo_ids]
+    type_diversity = has_type[team_ids].any(axis=1).sum(axis=1)
+
+    physical_count = (column['atk'] > column['spa'])[team_ids].sum(axis=1)
+    balance = np.minimum(physical_count, team_size - physical_count) / 3
+
+    bulk = (column['hp'] + column['def'] + column['spd']) / 3
+    avg_bulk = bulk[team_ids].mean(axis=1)
+
+    return np.column_stack([
+        type_score,
+        meta_score,
+        role_score,
+        avg_speed,
+        type_diversity,
+        balance,
+        avg_bulk
+    ]).astype(np.float64)
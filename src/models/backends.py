@@ -0,0 +1,145 @@
+"""Trainer backends for the win-prediction model."""
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+DEFAULT_BACKEND = "hgb"
+
+
+def _hist_gradient_boosting(random_state: int = 42):
+    from sklearn.ensemble import HistGradientBoostingClassifier
+
+    # Histogram-binned, multithreaded (OpenMP) boosting; stops once the
+    # log loss on an internal 10% validation split stops improving
+    return HistGradientBoostingClassifier(
+        max_iter=500,
+        learning_rate=0.1,
+        max_leaf_nodes=31,
+        early_stopping=True,
+        validation_fraction=0.1,
+        n_iter_no_change=10,
+        random_state=random_state,
+    )
+
+
+def _gradient_boosting_regressor(random_state: int = 42):
+    from sklearn.ensemble import GradientBoostingRegressor
+
+    # The original model: regression on the 0/1 win label
+    return GradientBoostingRegressor(
+        n_estimators=100,
+        learning_rate=0.1,
+        max_depth=4,
+        random_state=random_state,
+    )
+
+
+# Backend name -> model factory
+TRAINER_BACKENDS = {
+    "hgb": _hist_gradient_boosting,
+    "gbr": _gradient_boosting_regressor,
+}
+
+
+@dataclass
+class TrainResult:
+    """A fitted model with its timing, metrics and feature importances."""
+
+    backend: str
+    model: object
+    fit_seconds: float
+    n_iter: int  # Boosting iterations actually run
+    metrics: dict  # Validation metrics, see evaluate_model
+    importances: np.ndarray  # Normalized to sum to 1
+    importance_method: str  # "impurity" or "permutation"
+
+
+def make_model(backend: str = DEFAULT_BACKEND, random_state: int = 42):
+    """Create an unfitted model for a backend name."""
+    if backend not in TRAINER_BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {sorted(TRAINER_BACKENDS)}")
+    return TRAINER_BACKENDS[backend](random_state)
+
+
+def win_probability(model, X: np.ndarray) -> np.ndarray:
+    """Win probability for classifiers, raw prediction for regressors."""
+    if hasattr(model, "predict_proba"):
+        return model.predict_proba(X)[:, 1]
+    return model.predict(X)
+
+
+def evaluate_model(model, X: np.ndarray, y: np.ndarray) -> dict:
+    """Accuracy, ROC AUC, Brier score and log loss of the win probabilities."""
+    from sklearn.metrics import accuracy_score, brier_score_loss, log_loss, roc_auc_score
+
+    probability = np.clip(win_probability(model, X), 0.0, 1.0)
+    both_classes = len(np.unique(y)) == 2
+    return {
+        "accuracy": float(accuracy_score(y, probability >= 0.5)),
+        "roc_auc": float(roc_auc_score(y, probability)) if both_classes else float("nan"),
+        "brier": float(brier_score_loss(y, probability)),
+        "log_loss": float(log_loss(y, np.clip(probability, 1e-6, 1 - 1e-6), labels=[0, 1])),
+    }
+
+
+def feature_importances(model, X: np.ndarray, y: np.ndarray, n_repeats: int = 10, random_state: int = 42):
+    """
+    Normalized feature importances and the method used.
+
+    Models with impurity importances (GradientBoostingRegressor) report them
+    directly; others (HistGradientBoostingClassifier) use permutation
+    importance of ROC AUC on (X, y). Negative permutation scores are clipped
+    to 0, and both are scaled to sum to 1 so they compare with each other.
+    """
+    if hasattr(model, "feature_importances_"):
+        importances, method = np.asarray(model.feature_importances_, dtype=np.float64), "impurity"
+    else:
+        from sklearn.inspection import permutation_importance
+
+        result = permutation_importance(
+            model, X, y, scoring="roc_auc", n_repeats=n_repeats, random_state=random_state
+        )
+        importances, method = np.clip(result.importances_mean, 0.0, None), "permutation"
+
+    total = importances.sum()
+    return (importances / total if total > 0 else importances), method
+
+
+def train_model(
+    X_train: np.ndarray,
+    y_train: np.ndarray,
+    X_val: np.ndarray,
+    y_val: np.ndarray,
+    backend: str = DEFAULT_BACKEND,
+    random_state: int = 42,
+) -> TrainResult:
+    """
+    Fit a backend and evaluate it on a held-out split.
+
+    Args:
+        X_train, y_train: Training rows (HGB carves its early-stopping split from these)
+        X_val, y_val: Held-out rows for metrics and permutation importance
+        backend: Key of TRAINER_BACKENDS
+        random_state: Seed for the model and permutation importance
+
+    Returns:
+        TrainResult
+    """
+    model = make_model(backend, random_state)
+    started = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - started
+
+    n_iter = getattr(model, "n_iter_", None) or getattr(model, "n_estimators_", None) or 0
+    importances, method = feature_importances(model, X_val, y_val, random_state=random_state)
+    return TrainResult(
+        backend=backend,
+        model=model,
+        fit_seconds=fit_seconds,
+        n_iter=int(n_iter),
+        metrics=evaluate_model(model, X_val, y_val),
+        importances=importances,
+        importance_method=method,
+    )
@@ -0,0 +1,326 @@
+"""
+Batch inference service for a saved win-prediction model.
+
+Requests are parsed on the HTTP server's threads and queued; a single
+batcher thread groups whatever is waiting (up to max_batch_size rows, or
+until the oldest request has waited max_wait seconds) and scores the group
+with one vectorized featurize + predict call.
+
+Endpoints:
+    POST /predict  {"teams": [[6 names], ...]}
+                   {"battles": [{"p1_team": [...], "p2_team": [...]}, ...]}
+    GET  /stats    counters, batch sizes, latency percentiles, throughput
+    GET  /health
+"""
+
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+
+from src.data.snapshot import load_snapshot
+from src.features.coverage import CoverageAnalyzer
+from src.features.matchup import MATCHUP_FEATURE_NAMES, MatchupTable
+from src.features.meta import MetaAnalyzer
+from src.features.team_features import FEATURE_NAMES, team_feature_matrix
+from src.models.backends import win_probability
+
+# Request latencies kept for the percentiles in /stats
+LATENCY_WINDOW = 10000
+
+# Largest accepted request body
+MAX_BODY_BYTES = 8 * 1024 * 1024
+
+
+class WinModelScorer:
+    """
+    A loaded model with the data needed to featurize teams for it.
+
+    Models trained with --matchup-features take 11 columns and need each
+    team's opponent; 7-column models score teams on their own.
+    """
+
+    def __init__(self, model_path: Path, snapshot_path: Path = None):
+        import joblib
+
+        self.model = joblib.load(model_path)
+        snapshot = load_snapshot(snapshot_path)
+        self.pokedex = snapshot.pokedex
+        self.coverage_analyzer = CoverageAnalyzer(snapshot.type_chart, self.pokedex)
+        self.meta_analyzer = MetaAnalyzer(snapshot.type_chart, self.pokedex, snapshot.usage_stats)
+        self.matchup_table = MatchupTable(self.meta_analyzer)
+
+        n_features = getattr(self.model, "n_features_in_", len(FEATURE_NAMES))
+        if n_features not in (len(FEATURE_NAMES), len(FEATURE_NAMES) + len(MATCHUP_FEATURE_NAMES)):
+            raise ValueError(f"Model expects {n_features} features; not a win-prediction model")
+        self.needs_opponent = n_features != len(FEATURE_NAMES)
+
+        # Build the precomputed tables before serving
+        warmup = list(self.pokedex.names[:6])
+        self.score_rows([warmup], [warmup])
+
+    def score_rows(self, teams: list[list[str]], opponents: list[list[str] | None]) -> np.ndarray:
+        """
+        Win probability of each team (NaN where it can't be featurized).
+
+        Args:
+            teams: Team name lists
+            opponents: Each team's opponent, or None (required by matchup models)
+        """
+        scores = np.full(len(teams), np.nan)
+        team_ids = self.pokedex.encode_teams(teams)
+        valid = (team_ids >= 0).all(axis=1)
+
+        if self.needs_opponent:
+            opponent_ids = np.full_like(team_ids, -1)
+            for row, opponent in enumerate(opponents):
+                if opponent is not None:
+                    opponent_ids[row] = self.pokedex.encode_team(opponent)
+            valid &= (opponent_ids >= 0).all(axis=1)
+
+        if not valid.any():
+            return scores
+
+        X = team_feature_matrix(team_ids[valid], self.pokedex, self.coverage_analyzer, self.meta_analyzer)
+        if self.needs_opponent:
+            matchup, _ = self.matchup_table.battle_features(team_ids[valid], opponent_ids[valid])
+            X = np.hstack([X, matchup])
+        scores[valid] = win_probability(self.model, X.astype(np.float32))
+        return scores
+
+
+class ServiceStats:
+    """Thread-safe request, batch and latency counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.requests = 0
+        self.errors = 0
+        self.rows = 0
+        self.batches = 0
+        self.max_batch_rows = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def record_request(self, latency: float, error: bool = False):
+        with self._lock:
+            self.requests += 1
+            self.errors += int(error)
+            self._latencies.append(latency)
+
+    def record_batch(self, n_rows: int):
+        with self._lock:
+            self.batches += 1
+            self.rows += n_rows
+            self.max_batch_rows = max(self.max_batch_rows, n_rows)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            uptime = time.monotonic() - self.started
+            latencies = np.array(self._latencies) if self._latencies else np.zeros(1)
+            p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+            return {
+                "uptime_s": uptime,
+                "requests": self.requests,
+                "errors": self.errors,
+                "rows": self.rows,
+                "batches": self.batches,
+                "mean_batch_rows": self.rows / self.batches if self.batches else 0.0,
+                "max_batch_rows": self.max_batch_rows,
+                "latency_p50_ms": float(p50),
+                "latency_p99_ms": float(p99),
+                "requests_per_s": self.requests / uptime if uptime > 0 else 0.0,
+                "rows_per_s": self.rows / uptime if uptime > 0 else 0.0,
+            }
+
+
+class MicroBatcher:
+    """Groups concurrent scoring requests into batched score_rows calls."""
+
+    def __init__(self, scorer: WinModelScorer, stats: ServiceStats, max_batch_size: int = 512, max_wait: float = 0.002):
+        """
+        Args:
+            scorer: The model to call
+            stats: Where batch counters are recorded
+            max_batch_size: Rows per batch before it is scored without waiting
+            max_wait: Longest a request waits for others to join its batch (seconds)
+        """
+        self.scorer = scorer
+        self.stats = stats
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, teams: list[list[str]], opponents: list[list[str] | None]) -> Future:
+        """Queue rows for scoring; the future resolves to their scores."""
+        future = Future()
+        self._queue.put((teams, opponents, future))
+        return future
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            n_rows = len(first[0])
+            deadline = time.monotonic() + self.max_wait
+            while n_rows < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)  # Finish this batch, then stop
+                    break
+                batch.append(item)
+                n_rows += len(item[0])
+            self._score(batch, n_rows)
+
+    def _score(self, batch: list, n_rows: int):
+        teams = [team for item in batch for team in item[0]]
+        opponents = [opponent for item in batch for opponent in item[1]]
+        try:
+            scores = self.scorer.score_rows(teams, opponents)
+        except Exception as error:
+            if len(batch) > 1:
+                # Score each request on its own, so a bad one only fails itself
+                for item in batch:
+                    self._score([item], len(item[0]))
+                return
+            batch[0][2].set_exception(error)  # Fail the request, keep serving
+            return
+        self.stats.record_batch(n_rows)
+        start = 0
+        for item_teams, _, future in batch:
+            future.set_result(scores[start : start + len(item_teams)])
+            start += len(item_teams)
+
+
+def _score_or_none(value: float):
+    return None if np.isnan(value) else float(value)
+
+
+def _is_team(team) -> bool:
+    return isinstance(team, list) and all(isinstance(name, str) for name in team)
+
+
+def parse_request(payload: dict) -> tuple[list, list, str]:
+    """Rows (teams, opponents) and the kind ("teams" or "battles") of a /predict body."""
+    if not isinstance(payload, dict):
+        raise ValueError("Expected a JSON object")
+    if "teams" in payload:
+        teams = payload["teams"]
+        if not isinstance(teams, list) or not all(_is_team(team) for team in teams):
+            raise ValueError('"teams" must be a list of team name lists')
+        return teams, [None] * len(teams), "teams"
+    if "battles" in payload:
+        battles = payload["battles"]
+        if not isinstance(battles, list):
+            raise ValueError('"battles" must be a list')
+        teams, opponents = [], []
+        for battle in battles:
+            if not isinstance(battle, dict) or not (_is_team(battle.get("p1_team")) and _is_team(battle.get("p2_team"))):
+                raise ValueError('Each battle needs "p1_team" and "p2_team" team name lists')
+            p1_team, p2_team = battle["p1_team"], battle["p2_team"]
+            teams += [p1_team, p2_team]
+            opponents += [p2_team, p1_team]
+        return teams, opponents, "battles"
+    raise ValueError('Expected "teams" or "battles"')
+
+
+def format_response(kind: str, scores: np.ndarray) -> dict:
+    """
+    Response body for scored rows.
+
+    For battles, p1_win normalizes the two team scores: p1 / (p1 + p2).
+    """
+    if kind == "teams":
+        return {"scores": [_score_or_none(score) for score in scores]}
+    results = []
+    for p1_score, p2_score in scores.reshape(-1, 2):
+        total = p1_score + p2_score
+        results.append({
+            "p1_score": _score_or_none(p1_score),
+            "p2_score": _score_or_none(p2_score),
+            "p1_win": _score_or_none(p1_score / total) if total > 0 else None,
+        })
+    return {"results": results}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so clients can reuse connections
+    # Headers and body go out in separate writes; without TCP_NODELAY the
+    # body waits on the client's delayed ACK (~40 ms per response)
+    disable_nagle_algorithm = True
+    server: "InferenceServer"
+
+    def log_message(self, format, *args):
+        pass  # Per-request logging would dominate at high request rates
+
+    def _send_json(self, status: int, body: dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        elif self.path == "/stats":
+            self._send_json(200, self.server.stats.snapshot())
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        started = time.monotonic()
+        if self.path != "/predict":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            if length > MAX_BODY_BYTES:
+                raise ValueError("Request body too large")
+            teams, opponents, kind = parse_request(json.loads(self.rfile.read(length)))
+            scores = self.server.batcher.submit(teams, opponents).result()
+        except (ValueError, KeyError, TypeError) as error:
+            self.server.stats.record_request(time.monotonic() - started, error=True)
+            self._send_json(400, {"error": str(error)})
+            return
+        except Exception as error:
+            self.server.stats.record_request(time.monotonic() - started, error=True)
+            self._send_json(500, {"error": str(error)})
+            return
+        body = format_response(kind, scores)
+        self.server.stats.record_request(time.monotonic() - started)
+        self._send_json(200, body)
+
+
+class InferenceServer(ThreadingHTTPServer):
+    """HTTP server with a shared scorer, micro-batcher and stats."""
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], scorer: WinModelScorer, max_batch_size: int = 512, max_wait: float = 0.002):
+        super().__init__(address, _Handler)
+        self.stats = ServiceStats()
+        self.batcher = MicroBatcher(scorer, self.stats, max_batch_size, max_wait)
+
+    def server_close(self):
+        super().server_close()
+        self.batcher.close()
@@ -0,0 +1,357 @@
+"""
+Concurrent replay scraping on asyncio.
+
+Requests go through one pooled requests.Session; its blocking calls run on
+a thread pool sized to the concurrency limit. That keeps dependencies at
+requirements.txt while the event loop schedules the work: a bounded set of
+replay downloads in flight, a shared token bucket that caps the request
+rate, the next search page prefetched while the current page's replays
+download, and parsing on a separate executor so it never blocks the loop.
+
+With a ReplayCache, cached replays are parsed without a request and fetched
+ones are stored raw; the cache is only written from the parse executor.
+"""
+
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.scrape.replay_cache import ReplayCache
+
+DEFAULT_BASE_URL = "https://replay.pokemonshowdown.com"
+
+# Status codes worth retrying (throttled or transient server errors)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Rate limiter shared by every request of a scrape.
+
+    Holds up to `burst` tokens, refilled at `rate` per second; each request
+    takes one. Waiters are served in arrival order.
+    """
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        """
+        Args:
+            rate: Sustained requests per second
+            burst: Requests allowed back-to-back after an idle period
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Wait for a token and take it."""
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+    def pause(self, seconds: float):
+        """Withhold tokens for `seconds` (e.g. after the server sends 429)."""
+        self._tokens = min(self._tokens, 1 - seconds * self.rate)
+
+
+@dataclass
+class ScrapeStats:
+    """Counters for one scrape."""
+
+    pages: int = 0
+    requests: int = 0  # HTTP requests, retries included
+    replays_fetched: int = 0
+    replays_missing: int = 0  # 404s and replays that failed after retries
+    battles_written: int = 0
+    parse_rejected: int = 0  # Fetched but extract_battle_data returned None
+    cache_hits: int = 0  # Replays read from the replay cache instead of fetched
+    retries: int = 0
+    throttled: int = 0  # 429 responses
+    errors: int = 0  # Connection errors and 5xx responses
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def success_rate(self) -> float:
+        attempts = self.replays_fetched + self.replays_missing
+        return self.battles_written / attempts if attempts else 0.0
+
+    def summary(self) -> str:
+        rate = self.battles_written / self.elapsed if self.elapsed > 0 else 0.0
+        return (
+            f"{self.battles_written} battles in {self.elapsed:.1f}s ({rate:.1f}/s) | "
+            f"success {self.success_rate * 100:.1f}% | {self.requests} requests, {self.cache_hits} cached, "
+            f"{self.retries} retries, {self.throttled} throttled, {self.errors} errors"
+        )
+
+
+class AsyncReplayScraper:
+    """Fetches search pages and replays concurrently under a rate limit."""
+
+    def __init__(
+        self,
+        parse: Callable[[dict], dict | None],
+        base_url: str = DEFAULT_BASE_URL,
+        concurrency: int = 8,
+        rate: float = 2.0,
+        burst: float = None,
+        timeout: float = 10.0,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+        replay_cache: ReplayCache = None,
+    ):
+        """
+        Args:
+            parse: Replay JSON -> battle record or None (e.g. extract_battle_data)
+            base_url: Replay server root (a local stand-in server in tests)
+            concurrency: Replay downloads in flight
+            rate: Requests per second across all downloads and page fetches
+            burst: Token bucket size (default: concurrency)
+            timeout: Per-request timeout (seconds)
+            max_retries: Retries after 429s, 5xx responses and connection errors
+            backoff: First retry delay (seconds), doubled per retry
+            replay_cache: Raw replay store to read before fetching and to fill
+        """
+        self.parse = parse
+        self.replay_cache = replay_cache
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.bucket = TokenBucket(rate, burst if burst is not None else concurrency)
+        self.stats = ScrapeStats()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency + 1)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # +1 thread for the search page prefetch
+        self._io = ThreadPoolExecutor(concurrency + 1, thread_name_prefix="scrape-io")
+        self._parser = ThreadPoolExecutor(1, thread_name_prefix="scrape-parse")
+
+    def close(self):
+        self._io.shutdown(wait=True)
+        self._parser.shutdown(wait=True)
+        self.session.close()
+
+    def _get(self, url: str) -> tuple[int, object, bytes, float | None]:
+        """Blocking GET: (status, decoded JSON or None, body, Retry-After seconds)."""
+        response = self.session.get(url, timeout=self.timeout)
+        payload = response.json() if response.status_code == 200 else None
+        retry_after = response.headers.get("Retry-After")
+        try:
+            retry_after = float(retry_after) if retry_after is not None else None
+        except ValueError:
+            retry_after = None
+        return response.status_code, payload, response.content, retry_after
+
+    async def get_json(self, url: str):
+        """GET a JSON document under the rate limit, retrying transient failures; None if unavailable."""
+        response = await self._get_with_retries(url)
+        return response[0] if response is not None else None
+
+    async def _get_with_retries(self, url: str) -> tuple[object, bytes] | None:
+        """(decoded JSON, raw body) of a successful GET, or None."""
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            self.stats.requests += 1
+            retry_after = None
+            try:
+                status, payload, content, retry_after = await loop.run_in_executor(self._io, self._get, url)
+            except (requests.RequestException, ValueError):
+                status = None
+                self.stats.errors += 1
+            else:
+                if status == 200:
+                    return payload, content
+                if status == 429:
+                    self.stats.throttled += 1
+                elif status in RETRY_STATUSES:
+                    self.stats.errors += 1
+                else:
+                    return None  # 404 and other permanent failures
+
+            if attempt == self.max_retries:
+                return None
+            self.stats.retries += 1
+            delay = retry_after if retry_after is not None else self.backoff * 2**attempt
+            if status == 429:
+                self.bucket.pause(delay)  # Everyone backs off, not just this request
+            await asyncio.sleep(delay * (1 + random.random() * 0.1))
+        return None
+
+    async def fetch_search_page(self, tier: str, page: int) -> list[str]:
+        """Battle ids on one page of search results ([] when the listing is exhausted)."""
+        battles = await self.get_json(f"{self.base_url}/search.json?format={tier}&page={page}")
+        self.stats.pages += 1
+        return [battle["id"] for battle in battles or []]
+
+    def _parse_cached(self, battle_id: str) -> dict | None:
+        return self.parse(self.replay_cache.get_replay(battle_id))
+
+    def _store_and_parse(self, battle_id: str, replay: dict, raw: bytes) -> dict | None:
+        if self.replay_cache is not None:
+            self.replay_cache.put(battle_id, raw)
+        return self.parse(replay)
+
+    async def fetch_battle(self, battle_id: str) -> dict | None:
+        """Fetch (or read from the replay cache) and parse one replay; None if missing or rejected."""
+        loop = asyncio.get_running_loop()
+        if self.replay_cache is not None and battle_id in self.replay_cache:
+            self.stats.cache_hits += 1
+            self.stats.replays_fetched += 1
+            battle = await loop.run_in_executor(self._parser, self._parse_cached, battle_id)
+        else:
+            response = await self._get_with_retries(f"{self.base_url}/{battle_id}.json")
+            if response is None:
+                self.stats.replays_missing += 1
+                return None
+            self.stats.replays_fetched += 1
+            battle = await loop.run_in_executor(self._parser, self._store_and_parse, battle_id, *response)
+        if battle is None:
+            self.stats.parse_rejected += 1
+        return battle
+
+    async def scrape_search(
+        self,
+        tier: str,
+        target_count: int,
+        write: Callable[[dict], None],
+        start_page: int = 1,
+        progress_every: int = 100,
+        skip: Callable[[str], bool] = None,
+        checkpoint: Callable[[int], None] = None,
+    ) -> ScrapeStats:
+        """
+        Scrape battles from the search listing until target_count are written.
+
+        Args:
+            tier: Format id, e.g. "gen9ou"
+            target_count: Battles to write
+            write: Called with each battle record, on the event loop thread
+            start_page: First search page
+            progress_every: Print a progress line every N battles (0 disables)
+            skip: Battle ids for which it returns True aren't fetched (already stored)
+            checkpoint: Called with the page a resumed scrape should start
+                from, whenever every battle before that page has been handled
+        """
+        if target_count <= 0:
+            return self.stats
+        pages = asyncio.Queue(maxsize=1)  # One page fetched ahead of the downloads
+        done = asyncio.Event()
+        seen = set()  # Listings shift as new replays arrive; fetch each id once
+        pending = {}  # Page -> downloads not yet finished
+        dispatching = start_page  # Page whose ids are being scheduled
+
+        def page_finished(page: int):
+            pending[page] -= 1
+            if pending[page] == 0:
+                del pending[page]
+                if checkpoint is not None:
+                    # Resume at the earliest page with unfinished downloads
+                    checkpoint(min(pending, default=dispatching))
+
+        async def page_producer():
+            page = start_page
+            while not done.is_set():
+                battle_ids = await self.fetch_search_page(tier, page)
+                await pages.put(battle_ids)
+                if not battle_ids:
+                    return
+                page += 1
+
+        async def download(battle_id: str, page: int, slots: asyncio.Semaphore):
+            # A download only counts towards its page once the battle is
+            # written or definitely unavailable: one cancelled at shutdown,
+            # or fetched after the target was reached, keeps its page (and
+            # the checkpoint) from moving on, so a later run fetches it
+            try:
+                battle = await self.fetch_battle(battle_id)
+            finally:
+                slots.release()
+            if battle is None:
+                page_finished(page)
+                return
+            if done.is_set():
+                return
+            write(battle)
+            page_finished(page)
+            self.stats.battles_written += 1
+            if progress_every and self.stats.battles_written % progress_every == 0:
+                print(f"  ✓ {self.stats.battles_written}/{target_count} | {self.stats.summary()}")
+            if self.stats.battles_written >= target_count:
+                done.set()
+
+        async def next_page() -> list[str] | None:
+            # The next prefetched page, or None once the target is reached
+            # (or the producer has failed, which re-raises here)
+            getter = asyncio.create_task(pages.get())
+            stopped = asyncio.create_task(done.wait())
+            await asyncio.wait({getter, stopped, producer}, return_when=asyncio.FIRST_COMPLETED)
+            stopped.cancel()
+            if getter.done():
+                return getter.result()
+            getter.cancel()
+            if producer.done() and not producer.cancelled() and producer.exception():
+                raise producer.exception()
+            return None
+
+        producer = asyncio.create_task(page_producer())
+        slots = asyncio.Semaphore(self.concurrency)
+        in_flight = set()
+        try:
+            while not done.is_set():
+                battle_ids = await next_page()
+                if battle_ids is None:
+                    break
+                if not battle_ids:
+                    print("No more battles in the search listing")
+                    break
+                page = dispatching
+                pending[page] = 1  # Held until every id is scheduled
+                for battle_id in battle_ids:
+                    if battle_id in seen or (skip is not None and skip(battle_id)):
+                        continue
+                    seen.add(battle_id)
+                    await slots.acquire()
+                    if done.is_set():
+                        slots.release()
+                        break
+                    pending[page] += 1
+                    task = asyncio.create_task(download(battle_id, page, slots))
+                    in_flight.add(task)
+                    task.add_done_callback(in_flight.discard)
+                else:
+                    dispatching = page + 1
+                page_finished(page)
+            if in_flight:
+                await asyncio.gather(*in_flight)
+        finally:
+            done.set()
+            producer.cancel()
+            for task in in_flight:
+                task.cancel()
+            await asyncio.gather(producer, *in_flight, return_exceptions=True)
+        return self.stats
@@ -0,0 +1,221 @@
+"""
+Resumable, deduplicated JSONL output for the scrapers.
+
+Next to the output file (e.g. battles_fast.jsonl) live two sidecars:
+
+    battles_fast.ids              one battle_id per committed line of the JSONL
+    battles_fast.checkpoint.json  committed sizes and the scraper's resume position
+
+Records are buffered and committed in batches: the JSONL and .ids are
+appended and fsynced, then the checkpoint is replaced atomically. A scrape
+killed at any point resumes from its last commit: anything written after it
+is truncated on the next open, and the position (search page or sequential
+id) is the one committed with the last stored battle.
+
+An output file without a checkpoint (from before this format, or written by
+hand) is indexed once on open; its records are kept.
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+
+from src.data import battles as battle_io
+
+OUTPUT_FORMAT_VERSION = 1
+
+
+class BattleOutput:
+    """Append-only battle JSONL with a battle_id index and a resume checkpoint."""
+
+    def __init__(self, path: Path, batch_size: int = 100, fsync_interval: float = 5.0, restart: bool = False):
+        """
+        Open an output file, creating it if needed.
+
+        Args:
+            path: JSONL output file
+            batch_size: Commit once this many records are buffered
+            fsync_interval: Commit buffered records at least this often (seconds)
+            restart: Discard the existing output and checkpoint
+        """
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.fsync_interval = fsync_interval
+        self._buffer = []
+        self._buffer_ids = set()
+        self._last_commit = time.monotonic()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        checkpoint = None if restart else self._read_checkpoint()
+        if restart:
+            self._reset()
+        elif checkpoint is None:
+            self._index_existing()
+        else:
+            self.n_battles = checkpoint["n_battles"]
+            self._data_bytes = checkpoint["data_bytes"]
+            self.position = checkpoint["position"]
+            self._load_index(checkpoint["index_bytes"])
+            self._truncate(checkpoint["index_bytes"])
+
+    @property
+    def _index_path(self) -> Path:
+        return self.path.with_suffix(".ids")
+
+    @property
+    def _checkpoint_path(self) -> Path:
+        return self.path.with_suffix(".checkpoint.json")
+
+    def _read_checkpoint(self) -> dict | None:
+        try:
+            checkpoint = json.loads(self._checkpoint_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+        if checkpoint.get("format_version") != OUTPUT_FORMAT_VERSION or not self.path.exists():
+            return None
+        return checkpoint
+
+    def _write_checkpoint(self):
+        checkpoint = {
+            "format_version": OUTPUT_FORMAT_VERSION,
+            "n_battles": self.n_battles,
+            "data_bytes": self._data_bytes,
+            "index_bytes": self._index_bytes,
+            "position": self.position,
+        }
+        tmp_path = self._checkpoint_path.with_name(f"{self._checkpoint_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(checkpoint, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._checkpoint_path)
+
+    def _reset(self):
+        for file_path in (self.path, self._index_path):
+            file_path.write_bytes(b"")
+        self.n_battles = 0
+        self._data_bytes = 0
+        self._index_bytes = 0
+        self._ids = set()
+        self.position = {}
+        self._write_checkpoint()
+
+    def _index_existing(self):
+        """Index an output file that has no checkpoint, dropping a partial last line."""
+        ids = []
+        data_bytes = 0
+        if self.path.exists():
+            loads = battle_io.get_json_decoder()
+            with open(self.path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    data_bytes += len(line)
+                    if line.strip():
+                        ids.append(battle_io.battle_key(loads(line)))
+            with open(self.path, "r+b") as f:
+                f.truncate(data_bytes)
+        else:
+            self.path.write_bytes(b"")
+
+        index_bytes = "".join(f"{battle_id}\n" for battle_id in ids).encode("utf-8")
+        self._index_path.write_bytes(index_bytes)
+        self.n_battles = len(ids)
+        self._data_bytes = data_bytes
+        self._index_bytes = len(index_bytes)
+        self._ids = set(ids)
+        self.position = {}
+        self._write_checkpoint()
+
+    def _load_index(self, index_bytes: int):
+        """Read the committed battle_ids."""
+        with open(self._index_path, "rb") as f:
+            lines = f.read(index_bytes).decode("utf-8").splitlines()
+        if len(lines) != self.n_battles:
+            raise ValueError(f"Battle index {self._index_path} is inconsistent with its checkpoint")
+        self._ids = set(lines)
+        self._index_bytes = index_bytes
+
+    def _truncate(self, index_bytes: int):
+        """Drop anything written after the last commit."""
+        for file_path, size in ((self.path, self._data_bytes), (self._index_path, index_bytes)):
+            if file_path.stat().st_size < size:
+                raise ValueError(f"{file_path} is shorter than its checkpoint")
+            if file_path.stat().st_size != size:
+                with open(file_path, "r+b") as f:
+                    f.truncate(size)
+
+    def __len__(self) -> int:
+        """Stored battles, buffered ones included."""
+        return self.n_battles + len(self._buffer)
+
+    def __contains__(self, battle_id: str) -> bool:
+        return battle_id in self._ids or battle_id in self._buffer_ids
+
+    def add(self, battle: dict) -> bool:
+        """
+        Buffer a battle record, committing if the batch is full or due.
+
+        Returns:
+            False if a battle with the same battle_id is already stored
+        """
+        battle_id = battle_io.battle_key(battle)
+        if battle_id in self or "\n" in battle_id:
+            return False
+        self._buffer.append((battle_id, json.dumps(battle) + "\n"))
+        self._buffer_ids.add(battle_id)
+        self._maybe_commit()
+        return True
+
+    def set_position(self, **position):
+        """Record where the scraper would resume; saved with the next commit."""
+        self.position = position
+        self._maybe_commit()
+
+    def _maybe_commit(self):
+        if len(self._buffer) >= self.batch_size or time.monotonic() - self._last_commit >= self.fsync_interval:
+            self.commit()
+
+    def commit(self):
+        """Write buffered records and the current position durably."""
+        data = "".join(line for _, line in self._buffer).encode("utf-8")
+        index_bytes = "".join(f"{battle_id}\n" for battle_id, _ in self._buffer).encode("utf-8")
+        for file_path, chunk in ((self.path, data), (self._index_path, index_bytes)):
+            with open(file_path, "ab") as f:
+                f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+
+        self.n_battles += len(self._buffer)
+        self._data_bytes += len(data)
+        self._index_bytes += len(index_bytes)
+        self._ids |= self._buffer_ids
+        self._buffer = []
+        self._buffer_ids = set()
+        self._write_checkpoint()
+        self._last_commit = time.monotonic()
+
+    def replace(self, new_file: Path):
+        """
+        Replace the output with a complete JSONL file (e.g. re-extracted), keeping the resume position.
+
+        The checkpoint is removed before the swap, so an interruption leaves
+        a file that is re-indexed on the next open.
+        """
+        self.commit()
+        position = self.position
+        self._checkpoint_path.unlink(missing_ok=True)
+        os.replace(new_file, self.path)
+        self._index_existing()
+        self.position = position
+        self._write_checkpoint()
+
+    def close(self):
+        self.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,168 @@
+"""
+Single-pass replay log parser.
+
+Only |player|, |poke| and |win| lines carry the fields we extract. One
+regex finds just those lines: it starts with a literal newline, so the
+scan skips through the log in C from line start to line start, and the few
+hundred move/damage lines in between are never split or turned into Python
+strings. Parsing stops at the |win| line that names a player, which is at
+the very end of the battle.
+
+Results match scrape_replays.extract_battle_data's line-by-line parse.
+"""
+
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Iterator
+
+from src.data import battles as battle_io
+
+DEFAULT_RATING = 1500  # When a |player| line has no numeric rating
+
+# |player|p1|name|avatar|rating, |poke|p1|Species, M|, |win|name. Anchoring
+# on "\n" rather than ^ with re.MULTILINE lets re use its fast literal
+# prefix search (about 4x faster on a typical log)
+_LINE_RE = re.compile(r"\n\|(player|poke|win)\|([^\n]*)")
+
+
+@dataclass(slots=True)
+class BattleRecord:
+    """The fields of one battle extracted from its replay."""
+
+    battle_id: str
+    p1_name: str | None
+    p2_name: str | None
+    p1_team: tuple[str, ...]
+    p2_team: tuple[str, ...]
+    winner: str  # "p1" or "p2"
+    p1_rating: int
+    p2_rating: int
+
+    def to_dict(self, timestamp: str = None) -> dict:
+        """The scrapers' JSONL record (timestamp defaults to now)."""
+        return {
+            'battle_id': self.battle_id,
+            'p1_name': self.p1_name,
+            'p2_name': self.p2_name,
+            'p1_team': list(self.p1_team),
+            'p2_team': list(self.p2_team),
+            'winner': self.winner,
+            'p1_rating': self.p1_rating,
+            'p2_rating': self.p2_rating,
+            'rating_diff': abs(self.p1_rating - self.p2_rating),
+            'timestamp': timestamp or datetime.now().isoformat(),
+        }
+
+
+def parse_log(log: str, battle_id: str = "", min_rating: int = 0) -> BattleRecord | None:
+    """
+    Extract players, teams and winner from a battle log.
+
+    Args:
+        log: The replay's "log" text
+        battle_id: Stored on the record
+        min_rating: Battles where either player is rated below this are rejected
+
+    Returns:
+        BattleRecord, or None without two 6-member teams, a winner, or the rating
+    """
+    p1_name = p2_name = None
+    p1_rating = p2_rating = DEFAULT_RATING
+    p1_team = []
+    p2_team = []
+    winner = None
+
+    for match in _LINE_RE.finditer("\n" + log):
+        kind, rest = match.groups()
+        if kind == 'poke':
+            parts = rest.split('|', 2)
+            if len(parts) < 2:
+                continue
+            if parts[0] == 'p1':
+                p1_team.append(parts[1].split(',', 1)[0])
+            elif parts[0] == 'p2':
+                p2_team.append(parts[1].split(',', 1)[0])
+        elif kind == 'player':
+            parts = rest.split('|')
+            if len(parts) < 4:
+                continue  # |player|p1| (player left) and other short forms
+            rating = int(parts[3]) if parts[3].isdigit() else DEFAULT_RATING
+            if parts[0] == 'p1':
+                p1_name, p1_rating = parts[1], rating
+            elif parts[0] == 'p2':
+                p2_name, p2_rating = parts[1], rating
+        else:
+            winner_name = rest.split('|', 1)[0]
+            if winner_name == p1_name:
+                winner = 'p1'
+            elif winner_name == p2_name:
+                winner = 'p2'
+            if winner is not None:
+                break  # Nothing after the result changes the record
+
+    if len(p1_team) != 6 or len(p2_team) != 6 or winner is None:
+        return None
+    if p1_rating < min_rating or p2_rating < min_rating:
+        return None
+    return BattleRecord(battle_id, p1_name, p2_name, tuple(p1_team), tuple(p2_team), winner, p1_rating, p2_rating)
+
+
+def parse_replay(replay: dict, min_rating: int = 0) -> BattleRecord | None:
+    """parse_log of a replay JSON object (as served by /{battle_id}.json)."""
+    return parse_log(replay.get('log', ''), replay.get('id', ''), min_rating)
+
+
+def parse_replay_batch(raw_replays: Iterable, min_rating: int = 0, json_backend: str = "auto") -> list:
+    """
+    Parse many replays: raw JSON bytes/str (decoded here) or already-decoded dicts.
+
+    Returns:
+        A BattleRecord or None per replay, in order
+    """
+    loads = battle_io.get_json_decoder(json_backend)
+    records = []
+    for raw in raw_replays:
+        replay = raw if isinstance(raw, dict) else loads(raw)
+        records.append(parse_replay(replay, min_rating))
+    return records
+
+
+_worker_state = {}
+
+
+def _init_worker(min_rating: int, json_backend: str):
+    _worker_state["min_rating"] = min_rating
+    _worker_state["json_backend"] = json_backend
+
+
+def _parse_chunk(raw_replays: list) -> list:
+    return parse_replay_batch(raw_replays, _worker_state["min_rating"], _worker_state["json_backend"])
+
+
+def iter_parse_parallel(
+    chunks: Iterable[list], workers: int = 1, min_rating: int = 0, json_backend: str = "auto"
+) -> Iterator[list]:
+    """
+    parse_replay_batch over chunks of raw replays, in order, on worker processes.
+
+    Raw bytes are what cross the process boundary, so decoding and parsing
+    both happen in the workers. At most 2 * workers chunks are in flight, so
+    chunks can be streamed from disk. workers <= 1 parses in this process.
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield parse_replay_batch(chunk, min_rating, json_backend)
+        return
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(min_rating, json_backend)
+    ) as executor:
+        pending = deque()
+        for chunk in chunks:
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+            pending.append(executor.submit(_parse_chunk, chunk))
+        while pending:
+            yield pending.popleft().result()
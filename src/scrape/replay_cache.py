@@ -0,0 +1,309 @@
+"""
+Local store of raw replay JSON, so parsing can be redone without the network.
+
+A cache is a directory:
+
+    meta.json           committed counts/sizes and the codec
+    index.tsv           one "battle_id<TAB>sha1<TAB>segment<TAB>offset<TAB>length<TAB>fetched" line per replay
+    segment-00000.gz    compressed replays, appended (.zst with the zstd codec)
+
+Each replay is compressed on its own (one gzip member or zstd frame), so a
+record can be read back from its offset alone, and a segment is still a
+valid .gz/.zst stream (zcat works). Replays are addressed by the SHA-1 of
+their raw bytes: identical content is stored once, however many battle_ids
+point to it. Segments roll over at max_segment_bytes.
+
+Commits follow the feature store: segment data and index lines are
+appended and fsynced, then meta.json is replaced atomically. Anything after
+the last commit is truncated on the next open.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import time
+import zlib
+from pathlib import Path
+from typing import Iterator
+
+from src.data import battles as battle_io
+
+try:
+    import zstandard
+except ImportError:  # Optional, smaller and faster than gzip
+    zstandard = None
+
+CACHE_FORMAT_VERSION = 1
+
+DEFAULT_REPLAY_CACHE_PATH = Path(__file__).parents[2] / "data" / "cache" / "replays"
+
+CODECS = ("auto", "gzip", "zstd")
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 10
+
+
+def _resolve_codec(codec: str) -> str:
+    if codec not in CODECS:
+        raise ValueError(f"Unknown codec {codec!r}, expected one of {CODECS}")
+    if codec == "zstd" and zstandard is None:
+        raise ImportError("zstandard is not installed")
+    if codec == "auto":
+        return "zstd" if zstandard is not None else "gzip"
+    return codec
+
+
+class ReplayCache:
+    """Append-only, compressed raw replay store keyed by battle_id."""
+
+    def __init__(
+        self,
+        path: Path = None,
+        codec: str = "auto",
+        max_segment_bytes: int = 256 * 1024 * 1024,
+        batch_size: int = 100,
+        fsync_interval: float = 5.0,
+    ):
+        """
+        Open a cache, creating it if needed.
+
+        Args:
+            path: Cache directory (default: data/cache/replays)
+            codec: "gzip", "zstd" or "auto" (zstd if installed); only used
+                when creating the cache, an existing one keeps its codec
+            max_segment_bytes: Start a new segment file past this size
+            batch_size: Commit once this many replays are buffered
+            fsync_interval: Commit buffered replays at least this often (seconds)
+        """
+        self.path = Path(path or DEFAULT_REPLAY_CACHE_PATH)
+        self.max_segment_bytes = max_segment_bytes
+        self.batch_size = batch_size
+        self.fsync_interval = fsync_interval
+        self._pending = []  # (battle_id, sha1, segment, offset, blob or None, fetched)
+        self._pending_blobs = {}  # sha1 -> blob not yet written
+        self._last_commit = time.monotonic()
+        self._readers = {}
+
+        meta = self._read_meta()
+        if meta is None:
+            self._reset(_resolve_codec(codec))
+        else:
+            self.codec = meta["codec"]
+            if self.codec == "zstd" and zstandard is None:
+                raise ImportError(f"Replay cache at {self.path} uses zstd, but zstandard is not installed")
+            self.n_replays = meta["n_replays"]
+            self._index_bytes = meta["index_bytes"]
+            self._segment = meta["segment"]
+            self._segment_bytes = meta["segment_bytes"]
+            self._load_index()
+            self._truncate()
+        self._init_codec()
+
+    @property
+    def _meta_path(self) -> Path:
+        return self.path / "meta.json"
+
+    @property
+    def _index_path(self) -> Path:
+        return self.path / "index.tsv"
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.path / f"segment-{segment:05d}.{'zst' if self.codec == 'zstd' else 'gz'}"
+
+    def _init_codec(self):
+        if self.codec == "zstd":
+            self._compress = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress
+            self._decompress = zstandard.ZstdDecompressor().decompress
+        else:
+            self._compress = lambda data: gzip.compress(data, GZIP_LEVEL, mtime=0)
+            self._decompress = lambda blob: zlib.decompress(blob, 31)  # 31: gzip header
+
+    def _read_meta(self) -> dict | None:
+        try:
+            meta = json.loads(self._meta_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+        return meta if meta.get("format_version") == CACHE_FORMAT_VERSION else None
+
+    def _write_meta(self):
+        meta = {
+            "format_version": CACHE_FORMAT_VERSION,
+            "codec": self.codec,
+            "n_replays": self.n_replays,
+            "index_bytes": self._index_bytes,
+            "segment": self._segment,
+            "segment_bytes": self._segment_bytes,
+        }
+        tmp_path = self._meta_path.with_name(f"meta.json.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._meta_path)
+
+    def _reset(self, codec: str):
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.codec = codec
+        for segment_path in self.path.glob("segment-*"):
+            segment_path.unlink()
+        self._index_path.write_bytes(b"")
+        self.n_replays = 0
+        self._index_bytes = 0
+        self._segment = 0
+        self._segment_bytes = 0
+        self._entries = {}
+        self._by_hash = {}
+        self._write_meta()
+
+    def _load_index(self):
+        """Read the committed index into battle_id -> entry and sha1 -> location maps."""
+        self._entries = {}
+        self._by_hash = {}
+        with open(self._index_path, "rb") as f:
+            lines = f.read(self._index_bytes).decode("utf-8").splitlines()
+        if len(lines) != self.n_replays:
+            raise ValueError(f"Replay cache index at {self.path} is inconsistent with meta.json")
+        for line in lines:
+            battle_id, sha1, segment, offset, length, fetched = line.split("\t")
+            location = (int(segment), int(offset), int(length))
+            self._entries[battle_id] = (sha1, location, int(fetched))
+            self._by_hash[sha1] = location
+
+    def _truncate(self):
+        """Drop anything written after the last commit."""
+        sizes = {self._index_path: self._index_bytes, self._segment_path(self._segment): self._segment_bytes}
+        for file_path, size in sizes.items():
+            if not file_path.exists():
+                file_path.write_bytes(b"")
+            if file_path.stat().st_size != size:
+                with open(file_path, "r+b") as f:
+                    f.truncate(size)
+        for segment_path in self.path.glob("segment-*"):
+            if int(segment_path.stem.split("-")[1]) > self._segment:
+                segment_path.unlink()
+
+    def __len__(self) -> int:
+        """Replays stored, buffered ones included."""
+        return len(self._entries)
+
+    def __contains__(self, battle_id: str) -> bool:
+        return battle_id in self._entries
+
+    def put(self, battle_id: str, raw: bytes, fetched: float = None) -> bool:
+        """
+        Buffer a raw replay, committing if the batch is full or due.
+
+        Args:
+            battle_id: Replay id (e.g. "gen9ou-2466685514")
+            raw: Response body as received
+            fetched: Unix time it was fetched (default: now)
+
+        Returns:
+            False if the battle_id is already stored
+        """
+        if battle_id in self._entries or "\t" in battle_id or "\n" in battle_id:
+            return False
+        sha1 = hashlib.sha1(raw).hexdigest()
+        blob = None
+        if sha1 in self._by_hash:
+            location = self._by_hash[sha1]
+        else:
+            blob = self._compress(raw)
+            if self._segment_bytes > 0 and self._segment_bytes + len(blob) > self.max_segment_bytes:
+                self.commit()
+                self._segment += 1
+                self._segment_bytes = 0
+            location = (self._segment, self._segment_bytes, len(blob))
+            self._segment_bytes += len(blob)
+            self._by_hash[sha1] = location
+            self._pending_blobs[sha1] = blob
+
+        fetched = int(fetched if fetched is not None else time.time())
+        self._entries[battle_id] = (sha1, location, fetched)
+        self._pending.append((battle_id, sha1, location, blob, fetched))
+        if len(self._pending) >= self.batch_size or time.monotonic() - self._last_commit >= self.fsync_interval:
+            self.commit()
+        return True
+
+    def commit(self):
+        """Write buffered replays durably."""
+        if not self._pending:
+            self._last_commit = time.monotonic()
+            return
+        data = b"".join(blob for _, _, _, blob, _ in self._pending if blob is not None)
+        index_lines = "".join(
+            f"{battle_id}\t{sha1}\t{segment}\t{offset}\t{length}\t{fetched}\n"
+            for battle_id, sha1, (segment, offset, length), _, fetched in self._pending
+        ).encode("utf-8")
+
+        # All new blobs are in the current segment (put commits before rolling)
+        for file_path, chunk in ((self._segment_path(self._segment), data), (self._index_path, index_lines)):
+            with open(file_path, "ab") as f:
+                f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+
+        self.n_replays += len(self._pending)
+        self._index_bytes += len(index_lines)
+        self._pending = []
+        self._pending_blobs = {}
+        self._write_meta()
+        self._last_commit = time.monotonic()
+
+    def _read_blob(self, sha1: str, location: tuple[int, int, int]) -> bytes:
+        if sha1 in self._pending_blobs:
+            return self._pending_blobs[sha1]
+        segment, offset, length = location
+        reader = self._readers.get(segment)
+        if reader is None:
+            reader = self._readers[segment] = open(self._segment_path(segment), "rb")
+        reader.seek(offset)
+        return reader.read(length)
+
+    def get(self, battle_id: str) -> bytes | None:
+        """Raw replay bytes, or None if not cached."""
+        entry = self._entries.get(battle_id)
+        if entry is None:
+            return None
+        sha1, location, _ = entry
+        return self._decompress(self._read_blob(sha1, location))
+
+    def get_replay(self, battle_id: str, json_backend: str = "auto") -> dict | None:
+        """Decoded replay JSON, or None if not cached."""
+        raw = self.get(battle_id)
+        return battle_io.get_json_decoder(json_backend)(raw) if raw is not None else None
+
+    def iter_raw(self) -> Iterator[tuple[str, bytes, int]]:
+        """
+        Yield (battle_id, raw bytes, fetched unix time) for every committed replay.
+
+        Replays come in storage order, read sequentially segment by segment.
+        """
+        self.commit()
+        entries = sorted(self._entries.items(), key=lambda item: item[1][1])
+        current, f = None, None
+        try:
+            for battle_id, (_, (segment, offset, length), fetched) in entries:
+                if segment != current:
+                    if f is not None:
+                        f.close()
+                    f = open(self._segment_path(segment), "rb")
+                    current = segment
+                f.seek(offset)
+                yield battle_id, self._decompress(f.read(length)), fetched
+        finally:
+            if f is not None:
+                f.close()
+
+    def close(self):
+        self.commit()
+        for reader in self._readers.values():
+            reader.close()
+        self._readers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
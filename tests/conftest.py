@@ -0,0 +1,65 @@
+"""Shared fixtures: the bundled data snapshot and teams drawn from its dex."""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.data.snapshot import load_snapshot  # noqa: E402
+from src.features.coverage import CoverageAnalyzer  # noqa: E402
+from src.features.meta import MetaAnalyzer  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def snapshot():
+    return load_snapshot()
+
+
+@pytest.fixture(scope="session")
+def pokedex(snapshot):
+    return snapshot.pokedex
+
+
+@pytest.fixture(scope="session")
+def coverage_analyzer(snapshot):
+    return CoverageAnalyzer(snapshot.type_chart, snapshot.pokedex)
+
+
+@pytest.fixture(scope="session")
+def meta_analyzer(snapshot):
+    return MetaAnalyzer(snapshot.type_chart, snapshot.pokedex, snapshot.usage_stats)
+
+
+@pytest.fixture(scope="session")
+def team_ids(pokedex):
+    """(N, 6) species ids: the valid teams of the scraped battles, then random teams of distinct species."""
+    from src.data import battles as battle_io
+
+    scraped = []
+    for battle in battle_io.iter_battles(REPO_ROOT / "data" / "replays" / "battles_fast.jsonl"):
+        scraped.extend((battle["p1_team"], battle["p2_team"]))
+        if len(scraped) >= 400:
+            break
+    ids = pokedex.encode_teams(scraped)
+    ids = ids[(ids >= 0).all(axis=1)]
+
+    rng = np.random.default_rng(0)
+    sampled = np.array([rng.choice(len(pokedex), 6, replace=False) for _ in range(200)], dtype=np.intp)
+    return np.concatenate([ids, sampled])
+
+
+@pytest.fixture(scope="session")
+def team_ids_with_invalid(team_ids):
+    """team_ids with every third row replaced by an invalid (-1) row."""
+    ids = team_ids.copy()
+    ids[::3] = -1
+    return ids
+
+
+def members(pokedex, ids) -> list:
+    """Pokemon views of one row of species ids."""
+    return [pokedex.get_by_id(int(species_id)) for species_id in ids]
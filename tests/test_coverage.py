@@ -0,0 +1,33 @@
+"""CoverageAnalyzer.score_teams against the per-team methods."""
+
+import numpy as np
+
+from conftest import members
+
+
+def test_score_teams_matches_scalar(pokedex, coverage_analyzer, team_ids):
+    coverage = coverage_analyzer.score_teams(team_ids)
+    types = coverage_analyzer.type_chart.types
+
+    for row, ids in enumerate(team_ids):
+        team = members(pokedex, ids)
+        assert coverage.offensive[row] == coverage_analyzer.offensive_coverage_score(team)
+        assert coverage.defensive[row] == coverage_analyzer.defensive_coverage_score(team)
+        assert coverage.combined[row] == coverage_analyzer.type_coverage_score(team)
+
+        weaknesses = coverage_analyzer.get_team_weaknesses(team)
+        resistances = coverage_analyzer.get_team_resistances(team)
+        assert coverage.weaknesses[row].tolist() == [weaknesses.get(t, 0) for t in types]
+        assert coverage.resistances[row].tolist() == [resistances.get(t, 0) for t in types]
+
+
+def test_score_teams_invalid_rows(coverage_analyzer, team_ids, team_ids_with_invalid):
+    coverage = coverage_analyzer.score_teams(team_ids_with_invalid)
+    expected = coverage_analyzer.score_teams(team_ids)
+    invalid = (team_ids_with_invalid < 0).any(axis=1)
+
+    assert np.isnan(coverage.combined[invalid]).all()
+    assert np.isnan(coverage.offensive[invalid]).all()
+    assert (coverage.weaknesses[invalid] == -1).all()
+    assert np.array_equal(coverage.combined[~invalid], expected.combined[~invalid])
+    assert np.array_equal(coverage.weaknesses[~invalid], expected.weaknesses[~invalid])
@@ -0,0 +1,42 @@
+"""TeamEvaluator's incremental scores against the analyzers' per-team methods."""
+
+import numpy as np
+
+from conftest import members
+from src.features.evaluator import TeamEvaluator, TeamScores
+from src.features.roles import RoleDetector
+
+
+def scalar_scores(pokedex, coverage_analyzer, meta_analyzer, ids) -> TeamScores:
+    team = members(pokedex, ids)
+    return TeamScores(
+        type_score=coverage_analyzer.type_coverage_score(team),
+        meta_score=meta_analyzer.meta_coverage_score(team),
+        role_score=RoleDetector.role_diversity_score(team),
+    )
+
+
+def test_scores_match_analyzers(pokedex, coverage_analyzer, meta_analyzer, team_ids):
+    for ids in team_ids[:100]:
+        evaluator = TeamEvaluator(coverage_analyzer, meta_analyzer, ids)
+        assert evaluator.scores() == scalar_scores(pokedex, coverage_analyzer, meta_analyzer, ids)
+
+
+def test_moves_match_rescoring(pokedex, coverage_analyzer, meta_analyzer, team_ids):
+    rng = np.random.default_rng(1)
+    evaluator = TeamEvaluator(coverage_analyzer, meta_analyzer, team_ids[0])
+    for _ in range(300):
+        slot = int(rng.integers(6))
+        species_id = int(rng.integers(len(pokedex)))
+        candidate = list(evaluator.members)
+        candidate[slot] = species_id
+        expected = scalar_scores(pokedex, coverage_analyzer, meta_analyzer, candidate)
+
+        assert evaluator.evaluate_swap(slot, species_id) == expected
+        if rng.random() < 0.5:
+            evaluator.swap(slot, species_id)
+        else:
+            evaluator.remove(slot)
+            evaluator.add(species_id)
+        assert sorted(evaluator.members) == sorted(candidate)
+        assert evaluator.scores() == expected
@@ -0,0 +1,30 @@
+"""MatchupTable batch features against a pairwise reference."""
+
+import numpy as np
+
+from conftest import members
+from src.features.matchup import SPEED_TIER_MARGIN, MatchupTable
+
+
+def reference_features(meta_analyzer, team, opponent) -> list[float]:
+    """The MATCHUP_FEATURE_NAMES columns from team's side, one member pair at a time."""
+    pairs = [(mon, opp) for mon in team for opp in opponent]
+    return [
+        float(sum(meta_analyzer.has_check(team, opp) for opp in opponent)),
+        float(sum(meta_analyzer.has_check(opponent, mon) for mon in team)),
+        sum(mon.speed > opp.speed for mon, opp in pairs) / len(pairs),
+        sum(abs(mon.speed - opp.speed) <= SPEED_TIER_MARGIN for mon, opp in pairs) / len(pairs),
+    ]
+
+
+def test_battle_features_match_pairwise(pokedex, meta_analyzer, team_ids):
+    table = MatchupTable(meta_analyzer)
+    p1_ids, p2_ids = team_ids[0::2], team_ids[1::2]
+    n = min(len(p1_ids), len(p2_ids))
+    p1_features, p2_features = table.battle_features(p1_ids[:n], p2_ids[:n])
+
+    for row in range(n):
+        p1_team, p2_team = members(pokedex, p1_ids[row]), members(pokedex, p2_ids[row])
+        assert np.allclose(p1_features[row], reference_features(meta_analyzer, p1_team, p2_team), rtol=0, atol=1e-12)
+        assert np.allclose(p2_features[row], reference_features(meta_analyzer, p2_team, p1_team), rtol=0, atol=1e-12)
+        assert np.array_equal(table.matchup_features(p1_team, p2_team), p1_features[row])
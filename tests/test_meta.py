@@ -0,0 +1,47 @@
+"""MetaAnalyzer.meta_coverage_scores against meta_coverage_score."""
+
+import numpy as np
+import pytest
+
+from conftest import members
+from src.data.pokedex import Pokedex
+
+
+@pytest.fixture(scope="module")
+def separate_dex():
+    """The same species in another Pokedex: teams from it take has_check's pairwise heuristic path."""
+    return Pokedex()
+
+
+def separate_members(pokedex, separate_dex, ids) -> list:
+    return [separate_dex.get(pokedex.names[species_id]) for species_id in ids]
+
+
+@pytest.mark.parametrize("top_k", [5, 15])
+def test_meta_coverage_scores_match_scalar(pokedex, meta_analyzer, team_ids, top_k):
+    scores = meta_analyzer.meta_coverage_scores(team_ids, top_k=top_k)
+    expected = [meta_analyzer.meta_coverage_score(members(pokedex, ids), top_k=top_k) for ids in team_ids]
+    assert scores.tolist() == expected
+
+
+def test_meta_coverage_scores_match_pairwise_heuristic(pokedex, separate_dex, meta_analyzer, team_ids):
+    scores = meta_analyzer.meta_coverage_scores(team_ids)
+    expected = [meta_analyzer.meta_coverage_score(separate_members(pokedex, separate_dex, ids)) for ids in team_ids]
+    assert scores.tolist() == expected
+
+
+def test_check_matrix_matches_has_check(pokedex, separate_dex, meta_analyzer):
+    _, threat_ids, _, _ = meta_analyzer.top_threats(15)
+    for species_id in range(len(pokedex)):
+        mon = separate_members(pokedex, separate_dex, [species_id])
+        for threat_id in threat_ids:
+            assert meta_analyzer.check_matrix[species_id, threat_id] == meta_analyzer.has_check(
+                mon, pokedex.get_by_id(int(threat_id))
+            )
+
+
+def test_meta_coverage_scores_invalid_rows(meta_analyzer, team_ids, team_ids_with_invalid):
+    scores = meta_analyzer.meta_coverage_scores(team_ids_with_invalid)
+    invalid = (team_ids_with_invalid < 0).any(axis=1)
+    assert np.isnan(scores[invalid]).all()
+    assert np.array_equal(scores[~invalid], meta_analyzer.meta_coverage_scores(team_ids)[~invalid])
@@ -0,0 +1,136 @@
+"""The single-pass replay parser against the original line-splitting parse."""
+
+import json
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic_battles import SAMPLE_REPLAY, ReplayRenderer
+from src.scrape.parser import parse_replay, parse_replay_batch
+
+
+def reference_parse(replay: dict, min_rating: int = 0) -> dict | None:
+    """scrape_replays.extract_battle_data as it was: split the log, then every line."""
+    p1_name = p2_name = None
+    p1_rating = p2_rating = 1500
+    p1_team, p2_team = [], []
+    winner = None
+    for line in replay.get('log', '').split('\n'):
+        parts = line.split('|')
+        if len(parts) > 1 and parts[0] == '' and parts[1] == 'player':
+            if len(parts) < 6:
+                continue
+            rating = int(parts[5]) if parts[5].isdigit() else 1500
+            if parts[2] == 'p1':
+                p1_name, p1_rating = parts[3], rating
+            elif parts[2] == 'p2':
+                p2_name, p2_rating = parts[3], rating
+        elif len(parts) > 3 and parts[0] == '' and parts[1] == 'poke':
+            if parts[2] == 'p1':
+                p1_team.append(parts[3].split(',')[0])
+            elif parts[2] == 'p2':
+                p2_team.append(parts[3].split(',')[0])
+        elif len(parts) > 2 and parts[0] == '' and parts[1] == 'win':
+            if parts[2] == p1_name:
+                winner = 'p1'
+            elif parts[2] == p2_name:
+                winner = 'p2'
+    if len(p1_team) != 6 or len(p2_team) != 6 or not winner:
+        return None
+    if p1_rating < min_rating or p2_rating < min_rating:
+        return None
+    return {
+        'battle_id': replay.get('id', ''),
+        'p1_name': p1_name,
+        'p2_name': p2_name,
+        'p1_team': p1_team,
+        'p2_team': p2_team,
+        'winner': winner,
+        'p1_rating': p1_rating,
+        'p2_rating': p2_rating,
+        'rating_diff': abs(p1_rating - p2_rating),
+    }
+
+
+def parsed(replay: dict, min_rating: int = 0) -> dict | None:
+    record = parse_replay(replay, min_rating)
+    if record is None:
+        return None
+    record = record.to_dict()
+    del record['timestamp']
+    return record
+
+
+@pytest.fixture(scope="module")
+def sample_replay() -> dict:
+    return json.loads(SAMPLE_REPLAY.read_text())
+
+
+@pytest.fixture(scope="module")
+def rendered_replays(pokedex) -> list[dict]:
+    """Synthetic battles rendered into sample_replay.json's log."""
+    renderer = ReplayRenderer()
+    rng = np.random.default_rng(0)
+    replays = []
+    for i in range(200):
+        teams = rng.choice(len(pokedex), 12, replace=False)
+        battle = {
+            'battle_id': f'gen9ou-{i}',
+            'p1_name': f'player {i}',
+            'p2_name': f'rival-{i}',
+            'p1_team': [pokedex.names[species_id] for species_id in teams[:6]],
+            'p2_team': [pokedex.names[species_id] for species_id in teams[6:]],
+            'winner': 'p1' if rng.random() < 0.5 else 'p2',
+            'p1_rating': int(rng.integers(900, 2000)),
+            'p2_rating': int(rng.integers(900, 2000)),
+        }
+        replays.append(renderer.render(battle))
+    return replays
+
+
+def mutations(replay: dict) -> list[dict]:
+    """Variants of a replay that exercise the rejection and fallback paths."""
+    log = replay['log']
+    lines = log.split('\n')
+    first_poke = next(i for i, line in enumerate(lines) if line.startswith('|poke|'))
+    win = next(i for i, line in enumerate(lines) if line.startswith('|win|'))
+    p1_player = next(line for line in lines if line.startswith('|player|p1|'))
+    variants = [
+        lines[:first_poke] + lines[first_poke + 1 :],  # 5 members
+        lines[:win] + lines[win + 1 :],  # No result
+        lines[:win] + ['|win|someone else'] + lines[win + 1 :],  # Winner isn't a player
+        [line.replace(p1_player, '|player|p1|renamed|1|') for line in lines],  # Unrated, winner may not match
+        [line for line in lines if not line.startswith('|player|p2|')],  # No p2 player line
+        lines + ['|player|p1|', '|player|p2|'],  # Players leaving after the result
+        lines[win:] + lines[:win],  # Result first
+    ]
+    return [{**replay, 'log': '\n'.join(variant)} for variant in variants] + [
+        {**replay, 'log': log + '\n'},
+        {**replay, 'log': ''},
+        {key: value for key, value in replay.items() if key != 'log'},
+    ]
+
+
+def test_sample_replay(sample_replay):
+    assert parsed(sample_replay) is not None
+    assert parsed(sample_replay) == reference_parse(sample_replay)
+    for min_rating in (0, 1200, 5000):
+        assert parsed(sample_replay, min_rating) == reference_parse(sample_replay, min_rating)
+
+
+def test_rendered_replays(rendered_replays):
+    for replay in rendered_replays:
+        assert parsed(replay) == reference_parse(replay)
+        assert parsed(replay, 1500) == reference_parse(replay, 1500)
+
+
+def test_mutated_replays(sample_replay, rendered_replays):
+    for replay in [sample_replay] + rendered_replays[:20]:
+        for variant in mutations(replay):
+            assert parsed(variant) == reference_parse(variant)
+
+
+def test_parse_replay_batch(rendered_replays):
+    raw = [json.dumps(replay).encode() for replay in rendered_replays[:50]]
+    records = parse_replay_batch(raw, min_rating=1200)
+    assert records == [parse_replay(replay, 1200) for replay in rendered_replays[:50]]
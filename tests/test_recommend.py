@@ -0,0 +1,71 @@
+"""recommend_trios' branch-and-bound search against scoring every trio."""
+
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from src.features.recommend import DEFAULT_WEIGHTS, recommend_trios
+from src.features.roles import RoleDetector
+
+CORES = [
+    ["Great Tusk", "Kingambit", "Gholdengo"],
+    ["Dragapult", "Dragonite", "Ogerpon-Wellspring"],
+]
+
+
+def brute_force(pokedex, coverage_analyzer, meta_analyzer, core: list[str], weights: dict, top_k: int = 15):
+    """Weighted scores of the core plus every trio of other species, best first."""
+    core_ids = [pokedex.id_of(name) for name in core]
+    others = [species_id for species_id in range(len(pokedex)) if species_id not in core_ids]
+    trios = np.array(list(combinations(others, 3)), dtype=np.intp)
+    teams = np.hstack([np.tile(core_ids, (len(trios), 1)), trios])
+
+    scores = (
+        weights["type_score"] * coverage_analyzer.score_teams(teams).combined
+        + weights["meta_score"] * meta_analyzer.meta_coverage_scores(teams, top_k)
+        + weights["role_score"] * RoleDetector.role_diversity_scores(pokedex, teams)
+    )
+    order = np.argsort(-scores, kind="stable")
+    return scores[order], trios[order]
+
+
+@pytest.mark.parametrize("core", CORES)
+@pytest.mark.parametrize("weights", [DEFAULT_WEIGHTS, {"type_score": 1.0, "meta_score": 0.0, "role_score": 0.5}])
+def test_matches_brute_force(pokedex, coverage_analyzer, meta_analyzer, core, weights):
+    top_m = 10
+    result = recommend_trios(core, top_m=top_m, weights=weights)
+    scores, trios = brute_force(pokedex, coverage_analyzer, meta_analyzer, core, weights)
+
+    assert result.complete
+    found = [rec.score for rec in result.recommendations]
+    assert np.allclose(found, scores[:top_m], rtol=0, atol=1e-12)
+    # Every returned trio really has its score, and every strictly better trio is returned
+    by_trio = {tuple(sorted(trio)): score for trio, score in zip(trios.tolist(), scores)}
+    returned = set()
+    for rec in result.recommendations:
+        trio = tuple(sorted(pokedex.id_of(name) for name in rec.trio))
+        assert by_trio[trio] == pytest.approx(rec.score, abs=1e-12)
+        returned.add(trio)
+    for trio, score in zip(trios.tolist(), scores):
+        if score > found[-1] + 1e-12:
+            assert tuple(sorted(trio)) in returned
+
+
+def test_workers_match_in_process(pokedex):
+    core = CORES[0]
+    serial = recommend_trios(core, top_m=10)
+    parallel = recommend_trios(core, top_m=10, workers=2)
+    assert parallel.complete
+    assert [rec.score for rec in parallel.recommendations] == [rec.score for rec in serial.recommendations]
+
+
+def test_time_budget_returns_partial_results():
+    result = recommend_trios(CORES[0], top_m=5, workers=2, time_budget=0.0)
+    assert not result.complete
+    assert result.elapsed < 5.0
+
+
+def test_negative_weights_rejected():
+    with pytest.raises(ValueError):
+        recommend_trios(CORES[0], weights={"meta_score": -1.0})
@@ -0,0 +1,49 @@
+"""RoleDetector batch scoring against the per-team methods and a learnset reference."""
+
+import numpy as np
+
+from conftest import members
+from src.features import roles
+from src.features.roles import ROLE_POPCOUNT, RoleDetector
+
+
+def reference_roles(mon) -> set[str]:
+    """Roles read straight from the learnset and speed, as detect_roles is defined."""
+    found = set()
+    if any(move in mon.learnset for move in roles.HAZARD_MOVES):
+        found.add("hazard_setter")
+    if any(move in mon.learnset for move in roles.REMOVAL_MOVES):
+        found.add("hazard_removal")
+    if any(move in mon.learnset for move in roles.PIVOT_MOVES):
+        found.add("pivot")
+    if mon.speed >= roles.FAST_SPEED_THRESHOLD or any(move in mon.learnset for move in roles.PRIORITY_MOVES):
+        found.add("speed_control")
+    return found
+
+
+def test_detect_roles_matches_learnsets(pokedex):
+    for species_id in range(len(pokedex)):
+        mon = pokedex.get_by_id(species_id)
+        assert RoleDetector.detect_roles(mon) == reference_roles(mon)
+
+
+def test_role_diversity_scores_match_scalar(pokedex, team_ids):
+    scores = RoleDetector.role_diversity_scores(pokedex, team_ids)
+    expected = [RoleDetector.role_diversity_score(members(pokedex, ids)) for ids in team_ids]
+    assert scores.tolist() == expected
+
+
+def test_team_role_masks_match_scalar(pokedex, team_ids):
+    masks = RoleDetector.team_role_masks(pokedex, team_ids)
+    for mask, ids in zip(masks.tolist(), team_ids):
+        team = members(pokedex, ids)
+        assert mask == RoleDetector.team_role_mask(team)
+        assert RoleDetector.roles_from_mask(mask) == set().union(*(reference_roles(mon) for mon in team))
+    assert RoleDetector.role_counts(pokedex, team_ids).tolist() == ROLE_POPCOUNT[masks].tolist()
+
+
+def test_role_diversity_scores_invalid_rows(pokedex, team_ids, team_ids_with_invalid):
+    scores = RoleDetector.role_diversity_scores(pokedex, team_ids_with_invalid)
+    invalid = (team_ids_with_invalid < 0).any(axis=1)
+    assert np.isnan(scores[invalid]).all()
+    assert np.array_equal(scores[~invalid], RoleDetector.role_diversity_scores(pokedex, team_ids)[~invalid])
@@ -0,0 +1,64 @@
+"""FeatureStore incremental updates against extracting from scratch."""
+
+import json
+
+import numpy as np
+import pytest
+
+from conftest import REPO_ROOT
+from src.features.store import FeatureStore, feature_version
+
+
+@pytest.fixture(scope="module")
+def records() -> list[dict]:
+    with open(REPO_ROOT / "data" / "replays" / "battles_fast.jsonl") as f:
+        return [json.loads(line) for _, line in zip(range(300), f)]
+
+
+def write_battles(path, records):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+    return path
+
+
+def fresh_dataset(tmp_path, battles_file, snapshot, analyzers):
+    store = FeatureStore(tmp_path / "fresh", feature_version(snapshot))
+    store.update(battles_file, snapshot.pokedex, *analyzers)
+    return store.dataset()
+
+
+def test_update_follows_the_battles_file(tmp_path, snapshot, coverage_analyzer, meta_analyzer, records):
+    analyzers = (coverage_analyzer, meta_analyzer)
+    battles_file = write_battles(tmp_path / "battles.jsonl", records)
+    version = feature_version(snapshot)
+    store = FeatureStore(tmp_path / "store", version)
+    assert store.update(battles_file, snapshot.pokedex, *analyzers) == len({r["battle_id"] for r in records})
+
+    changed = [dict(record) for record in records[:200]]
+    changed[0]["winner"] = "p1" if changed[0]["winner"] == "p2" else "p2"
+    changed[1]["timestamp"] = "2030-01-01T00:00:00"  # Not part of the content hash
+    write_battles(battles_file, changed)
+
+    store = FeatureStore(tmp_path / "store", version)
+    assert store.update(battles_file, snapshot.pokedex, *analyzers) == 1
+    X, y = store.dataset()
+    X_fresh, y_fresh = fresh_dataset(tmp_path, battles_file, snapshot, analyzers)
+    assert np.array_equal(X, X_fresh) and np.array_equal(y, y_fresh)
+    assert store.n_rows > len(X)  # Stale rows stay until they outnumber the live ones
+
+
+def test_prune_drops_stale_rows(tmp_path, snapshot, coverage_analyzer, meta_analyzer, records):
+    analyzers = (coverage_analyzer, meta_analyzer)
+    battles_file = write_battles(tmp_path / "battles.jsonl", records)
+    version = feature_version(snapshot)
+    FeatureStore(tmp_path / "store", version).update(battles_file, snapshot.pokedex, *analyzers)
+
+    write_battles(battles_file, records[:50])
+    store = FeatureStore.open_existing(tmp_path / "store")
+    assert store.prune(battles_file) > 0
+
+    store = FeatureStore(tmp_path / "store", version)
+    assert store.update(battles_file, snapshot.pokedex, *analyzers) == 0
+    X, y = store.dataset()
+    assert store.n_rows == len(X)
+    X_fresh, y_fresh = fresh_dataset(tmp_path, battles_file, snapshot, analyzers)
+    assert np.array_equal(X, X_fresh) and np.array_equal(y, y_fresh)
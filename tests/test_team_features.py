@@ -0,0 +1,23 @@
+"""team_feature_matrix against extract_features."""
+
+import numpy as np
+
+from src.features.cache import TeamFeatureCache
+from src.features.team_features import FEATURE_NAMES, extract_features, team_feature_matrix
+
+
+def test_team_feature_matrix_matches_extract_features(pokedex, coverage_analyzer, meta_analyzer, team_ids):
+    X = team_feature_matrix(team_ids, pokedex, coverage_analyzer, meta_analyzer)
+    assert X.shape == (len(team_ids), len(FEATURE_NAMES))
+
+    cache = TeamFeatureCache()
+    for row, ids in zip(X, team_ids):
+        names = [pokedex.names[species_id] for species_id in ids]
+        assert np.array_equal(row, extract_features(names, pokedex, coverage_analyzer, meta_analyzer))
+        # Member order and caching don't change the values
+        assert np.array_equal(row, extract_features(names[::-1], pokedex, coverage_analyzer, meta_analyzer, cache))
+
+
+def test_extract_features_rejects_unknown_species(pokedex, coverage_analyzer, meta_analyzer, team_ids):
+    names = [pokedex.names[species_id] for species_id in team_ids[0]]
+    assert extract_features(names[:5] + ["Missingno"], pokedex, coverage_analyzer, meta_analyzer) is None
@@ -4,165 +4,168 @@ Train ML model on REAL Pokemon Showdown battle outcomes.
 Compare feature importances with synthetic data model.
 """
 
-import json
-import numpy as np
+import argparse
+import time
 from pathlib import Path
-from sklearn.ensemble import GradientBoostingRegressor
 from sklearn.model_selection import train_test_split
 import joblib
 
-from src.data.pokedex import Pokedex
-from src.data.types import TypeChart
-from src.data.usage import UsageStats
+from src.data import battles as battle_io
+from src.data.snapshot import load_snapshot
+from src.features.cache import TeamFeatureCache
 from src.features.coverage import CoverageAnalyzer
+from src.features.dataset import dataset_feature_names
+from src.features.instrument import Instrumentation
+from src.features.matchup import MatchupTable
 from src.features.meta import MetaAnalyzer
-from src.features.roles import RoleDetector
-
-
-def extract_features(team_names: list[str], pokedex, coverage_analyzer, meta_analyzer) -> np.ndarray:
-    """Extract 7 features from a team (same as synthetic model)."""
-
-    # Convert names to Pokemon objects
-    team = []
-    for name in team_names:
-        mon = pokedex.get(name)
-        if mon:
-            team.append(mon)
-
-    if len(team) != 6:
-        return None
-
-    # Type coverage features
-    type_score = coverage_analyzer.type_coverage_score(team)
-
-    # Meta matchup
-    meta_score = meta_analyzer.meta_coverage_score(team)
-
-    # Role diversity
-    role_detector = RoleDetector()
-    roles = set()
-    for mon in team:
-        mon_roles = role_detector.detect_roles(mon)
-        roles.update(mon_roles)
-    role_score = len(roles) / 4  # Max 4 roles
-
-    # Secondary features
-    avg_speed = np.mean([mon.base_stats['spe'] for mon in team])
-    type_diversity = len(set([t for mon in team for t in mon.types]))
-
-    # Physical/special balance
-    physical_count = sum(1 for mon in team if mon.base_stats['atk'] > mon.base_stats['spa'])
-    balance = min(physical_count, 6 - physical_count) / 3
-
-    # Bulk
-    avg_bulk = np.mean([(mon.base_stats['hp'] + mon.base_stats['def'] + mon.base_stats['spd']) / 3 for mon in team])
-
-    return np.array([
-        type_score,
-        meta_score,
-        role_score,
-        avg_speed,
-        type_diversity,
-        balance,
-        avg_bulk
-    ])
+from src.features.store import DEFAULT_STORE_PATH, FeatureStore, feature_version
+from src.features.team_features import extract_features  # noqa: F401  (moved; re-exported for existing imports)
+from src.models.backends import DEFAULT_BACKEND, TRAINER_BACKENDS, train_model
 
 
 def load_battles(battles_file: Path):
     """Load battles from JSONL file."""
-    battles = []
-    with open(battles_file) as f:
-        for line in f:
-            battles.append(json.loads(line))
-    return battles
-
-
-def train_on_real_data():
-    """Train model on real battle outcomes."""
+    return battle_io.load_battles(battles_file)
+
+
+def train_on_real_data(
+    cache_size: int = 65536,
+    chunk_size: int = 1000,
+    json_backend: str = "auto",
+    workers: int = 1,
+    store_path: Path = None,
+    rebuild_store: bool = False,
+    matchup_features: bool = False,
+    instrumentation: Instrumentation = None,
+    backend: str = DEFAULT_BACKEND,
+    compare_backend: str = None,
+):
+    """
+    Train model on real battle outcomes.
+
+    Features are kept in an on-disk feature store keyed by battle_id and
+    record content. Only battles that are new or changed are featurized,
+    and only battles in the current replay file are trained on. The store
+    is rebuilt when the feature code or source data change. Battles
+    repeated in the replay file are used once.
+
+    Args:
+        cache_size: Max teams kept in the feature cache (0 disables it)
+        chunk_size: Battles decoded and featurized per chunk
+        json_backend: "auto", "orjson" or "json"
+        workers: Feature extraction processes (1 extracts in-process)
+        store_path: Feature store directory (default: data/cache/features)
+        rebuild_store: Recompute features for every battle
+        matchup_features: Add p1-vs-p2 matchup columns to each team's row.
+            The model is saved separately, since recommend_trio re-ranks
+            single teams with the 7 team features
+        instrumentation: Records stage timings; enter it (with ...) around the
+            call to also time the per-team scoring hot paths
+        backend: Trainer backend, "hgb" (HistGradientBoostingClassifier) or
+            "gbr" (the original GradientBoostingRegressor)
+        compare_backend: Also train this backend on the same split and
+            report wall-clock and validation metrics side by side
+    """
+    if instrumentation is None:
+        instrumentation = Instrumentation(enabled=False)
 
     print("Loading Pokemon data...")
-    pokedex = Pokedex()
-    type_chart = TypeChart()
-    usage_stats = UsageStats()
+    with instrumentation.stage("load_data"):
+        snapshot = load_snapshot()
+    pokedex = snapshot.pokedex
+    type_chart = snapshot.type_chart
+    usage_stats = snapshot.usage_stats
 
-    coverage_analyzer = CoverageAnalyzer(type_chart)
+    coverage_analyzer = CoverageAnalyzer(type_chart, pokedex)
     meta_analyzer = MetaAnalyzer(type_chart, pokedex, usage_stats)
-
-    print("Loading real battles...")
-    battles = load_battles(Path("data/replays/battles_fast.jsonl"))
-    print(f"  Loaded {len(battles)} battles")
-
-    print("\nExtracting features from teams...")
-    X = []
-    y = []
-
-    for i, battle in enumerate(battles):
-        # Extract features for both teams
-        p1_features = extract_features(battle['p1_team'], pokedex, coverage_analyzer, meta_analyzer)
-        p2_features = extract_features(battle['p2_team'], pokedex, coverage_analyzer, meta_analyzer)
-
-        if p1_features is None or p2_features is None:
-            continue
-
-        # Label: winner = 1, loser = 0
-        if battle['winner'] == 'p1':
-            X.append(p1_features)
-            y.append(1)
-            X.append(p2_features)
-            y.append(0)
-        else:
-            X.append(p1_features)
-            y.append(0)
-            X.append(p2_features)
-            y.append(1)
-
-        if (i + 1) % 25 == 0:
-            print(f"  Processed {i + 1}/{len(battles)} battles...")
-
-    X = np.array(X)
-    y = np.array(y)
+    feature_cache = TeamFeatureCache(cache_size) if cache_size > 0 else None
+    instrumentation.add_cache("features", feature_cache)
+    matchup_table = MatchupTable(meta_analyzer) if matchup_features else None
+    feature_names = dataset_feature_names(matchup_features)
+
+    battles_file = Path("data/replays/battles_fast.jsonl")
+    print("Counting real battles...")
+    with instrumentation.stage("count_battles"):
+        n_battles = battle_io.count_battles(battles_file)
+    print(f"  Found {n_battles} battles")
+
+    if store_path is None:
+        store_path = DEFAULT_STORE_PATH.with_name("features_matchup") if matchup_features else DEFAULT_STORE_PATH
+    with instrumentation.stage("open_store"):
+        store = FeatureStore(
+            store_path, feature_version(snapshot, feature_names), rebuild=rebuild_store, feature_names=feature_names
+        )
+    instrumentation.count("battles_in_store", len(store))
+    if store.rebuilt:
+        print("  Feature store is empty or out of date, extracting all battles")
+    else:
+        print(f"  Feature store has {len(store)} battles")
+
+    print("\nExtracting features from new teams...")
+    started = time.perf_counter()
+    with instrumentation.stage("extract"):
+        processed = store.update(
+            battles_file,
+            pokedex,
+            coverage_analyzer,
+            meta_analyzer,
+            feature_cache,
+            matchup_table,
+            chunk_size=chunk_size,
+            json_backend=json_backend,
+            workers=workers,
+            progress=lambda n_done: print(f"  Processed {n_done} new battles..."),
+        )
+    instrumentation.count("battles_extracted", processed)
+
+    elapsed = time.perf_counter() - started
+    print(f"  Extracted {processed} new or changed battles in {elapsed:.2f}s with {workers} worker(s) "
+          f"({processed / elapsed if elapsed > 0 else 0.0:,.0f} battles/s)")
+
+    # Only battles still in the replay file, not every row the store holds
+    X, y = store.dataset()
+
+    if feature_cache is not None and workers <= 1 and processed:
+        stats = feature_cache.stats()
+        print(f"  Feature cache: {stats.hits} hits, {stats.misses} misses, "
+              f"{stats.evictions} evictions ({stats.hit_rate:.1%} hit rate)")
 
     print(f"\n✓ Created dataset:")
     print(f"  Total teams: {len(X)}")
-    print(f"  Winners: {sum(y)} | Losers: {len(y) - sum(y)}")
+    print(f"  Winners: {int(y.sum())} | Losers: {len(y) - int(y.sum())}")
 
     # Train/val split
     X_train, X_val, y_train, y_val = train_test_split(
         X, y, test_size=0.2, random_state=42
     )
 
-    print(f"\nTraining on REAL battle data...")
-    model = GradientBoostingRegressor(
-        n_estimators=100,
-        learning_rate=0.1,
-        max_depth=4,
-        random_state=42
-    )
-
-    model.fit(X_train, y_train)
-
-    # Evaluate
-    train_score = model.score(X_train, y_train)
-    val_score = model.score(X_val, y_val)
-
-    print(f"✓ Training R²: {train_score:.4f}")
-    print(f"✓ Validation R²: {val_score:.4f}")
+    print(f"\nTraining on REAL battle data ({backend} backend)...")
+    with instrumentation.stage("train"):
+        result = train_model(X_train, y_train, X_val, y_val, backend=backend)
+    model = result.model
+
+    print(f"✓ Fit in {result.fit_seconds:.2f}s ({result.n_iter} boosting iterations)")
+    print(f"✓ Validation accuracy: {result.metrics['accuracy']:.4f}")
+    print(f"✓ Validation ROC AUC: {result.metrics['roc_auc']:.4f}")
+    print(f"✓ Validation Brier score: {result.metrics['brier']:.4f}")
+
+    if compare_backend is not None and compare_backend != backend:
+        with instrumentation.stage("train_baseline"):
+            baseline = train_model(X_train, y_train, X_val, y_val, backend=compare_backend)
+        print(f"\n{'Backend':<10} {'Fit (s)':>8} {'Iters':>6} {'Accuracy':>9} {'ROC AUC':>8} {'Brier':>7}")
+        print("-" * 53)
+        for trained in (result, baseline):
+            print(
+                f"{trained.backend:<10} {trained.fit_seconds:>8.2f} {trained.n_iter:>6} "
+                f"{trained.metrics['accuracy']:>9.4f} {trained.metrics['roc_auc']:>8.4f} "
+                f"{trained.metrics['brier']:>7.4f}"
+            )
 
     # Feature importances
-    feature_names = [
-        'type_score',
-        'meta_score',
-        'role_score',
-        'avg_speed',
-        'type_diversity',
-        'balance',
-        'avg_bulk'
-    ]
-
-    importances = model.feature_importances_
+    importances = result.importances
 
     print(f"\n{'='*60}")
-    print("REAL DATA: Feature Importances")
+    print(f"REAL DATA: Feature Importances ({result.importance_method})")
     print(f"{'='*60}")
 
     for name, importance in sorted(zip(feature_names, importances), key=lambda x: x[1], reverse=True):
@@ -189,15 +192,19 @@ def train_on_real_data():
 
     for name in feature_names:
         real_imp = dict(zip(feature_names, importances))[name]
+        if name not in synthetic_importances:
+            print(f"{name:<20} {real_imp:>6.1%}       {'n/a':>6}")
+            continue
         synth_imp = synthetic_importances[name]
         diff = real_imp - synth_imp
         sign = '+' if diff > 0 else ''
         print(f"{name:<20} {real_imp:>6.1%}       {synth_imp:>6.1%}       {sign}{diff:>6.1%}")
 
     # Save model
-    output_path = Path("models/real_data_model.pkl")
+    output_path = Path("models/real_data_matchup_model.pkl" if matchup_features else "models/real_data_model.pkl")
     output_path.parent.mkdir(exist_ok=True)
-    joblib.dump(model, output_path)
+    with instrumentation.stage("save"):
+        joblib.dump(model, output_path)
     print(f"\n✓ Model saved to {output_path}")
 
     # Key findings
@@ -236,4 +243,43 @@ def train_on_real_data():
 
 
 if __name__ == "__main__":
-    train_on_real_data()
+    parser = argparse.ArgumentParser(description="Train a win model on real battle outcomes")
+    parser.add_argument("--workers", type=int, default=1, help="Feature extraction processes")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Battles per extraction chunk")
+    parser.add_argument("--cache-size", type=int, default=65536, help="Feature cache size (0 disables it)")
+    parser.add_argument("--json-backend", choices=battle_io.JSON_BACKENDS, default="auto")
+    parser.add_argument("--store", type=Path, help="Feature store directory (default: data/cache/features)")
+    parser.add_argument("--rebuild-store", action="store_true", help="Recompute all features")
+    parser.add_argument("--matchup-features", action="store_true", help="Add p1-vs-p2 matchup features")
+    parser.add_argument("--timings", type=Path, help="Record stage/hot-path timings and write a JSON summary here")
+    parser.add_argument("--profile", type=Path, help="Also run cProfile and dump pstats here")
+    parser.add_argument("--backend", choices=sorted(TRAINER_BACKENDS), default=DEFAULT_BACKEND)
+    parser.add_argument("--compare-backend", choices=sorted(TRAINER_BACKENDS),
+                        help="Also train this backend and compare wall-clock and accuracy")
+    args = parser.parse_args()
+
+    instrumentation = Instrumentation(
+        enabled=args.timings is not None or args.profile is not None, profile_path=args.profile
+    )
+    with instrumentation:
+        train_on_real_data(
+            cache_size=args.cache_size,
+            chunk_size=args.chunk_size,
+            json_backend=args.json_backend,
+            workers=args.workers,
+            store_path=args.store,
+            rebuild_store=args.rebuild_store,
+            matchup_features=args.matchup_features,
+            instrumentation=instrumentation,
+            backend=args.backend,
+            compare_backend=args.compare_backend,
+        )
+
+    if instrumentation.enabled:
+        print(f"\n{'='*60}")
+        print("TIMINGS")
+        print(f"{'='*60}")
+        print(instrumentation.report())
+        if args.timings is not None:
+            instrumentation.write_json(args.timings)
+            print(f"✓ Timings written to {args.timings}")
@@ -0,0 +1,286 @@
+"""
+Tune the win-prediction model with cross-validated hyperparameter search.
+
+Features come from the on-disk feature store (updated first if battles were
+added), and the store's memory-mapped matrix is shared with the search
+workers: joblib passes memory-mapped arrays to worker processes by file
+reference instead of pickling a copy per task.
+
+Writes a leaderboard (CSV), a JSON summary and the best model, refit on all
+rows, to models/.
+
+Usage:
+    python tune_model.py --backend hgb --search halving --n-candidates 40 --cv 5 --n-jobs 4
+    python tune_model.py --backend gbr --search random --n-candidates 20
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+from scipy.stats import loguniform, randint, uniform
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.metrics import make_scorer, roc_auc_score
+from sklearn.model_selection import HalvingRandomSearchCV, RandomizedSearchCV, StratifiedKFold, cross_val_score
+
+from src.data.snapshot import load_snapshot
+from src.features.cache import TeamFeatureCache
+from src.features.coverage import CoverageAnalyzer
+from src.features.dataset import dataset_feature_names
+from src.features.matchup import MatchupTable
+from src.features.meta import MetaAnalyzer
+from src.features.store import DEFAULT_STORE_PATH, FeatureStore, feature_version
+from src.models.backends import DEFAULT_BACKEND, TRAINER_BACKENDS, make_model
+
+# Hyperparameter distributions per backend
+SEARCH_SPACES = {
+    "hgb": {
+        "learning_rate": loguniform(0.01, 0.3),
+        "max_leaf_nodes": randint(8, 128),
+        "min_samples_leaf": randint(5, 200),
+        "l2_regularization": loguniform(1e-4, 10.0),
+        "max_features": uniform(0.5, 0.5),
+    },
+    "gbr": {
+        "n_estimators": randint(50, 300),
+        "learning_rate": loguniform(0.01, 0.3),
+        "max_depth": randint(2, 7),
+        "subsample": uniform(0.5, 0.5),
+        "min_samples_leaf": randint(1, 100),
+    },
+}
+
+SEARCHES = ("random", "halving")
+
+# Smallest training subsample per fold in successive halving's first round;
+# below this, boosting fits are too small to rank configurations
+MIN_HALVING_ROWS_PER_FOLD = 100
+HALVING_FACTOR = 3
+
+
+def scorer(backend: str):
+    """ROC AUC of the win probability (of the raw prediction for regressors)."""
+    if hasattr(make_model(backend), "predict_proba"):
+        return "roc_auc"
+    return make_scorer(roc_auc_score, response_method="predict")
+
+
+def load_features(
+    battles_file: Path, matchup_features: bool = False, store_path: Path = None, workers: int = 1
+) -> FeatureStore:
+    """Open the feature store and bring it in line with battles_file (see FeatureStore.dataset)."""
+    snapshot = load_snapshot()
+    pokedex = snapshot.pokedex
+    coverage_analyzer = CoverageAnalyzer(snapshot.type_chart, pokedex)
+    meta_analyzer = MetaAnalyzer(snapshot.type_chart, pokedex, snapshot.usage_stats)
+    feature_names = dataset_feature_names(matchup_features)
+
+    if store_path is None:
+        store_path = DEFAULT_STORE_PATH.with_name("features_matchup") if matchup_features else DEFAULT_STORE_PATH
+    store = FeatureStore(store_path, feature_version(snapshot, feature_names), feature_names=feature_names)
+    store.update(
+        battles_file,
+        pokedex,
+        coverage_analyzer,
+        meta_analyzer,
+        TeamFeatureCache(),
+        MatchupTable(meta_analyzer) if matchup_features else None,
+        workers=workers,
+    )
+    return store
+
+
+def write_leaderboard(search, path: Path, default_score: tuple[float, float]) -> list[dict]:
+    """Write the search's candidates, best first, with the default config as a reference row."""
+    results = search.cv_results_
+    rows = []
+    for i, params in enumerate(results["params"]):
+        row = {
+            "rank": int(results["rank_test_score"][i]),
+            "mean_score": float(results["mean_test_score"][i]),
+            "std_score": float(results["std_test_score"][i]),
+            "mean_fit_s": float(results["mean_fit_time"][i]),
+            "params": json.dumps({key: _plain(value) for key, value in params.items()}, sort_keys=True),
+        }
+        if "n_resources" in results:
+            row["n_resources"] = int(results["n_resources"][i])
+        rows.append(row)
+
+    # Halving evaluates candidates at several sample sizes; keep each
+    # candidate's last (largest) round
+    if "n_resources" in results:
+        last = {}
+        for row in rows:
+            if row["params"] not in last or row["n_resources"] >= last[row["params"]]["n_resources"]:
+                last[row["params"]] = row
+        rows = list(last.values())
+
+    rows.sort(key=lambda row: (row["rank"], -row["mean_score"]))
+    rows.append({
+        "rank": "default",
+        "mean_score": default_score[0],
+        "std_score": default_score[1],
+        "mean_fit_s": "",
+        "params": "{}",
+    })
+
+    path.parent.mkdir(exist_ok=True)
+    fieldnames = ["rank", "mean_score", "std_score", "mean_fit_s", "n_resources", "params"]
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+    return rows
+
+
+def _plain(value):
+    """numpy scalars -> Python scalars for JSON."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def tune_model(
+    backend: str = DEFAULT_BACKEND,
+    search_method: str = "halving",
+    n_candidates: int = 40,
+    cv: int = 5,
+    n_jobs: int = 1,
+    random_state: int = 42,
+    matchup_features: bool = False,
+    store_path: Path = None,
+    battles_file: Path = Path("data/replays/battles_fast.jsonl"),
+    output_dir: Path = Path("models"),
+):
+    """
+    Cross-validated hyperparameter search over the stored features.
+
+    Args:
+        backend: Trainer backend (see src.models.backends.TRAINER_BACKENDS)
+        search_method: "random" (RandomizedSearchCV) or "halving" (HalvingRandomSearchCV)
+        n_candidates: Sampled configurations
+        cv: Stratified folds
+        n_jobs: Parallel fits (joblib processes)
+        random_state: Seed for sampling, folds and models
+        matchup_features: Tune on the team + matchup feature set
+        store_path: Feature store directory
+        battles_file: Battle JSONL file used to update the store
+        output_dir: Where the leaderboard, summary and best model are written
+    """
+    print("Loading features...")
+    workers = os.cpu_count() if n_jobs < 0 else max(1, n_jobs)
+    store = load_features(battles_file, matchup_features, store_path, workers=workers)
+    X, y = store.dataset()
+    print(f"  {len(X)} rows × {X.shape[1]} features (from {store.path})")
+
+    folds = StratifiedKFold(n_splits=cv, shuffle=True, random_state=random_state)
+    scoring = scorer(backend)
+
+    default_scores = cross_val_score(make_model(backend, random_state), X, y, cv=folds, scoring=scoring, n_jobs=n_jobs)
+    print(f"  Default {backend}: ROC AUC {default_scores.mean():.4f} ± {default_scores.std():.4f}")
+
+    common = dict(
+        scoring=scoring,
+        cv=folds,
+        n_jobs=n_jobs,
+        random_state=random_state,
+        refit=True,
+        return_train_score=False,
+    )
+    if search_method == "halving":
+        # Like min_resources="exhaust" (the last round uses every row), but
+        # never starting below MIN_HALVING_ROWS_PER_FOLD rows per fold
+        rounds = 1 + math.floor(math.log(n_candidates, HALVING_FACTOR))
+        min_resources = min(
+            len(X), max(MIN_HALVING_ROWS_PER_FOLD * cv, len(X) // HALVING_FACTOR ** (rounds - 1))
+        )
+        search = HalvingRandomSearchCV(
+            make_model(backend, random_state),
+            SEARCH_SPACES[backend],
+            n_candidates=n_candidates,
+            factor=HALVING_FACTOR,
+            resource="n_samples",
+            min_resources=min_resources,
+            **common,
+        )
+    else:
+        search = RandomizedSearchCV(
+            make_model(backend, random_state), SEARCH_SPACES[backend], n_iter=n_candidates, **common
+        )
+
+    print(f"\nSearching {n_candidates} {backend} configurations ({search_method}, {cv}-fold, n_jobs={n_jobs})...")
+    started = time.perf_counter()
+    search.fit(X, y)
+    elapsed = time.perf_counter() - started
+    print(f"✓ Search finished in {elapsed:.1f}s")
+
+    prefix = f"tuning_{backend}{'_matchup' if matchup_features else ''}"
+    leaderboard_path = output_dir / f"{prefix}_leaderboard.csv"
+    rows = write_leaderboard(search, leaderboard_path, (float(default_scores.mean()), float(default_scores.std())))
+
+    print(f"\n{'Rank':>7} {'ROC AUC':>8} {'± std':>7}  Params")
+    print("-" * 80)
+    for row in rows[:-1][:10] + rows[-1:]:
+        print(f"{row['rank']:>7} {row['mean_score']:>8.4f} {row['std_score']:>7.4f}  {row['params']}")
+
+    model_path = output_dir / f"{prefix}_best_model.pkl"
+    joblib.dump(search.best_estimator_, model_path)
+
+    summary = {
+        "backend": backend,
+        "search": search_method,
+        "n_candidates": n_candidates,
+        "cv": cv,
+        "n_jobs": n_jobs,
+        "random_state": random_state,
+        "scoring": "roc_auc",
+        "rows": int(len(X)),
+        "feature_names": store.feature_names,
+        "feature_version": store.version,
+        "default_score": float(default_scores.mean()),
+        "best_score": float(search.best_score_),
+        "best_params": {key: _plain(value) for key, value in search.best_params_.items()},
+        "search_seconds": elapsed,
+        "model_path": str(model_path),
+        "leaderboard_path": str(leaderboard_path),
+    }
+    summary_path = output_dir / f"{prefix}_summary.json"
+    summary_path.write_text(json.dumps(summary, indent=2))
+
+    print(f"\n✓ Best ROC AUC {search.best_score_:.4f} (default {default_scores.mean():.4f})")
+    print(f"✓ Leaderboard saved to {leaderboard_path}")
+    print(f"✓ Best model saved to {model_path}")
+    print(f"✓ Summary saved to {summary_path}")
+    return search
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cross-validated hyperparameter search for the win model")
+    parser.add_argument("--backend", choices=sorted(TRAINER_BACKENDS), default=DEFAULT_BACKEND)
+    parser.add_argument("--search", choices=SEARCHES, default="halving")
+    parser.add_argument("--n-candidates", type=int, default=40, help="Configurations to sample")
+    parser.add_argument("--cv", type=int, default=5, help="Cross-validation folds")
+    parser.add_argument("--n-jobs", type=int, default=1, help="Parallel fits (-1 for all cores)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--matchup-features", action="store_true", help="Tune on team + matchup features")
+    parser.add_argument("--store", type=Path, help="Feature store directory (default: data/cache/features)")
+    parser.add_argument("--battles", type=Path, default=Path("data/replays/battles_fast.jsonl"))
+    parser.add_argument("--output-dir", type=Path, default=Path("models"))
+    args = parser.parse_args()
+
+    tune_model(
+        backend=args.backend,
+        search_method=args.search,
+        n_candidates=args.n_candidates,
+        cv=args.cv,
+        n_jobs=args.n_jobs,
+        random_state=args.seed,
+        matchup_features=args.matchup_features,
+        store_path=args.store,
+        battles_file=args.battles,
+        output_dir=args.output_dir,
+    )